@@ -0,0 +1,142 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter
+
+async def _client(host, port, requests, latencies, failures):
+    """Send requests over one connection, one at a time, recording each round trip."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for request in requests:
+            start = time.perf_counter()
+            writer.write((json.dumps(request) + "\n").encode())
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - start)
+            if not response.get("ok"):
+                failures.append(response.get("error"))
+    finally:
+        writer.close()
+
+
+def assign_cells(free_cells, clients):
+    """
+    Give each client a location with room for the unit it stores.
+
+    Every client stores at most one unit before taking it out again, so a
+    location with n free units can be shared by n clients.
+
+    Args:
+        free_cells (list): Locations from the "space" request
+        clients (int): Number of clients
+
+    Returns:
+        list: (row, col) per client, shorter than clients if space ran out
+    """
+    cells = []
+    for cell in free_cells:
+        for _ in range(min(cell["free"], clients - len(cells))):
+            cells.append((cell["row"], cell["col"]))
+        if len(cells) >= clients:
+            break
+    return cells
+
+
+def build_requests(sku, count, mix, row, col):
+    """
+    Build a request sequence for one client.
+
+    Stores and retrieves alternate on the same location so the warehouse ends
+    the run with the stock it started with.
+
+    Args:
+        sku (str): Product to operate on
+        count (int): Number of requests
+        mix (str): "write", "read" or "mixed"
+        row (int): Row of a location with a free unit for this client
+        col (int): Column of that location
+
+    Returns:
+        list: Request dictionaries
+    """
+    requests = []
+    writes = 0
+    for i in range(count):
+        if mix == "read" or (mix == "mixed" and i % 4 == 3):
+            requests.append({"id": i, "op": "find", "sku": sku})
+            continue
+        op = "store" if writes % 2 == 0 else "retrieve"
+        requests.append({"id": i, "op": op, "sku": sku, "quantity": 1, "row": row, "col": col})
+        writes += 1
+    # Leave the location as it was if the last request stored a unit
+    if requests and requests[-1]["op"] == "store":
+        requests.append({"id": count, "op": "retrieve", "sku": sku, "quantity": 1, "row": row, "col": col})
+    return requests
+
+
+async def run_load_test(host, port, clients, count, mix):
+    """
+    Run a load test against a running WarehouseServer.
+
+    Returns:
+        dict: Request count, failures and their most common reasons, elapsed seconds,
+            requests per second and latency percentiles
+    """
+    # Ask the server what it is serving so requests target real products and locations with room
+    reader, writer = await asyncio.open_connection(host, port)
+    space = {"op": "space", "limit": clients}
+    writer.write(f'{{"op": "query", "limit": 64}}\n{json.dumps(space)}\n'.encode())
+    await writer.drain()
+    products = json.loads(await reader.readline())["result"]
+    free_cells = json.loads(await reader.readline())["result"]
+    writer.close()
+    if not products:
+        raise SystemExit("The warehouse has no products to test with")
+    cells = assign_cells(free_cells, clients) if mix != "read" else [(0, 0)] * clients
+    if len(cells) < clients:
+        raise SystemExit(f"The warehouse only has free space for {len(cells)} of {clients} writing clients")
+
+    latencies = []
+    failures = []
+    workloads = [build_requests(products[n % len(products)]["sku"], count, mix, *cells[n])
+                 for n in range(clients)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, workload, latencies, failures) for workload in workloads))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    return {
+        "requests": len(latencies),
+        "failures": len(failures),
+        "failure_reasons": dict(Counter(failures).most_common(5)),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(0.50), 2),
+        "p95_ms": round(percentile(0.95), 2),
+        "p99_ms": round(percentile(0.99), 2),
+    }
+
+
+def main():
+    """Run the load test from the command line and print the results."""
+    parser = argparse.ArgumentParser(description="Measure requests per second against api_server.py.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent connections")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per connection")
+    parser.add_argument("--mix", choices=["write", "read", "mixed"], default="mixed")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_load_test(args.host, args.port, args.clients, args.requests, args.mix))
+    print(json.dumps(results, indent=2))
+    # Figures from rejected requests do not measure the normal path
+    if results["failures"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from warehouse import Warehouse
+from data_storage import DataStorage
+from utils.logging_utils import configure_logging, get_logger
+from utils.metrics import REGISTRY
+
+log = get_logger(__name__)
+
+# Mutations waiting for the writer task
+WRITE_QUEUE_DEPTH = REGISTRY.gauge("api_write_queue_depth", "Mutations waiting for the API writer task")
+
+class OperationFailed(Exception):
+    """Raised by an operation handler when the warehouse rejects the change."""
+
+
+class WarehouseServer:
+    """
+    Line-delimited JSON API for a warehouse, served over TCP on localhost.
+
+    Each request is one JSON object on its own line and gets exactly one JSON
+    response line back, in the order the requests were sent:
+
+        {"id": 1, "op": "store", "sku": "ABC1234", "quantity": 5, "row": 0, "col": 2}
+        {"id": 1, "ok": true, "result": true}
+
+    Operations:
+        ping      Check the server is alive
+        find      sku                                  Product details and locations
+        query     prefix, min_price, max_price,        Products from the sorted indexes
+                  min_quantity, max_quantity, limit
+        search    text, limit                          Fuzzy name/SKU search
+        space     min_free, limit                      Locations with free capacity, in grid order
+        store     sku, quantity, row, col              Store stock at a location
+        retrieve  sku, quantity, row, col              Retrieve stock from a location
+        move      sku, quantity, from_row, from_col,   Move stock between locations
+                  to_row, to_col
+        batch     ops (list of store/retrieve/move)    Apply several changes in order
+        metrics   format ("json" or "prometheus")      Operation counts, latencies and queue depths
+
+    Reads run straight away on a worker thread. Every mutation is queued for
+    a single writer task, which takes all requests waiting in the queue,
+    applies them inside one Warehouse.batch() and so writes the CSV files once
+    per burst instead of once per request.
+
+    Attributes:
+        warehouse (Warehouse): The warehouse being served
+        host (str): Interface the server listens on
+        port (int): TCP port the server listens on
+        max_group (int): Most mutations applied in one persistence flush
+    """
+
+    READ_OPS = ("ping", "find", "query", "search", "space", "metrics")
+    WRITE_OPS = ("store", "retrieve", "move", "batch")
+
+    def __init__(self, warehouse, host="127.0.0.1", port=8765, max_group=256):
+        """Initialize the server without starting it."""
+        self.warehouse = warehouse
+        self.host = host
+        self.port = port
+        self.max_group = max_group
+        self.server = None
+        self.queue = None
+        self.writer_task = None
+
+        # One thread applies every mutation so they reach the warehouse in queue order
+        self.write_executor = ThreadPoolExecutor(max_workers=1)
+        self.read_executor = ThreadPoolExecutor(max_workers=4)
+
+    async def start(self):
+        """Start listening and start the writer task."""
+        self.queue = asyncio.Queue()
+        self.writer_task = asyncio.ensure_future(self._writer_loop())
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        log.info("Warehouse API listening on %s:%s", self.host, self.port)  # Debug message
+
+    async def serve_forever(self):
+        """Start the server and run until cancelled."""
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def stop(self):
+        """Stop accepting connections and wait for queued mutations to finish."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.writer_task is not None:
+            await self.queue.join()
+            self.writer_task.cancel()
+        self.write_executor.shutdown(wait=True)
+        self.read_executor.shutdown(wait=True)
+        self.warehouse.save_data(force=True)
+
+    async def handle_client(self, reader, writer):
+        """Serve one connection until the client closes it."""
+        peer = writer.get_extra_info("peername")
+        log.debug("API client connected: %s", peer)  # Debug message
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await self.handle_line(line)
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            log.debug("API client disconnected: %s", peer)  # Debug message
+
+    async def handle_line(self, line):
+        """
+        Decode and answer one request line.
+
+        Args:
+            line (bytes): The raw request line
+
+        Returns:
+            dict: The response object
+        """
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {"id": None, "ok": False, "error": "Invalid JSON"}
+        if not isinstance(request, dict):
+            return {"id": None, "ok": False, "error": "Request must be a JSON object"}
+
+        op = request.get("op")
+        loop = asyncio.get_running_loop()
+        if op in self.READ_OPS:
+            response = await loop.run_in_executor(self.read_executor, self.execute, request)
+        elif op in self.WRITE_OPS:
+            future = loop.create_future()
+            await self.queue.put((request, future))
+            WRITE_QUEUE_DEPTH.set(self.queue.qsize())
+            response = await future
+        else:
+            response = {"ok": False, "error": f"Unknown operation: {op}"}
+        response["id"] = request.get("id")
+        return response
+
+    async def _writer_loop(self):
+        """Apply queued mutations in groups, one persistence flush per group."""
+        loop = asyncio.get_running_loop()
+        while True:
+            group = [await self.queue.get()]
+            # Coalesce whatever else arrived while the previous group was being written
+            while len(group) < self.max_group and not self.queue.empty():
+                group.append(self.queue.get_nowait())
+            WRITE_QUEUE_DEPTH.set(self.queue.qsize())
+
+            requests = [request for request, _ in group]
+            try:
+                responses = await loop.run_in_executor(self.write_executor, self._apply_group, requests)
+            except Exception as e:
+                log.error("API write group failed: %s", e)  # Debug message
+                responses = [{"ok": False, "error": str(e)} for _ in group]
+
+            for (_, future), response in zip(group, responses):
+                if not future.done():
+                    future.set_result(response)
+                self.queue.task_done()
+
+    def _apply_group(self, requests):
+        """Apply a group of mutation requests with a single save at the end."""
+        log.debug("API applying %s queued changes", len(requests))  # Debug message
+        with self.warehouse.batch():
+            return [self.execute(request) for request in requests]
+
+    def execute(self, request):
+        """
+        Run a single request against the warehouse.
+
+        Args:
+            request (dict): The decoded request
+
+        Returns:
+            dict: Response with "ok" and either "result" or "error"
+        """
+        handler = getattr(self, f"op_{request.get('op')}", None)
+        if handler is None:
+            return {"ok": False, "error": f"Unknown operation: {request.get('op')}"}
+        try:
+            return {"ok": True, "result": handler(request)}
+        except (KeyError, TypeError, ValueError) as e:
+            return {"ok": False, "error": f"Bad request: {e}"}
+        except OperationFailed as e:
+            return {"ok": False, "error": str(e)}
+        except Exception as e:
+            # Answer instead of dropping the connection, as the writer loop does
+            log.error("API request %s failed: %s", request.get("op"), e, exc_info=True)  # Debug message
+            return {"ok": False, "error": str(e)}
+
+    def op_ping(self, request):
+        """Return a short status summary."""
+        return {"products": len(self.warehouse.products),
+                "rows": self.warehouse.rows, "cols": self.warehouse.cols}
+
+    def op_find(self, request):
+        """Return a product and the locations holding it."""
+        sku = str(request["sku"])
+        product = self.warehouse.products.get(sku)
+        if product is None:
+            raise OperationFailed(f"Product with SKU '{sku}' not found")
+        result = product_to_dict(product)
+        result["locations"] = []
+        for r, c in self.warehouse.find_product(sku):
+            location = self.warehouse.grid[r][c]
+            result["locations"].append({"row": r, "col": c, "code": location.get_location_code(),
+                                        "quantity": location.inventory.get(sku, 0)})
+        return result
+
+    def op_query(self, request):
+        """Return products matching index range and prefix conditions."""
+        products = self.warehouse.query_products(
+            prefix=request.get("prefix"),
+            min_price=_optional(request, "min_price", float),
+            max_price=_optional(request, "max_price", float),
+            min_quantity=_optional(request, "min_quantity", int),
+            max_quantity=_optional(request, "max_quantity", int),
+            limit=_optional(request, "limit", int),
+        )
+        return [product_to_dict(product) for product in products]
+
+    def op_search(self, request):
+        """Return products ranked by fuzzy match on name and SKU."""
+        products = self.warehouse.search_products(str(request["text"]), limit=int(request.get("limit", 10)))
+        return [product_to_dict(product) for product in products]
+
+    def op_space(self, request):
+        """Return locations with at least min_free units of free capacity."""
+        min_free = max(1, int(request.get("min_free", 1)))
+        limit = _optional(request, "limit", int)
+        result = []
+        for row in self.warehouse.grid:
+            for location in row:
+                free = location.get_available_capacity()
+                if free >= min_free:
+                    result.append({"row": location.row, "col": location.col,
+                                   "code": location.get_location_code(), "free": free})
+                    if limit is not None and len(result) >= limit:
+                        return result
+        return result
+
+    def op_metrics(self, request):
+        """Return the process metrics as data, or as Prometheus text."""
+        if request.get("format", "json") == "prometheus":
+            return REGISTRY.to_prometheus()
+        return REGISTRY.to_dict()
+    
+    def op_store(self, request):
+        """Store stock at a location."""
+        sku, quantity, row, col = str(request["sku"]), int(request["quantity"]), int(request["row"]), int(request["col"])
+        if not self.warehouse.store_product(sku, quantity, row, col):
+            raise OperationFailed(f"Could not store {quantity} x {sku} at ({row},{col})")
+        return True
+
+    def op_retrieve(self, request):
+        """Retrieve stock from a location."""
+        sku, quantity, row, col = str(request["sku"]), int(request["quantity"]), int(request["row"]), int(request["col"])
+        if not self.warehouse.retrieve_product(sku, quantity, row, col):
+            raise OperationFailed(f"Could not retrieve {quantity} x {sku} from ({row},{col})")
+        return True
+
+    def op_move(self, request):
+        """Move stock between two locations."""
+        sku, quantity = str(request["sku"]), int(request["quantity"])
+        source = (int(request["from_row"]), int(request["from_col"]))
+        target = (int(request["to_row"]), int(request["to_col"]))
+        if not self.warehouse.move_product(sku, quantity, *source, *target):
+            raise OperationFailed(f"Could not move {quantity} x {sku} from {source} to {target}")
+        return True
+
+    def op_batch(self, request):
+        """
+        Apply a list of store/retrieve/move operations in order.
+
+        Operations are independent: a failed one is reported in its slot and
+        the rest still run.
+        """
+        ops = request["ops"]
+        if not isinstance(ops, list):
+            raise ValueError("ops must be a list")
+        results = []
+        for op in ops:
+            if not isinstance(op, dict) or op.get("op") not in ("store", "retrieve", "move"):
+                results.append({"ok": False, "error": "Batch entries must be store, retrieve or move"})
+            else:
+                results.append(self.execute(op))
+        return results
+
+
+def product_to_dict(product):
+    """Convert a Product to a JSON-friendly dictionary."""
+    return {"sku": product.sku, "name": product.name, "price": product.price, "quantity": product.quantity}
+
+
+def _optional(request, key, convert):
+    """Return request[key] converted, or None when it is missing or null."""
+    value = request.get(key)
+    return None if value is None else convert(value)
+
+
+def main():
+    """Run the API server from the command line."""
+    parser = argparse.ArgumentParser(description="Serve the warehouse as line-delimited JSON over TCP.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: localhost only)")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port (default: 8765)")
+    parser.add_argument("--log-level", default="INFO", help="DEBUG, INFO, WARNING or ERROR (default: INFO)")
+    parser.add_argument("--log-file", help="Also write log records to this file as JSON lines")
+    parser.add_argument("--durability", choices=["fast", "group", "strict"],
+                        help="How writes are forced to disk (default: the saved setting)")
+    parser.add_argument("--metrics-file", help="Write operation metrics to this file on exit "
+                                               "(.prom or .txt for Prometheus text, otherwise JSON)")
+    args = parser.parse_args()
+    configure_logging(args.log_level, log_file=args.log_file)
+
+    # Use the warehouse dimensions the GUI was set up with
+    settings = DataStorage.read_settings()
+    warehouse = Warehouse(settings["warehouse_rows"], settings["warehouse_cols"])
+    warehouse.user = "api"
+    if args.durability:
+        warehouse.data_storage.durability.mode = args.durability
+    warehouse.load_data()
+
+    server = WarehouseServer(warehouse, args.host, args.port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        log.warning("API server stopped")  # Debug message
+    finally:
+        warehouse.save_data(force=True)
+        if args.metrics_file:
+            REGISTRY.dump(args.metrics_file)
+
+if __name__ == "__main__":
+    main()
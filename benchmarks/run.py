@@ -0,0 +1,259 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from product import Product
+from warehouse import Warehouse
+from benchmarks.synthetic import generate_warehouse
+from utils.durability import FSYNC_CALLS
+from utils.logging_utils import configure_logging
+
+
+def summarize(latencies):
+    """
+    Summarize per-call latencies.
+
+    Args:
+        latencies (list): Seconds taken by each call
+
+    Returns:
+        dict: Call count, total seconds, calls per second and latency percentiles in milliseconds
+    """
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    def percentile(p):
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000, 4)
+    return {
+        "iterations": len(ordered),
+        "seconds": round(total, 6),
+        "ops_per_second": round(len(ordered) / total, 1) if total else None,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(ordered[-1] * 1000, 4),
+    }
+
+
+def _timed(call, *args):
+    """Run call(*args) and return the seconds it took."""
+    start = time.perf_counter()
+    call(*args)
+    return time.perf_counter() - start
+
+
+def bench_find_product(warehouse, rng, iterations):
+    """Look up the locations of random products."""
+    skus = list(warehouse.products)
+    return [_timed(warehouse.find_product, rng.choice(skus)) for _ in range(iterations)]
+
+
+def bench_store_product(warehouse, rng, iterations):
+    """Store single units of random products at random locations with room."""
+    skus = list(warehouse.products)
+    cells = [location for row in warehouse.grid for location in row]
+    latencies = []
+    for _ in range(iterations):
+        # Only locations with room, so every call takes the successful path
+        location = rng.choice([cell for cell in rng.sample(cells, min(8, len(cells)))
+                               if cell.get_available_capacity() > 0] or cells)
+        latencies.append(_timed(warehouse.store_product, rng.choice(skus), 1, location.row, location.col))
+    return latencies
+
+
+def bench_retrieve_product(warehouse, rng, iterations):
+    """Retrieve single units from random occupied locations."""
+    cells = [location for row in warehouse.grid for location in row]
+    latencies = []
+    for _ in range(iterations):
+        location = rng.choice([cell for cell in rng.sample(cells, min(8, len(cells)))
+                               if cell.inventory] or cells)
+        sku = next(iter(location.inventory), next(iter(warehouse.products)))
+        latencies.append(_timed(warehouse.retrieve_product, sku, 1, location.row, location.col))
+    return latencies
+
+
+def bench_distribute_initial_quantity(warehouse, rng, iterations):
+    """Place the initial stock of newly added products."""
+    latencies = []
+    for n in range(iterations):
+        # Registering the product is not part of the measurement
+        product = Product(f"Benchmark Item {n}", f"BENCH{n:07d}", 1.0, 10)
+        warehouse.add_product(product)
+        latencies.append(_timed(warehouse.distribute_initial_quantity, product))
+    return latencies
+
+
+def bench_validate_quantities(warehouse, rng, iterations):
+    """Check every product total against the stock in the grid."""
+    return [_timed(warehouse.validate_quantities) for _ in range(iterations)]
+
+
+def bench_save_data(warehouse, rng, iterations):
+    """Write both CSV files and a journal checkpoint."""
+    def save():
+        # Saves run on background threads; the measurement includes the writes
+        warehouse.save_data(force=True)
+        warehouse.data_storage.wait_for_saves()
+    latencies = []
+    for _ in range(iterations):
+        # One change per round so every save also has a journal checkpoint to write
+        warehouse.update_product(rng.choice(list(warehouse.products)), price=round(rng.uniform(0.5, 250), 2))
+        latencies.append(_timed(save))
+    return latencies
+
+
+def bench_load_data(warehouse, rng, iterations):
+    """Load the saved warehouse into a fresh Warehouse."""
+    latencies = []
+    for _ in range(iterations):
+        fresh = Warehouse(warehouse.rows, warehouse.cols, warehouse.data_storage.data_dir)
+        latencies.append(_timed(fresh.load_data))
+    return latencies
+
+
+# Name, function and whether it uses the full or the reduced iteration count
+BENCHMARKS = [
+    ("find_product", bench_find_product, False),
+    ("store_product", bench_store_product, False),
+    ("retrieve_product", bench_retrieve_product, False),
+    ("distribute_initial_quantity", bench_distribute_initial_quantity, True),
+    ("validate_quantities", bench_validate_quantities, True),
+    ("save_data", bench_save_data, True),
+    ("load_data", bench_load_data, True),
+]
+
+
+def _version():
+    """Describe the code and interpreter being measured."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "platform": platform.platform()}
+
+
+def run_benchmarks(config, only=None, parent_dir=None):
+    """
+    Generate a synthetic warehouse in a temporary directory and measure the hot paths.
+
+    Args:
+        config (dict): rows, cols, sku_count, skus_per_location, fill_ratio, seed,
+            iterations, slow_iterations and durability
+        only (list): Names of the benchmarks to run, or None for all of them
+        parent_dir (str): Where to create the temporary directory, e.g. on the disk
+            being evaluated; defaults to the system temporary directory
+
+    Returns:
+        dict: Version, configuration and a summary per benchmark
+    """
+    data_dir = tempfile.mkdtemp(prefix="warehouse-bench-", dir=parent_dir)
+    results = {}
+    try:
+        generate_warehouse(data_dir, config["rows"], config["cols"], config["sku_count"],
+                           config["skus_per_location"], config["fill_ratio"], config["seed"])
+        warehouse = Warehouse(config["rows"], config["cols"], data_dir)
+        warehouse.user = "benchmark"
+        warehouse.data_storage.durability.mode = config["durability"]
+        warehouse.load_data()
+        rng = random.Random(config["seed"])
+
+        for name, bench, slow in BENCHMARKS:
+            if only and name not in only:
+                continue
+            iterations = config["slow_iterations"] if slow else config["iterations"]
+            fsyncs = FSYNC_CALLS.value
+            latencies = bench(warehouse, rng, iterations)
+            # Let background saves and group fsyncs from this benchmark finish before timing the next one
+            warehouse.data_storage.wait_for_saves()
+            warehouse.data_storage.durability.flush()
+            results[name] = summarize(latencies)
+            results[name]["fsyncs"] = FSYNC_CALLS.value - fsyncs
+            print(f"{name:28} {results[name]['ops_per_second']:>12} ops/s  "
+                  f"p50 {results[name]['p50_ms']:.3f} ms  p99 {results[name]['p99_ms']:.3f} ms", file=sys.stderr)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    return {
+        "version": _version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": config,
+        "benchmarks": results,
+    }
+
+
+def compare(baseline, current):
+    """
+    Compare two result files benchmark by benchmark.
+
+    Returns:
+        list: (name, baseline p50 ms, current p50 ms, percent change) for benchmarks in both
+    """
+    rows = []
+    for name, result in current["benchmarks"].items():
+        before = baseline.get("benchmarks", {}).get(name)
+        if before is None:
+            continue
+        change = (result["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100 if before["p50_ms"] else 0.0
+        rows.append((name, before["p50_ms"], result["p50_ms"], round(change, 1)))
+    return rows
+
+
+def main():
+    """Run the benchmarks from the command line and write the results as JSON."""
+    parser = argparse.ArgumentParser(description="Benchmark warehouse operations on a synthetic warehouse.")
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--cols", type=int, default=40)
+    parser.add_argument("--skus", type=int, default=2000, help="Number of products")
+    parser.add_argument("--skus-per-location", type=int, default=3)
+    parser.add_argument("--fill-ratio", type=float, default=0.5, help="Fraction of location capacity in use")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=500, help="Calls per fast benchmark")
+    parser.add_argument("--slow-iterations", type=int, default=10,
+                        help="Calls per whole-warehouse benchmark (validate, distribute, save, load)")
+    parser.add_argument("--only", nargs="+", choices=[name for name, _, _ in BENCHMARKS])
+    parser.add_argument("--durability", nargs="+", choices=["fast", "group", "strict"], default=["fast"],
+                        help="Durability modes to measure; with several, results are keyed name[mode]")
+    parser.add_argument("--dir", help="Directory to generate the warehouse in (default: system temp)")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file to write")
+    parser.add_argument("--compare", metavar="BASELINE", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    # Debug output would dominate the timings
+    configure_logging("WARNING")
+    config = {
+        "rows": args.rows, "cols": args.cols, "sku_count": args.skus,
+        "skus_per_location": args.skus_per_location, "fill_ratio": args.fill_ratio, "seed": args.seed,
+        "iterations": args.iterations, "slow_iterations": args.slow_iterations,
+    }
+    results = None
+    for mode in args.durability:
+        print(f"Durability mode: {mode}", file=sys.stderr)
+        run = run_benchmarks(dict(config, durability=mode), args.only, args.dir)
+        if len(args.durability) == 1:
+            results = run
+            break
+        # Several modes go into one file, each benchmark tagged with its mode
+        if results is None:
+            results = dict(run, benchmarks={}, config=dict(config, durability=args.durability))
+        for name, summary in run["benchmarks"].items():
+            results["benchmarks"][f"{name}[{mode}]"] = summary
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, "r") as file:
+            baseline = json.load(file)
+        print(f"\n{'benchmark':28} {'baseline p50':>13} {'current p50':>12} {'change':>8}")
+        for name, before, after, change in compare(baseline, results):
+            print(f"{name:28} {before:>10.3f} ms {after:>9.3f} ms {change:>+7.1f}%")
+
+if __name__ == "__main__":
+    main()
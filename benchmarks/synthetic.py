@@ -0,0 +1,62 @@
+import random
+from location import Location
+from product import Product
+from data_storage import DataStorage
+
+# Words combined into product names, so name searches behave like real data
+ADJECTIVES = ["Steel", "Rubber", "Wireless", "Compact", "Heavy Duty", "Plastic", "Copper", "Folding",
+              "Digital", "Cordless", "Waterproof", "Mini", "Industrial", "Ceramic", "Bamboo"]
+NOUNS = ["Bolt", "Gasket", "Headphones", "Toy Car", "Drill", "Hinge", "Cable", "Lamp", "Bracket",
+         "Valve", "Clamp", "Speaker", "Filter", "Washer", "Router", "Kettle", "Charger", "Shelf"]
+
+
+def generate_warehouse(data_dir, rows=5, cols=8, sku_count=100, skus_per_location=2,
+                       fill_ratio=0.5, seed=0):
+    """
+    Write a synthetic warehouse to the CSV files of a data directory.
+
+    Every location holds skus_per_location different products and is filled
+    to fill_ratio of its capacity. Each product's total quantity equals the
+    stock placed for it, so the generated warehouse has no quantity mismatches.
+
+    Args:
+        data_dir (str): Directory to write products.csv and locations.csv to
+        rows (int): Warehouse rows
+        cols (int): Warehouse columns
+        sku_count (int): Number of products
+        skus_per_location (int): Different products stored in each location
+        fill_ratio (float): Fraction of each location's capacity in use, 0 to 1
+        seed (int): Random seed, the same arguments always give the same warehouse
+
+    Returns:
+        dict: The products (SKU to Product) and the grid of Locations written
+    """
+    rng = random.Random(seed)
+    products = {}
+    for n in range(sku_count):
+        sku = f"SKU{n:07d}"
+        name = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {n}"
+        products[sku] = Product(name, sku, round(rng.uniform(0.5, 250), 2), 0)
+
+    skus = list(products)
+    grid = []
+    for r in range(rows):
+        row = []
+        for c in range(cols):
+            location = Location(r, c)
+            held = rng.sample(skus, min(skus_per_location, len(skus)))
+            units = int(location.capacity * fill_ratio)
+            # Split the location's stock as evenly as possible between its products
+            for i, sku in enumerate(held):
+                quantity = units // len(held) + (1 if i < units % len(held) else 0)
+                if quantity > 0:
+                    location.add_product(products[sku], quantity)
+                    products[sku].quantity += quantity
+            row.append(location)
+        grid.append(row)
+
+    storage = DataStorage(data_dir)
+    storage.save_products(products)
+    storage.save_locations(grid)
+    storage.wait_for_saves()
+    return {"products": products, "grid": grid}
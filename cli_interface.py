@@ -1,3 +1,4 @@
+from product import Product
 from warehouse import Warehouse
 from data_storage import DataStorage
 
@@ -6,8 +7,10 @@ class CLIInterface:
     
     def __init__(self, user):
         self.user = user
-        self.data_storage = DataStorage()
-        self.warehouse = Warehouse(5, 8)
+        # Use the saved dimensions so stock outside a default-sized grid is not dropped
+        settings = DataStorage.read_settings()
+        self.warehouse = Warehouse(settings["warehouse_rows"], settings["warehouse_cols"])
+        self.data_storage = self.warehouse.data_storage
         self.warehouse.load_data()
     
     def log(self, action):
@@ -22,7 +25,9 @@ class CLIInterface:
             print("2. Store Product")
             print("3. Retrieve Product")
             print("4. View Warehouse")
-            print("5. Exit")
+            print("5. Undo Last Operation")
+            print("6. Redo Operation")
+            print("7. Exit")
             choice = input("Enter your choice: ").strip()
             self.log(f"Chose menu option {choice}")
             
@@ -35,6 +40,10 @@ class CLIInterface:
             elif choice == "4":
                 self.view_warehouse()
             elif choice == "5":
+                self.undo()
+            elif choice == "6":
+                self.redo()
+            elif choice == "7":
                 self.log("Exited CLI")
                 self.warehouse.save_data(force=True)
                 print("Data saved. Exiting...")
@@ -81,6 +90,24 @@ class CLIInterface:
         else:
             print("Failed to retrieve product. Check SKU, quantity, or location.")
     
+    def undo(self):
+        """Undo the last warehouse operation."""
+        description = self.warehouse.undo()
+        if description:
+            print(f"Undone: {description}")
+            self.log(f"Undid: {description}")
+        else:
+            print("Nothing to undo.")
+    
+    def redo(self):
+        """Redo the last undone warehouse operation."""
+        description = self.warehouse.redo()
+        if description:
+            print(f"Redone: {description}")
+            self.log(f"Redid: {description}")
+        else:
+            print("Nothing to redo.")
+    
     def view_warehouse(self):
         """Display the warehouse grid."""
         print(self.warehouse.visualize())
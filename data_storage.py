@@ -1,208 +1,406 @@
 import csv
+import glob
+import io
 import os
 import threading
 import json
 import time
 from product import Product
-from utils.debug_utils import DebugPrint  # <— added
+from event_journal import EventJournal
+from integrity import CHECKSUM_MARKER, snapshot_checksum, split_snapshot
+from utils.durability import DurabilityPolicy
+from utils.file_lock import InterProcessLock
+from utils.logging_utils import get_logger
+from utils.metrics import REGISTRY, timed
+
+log = get_logger(__name__)
+
+# Background writes waiting for the file locks or running, across all DataStorage instances
+PENDING_WRITES = REGISTRY.gauge("storage_pending_writes", "Background file writes queued or running")
 
 class DataStorage:
     """
     Handles data persistence for the warehouse inventory system using CSV files.
-    Saves and loads product and location data.
+    Saves and loads product and location data, and owns the event journal.
+    
+    Several processes can share one data directory. Writes hold an
+    inter-process lock, replace files atomically, and each CSV snapshot is
+    stamped with the journal sequence number it reflects so a process with
+    a stale copy never overwrites a newer snapshot. Each snapshot ends with
+    a checksum trailer, so a torn file is recognised instead of half loaded.
+    
+    How far writes are forced to disk is set by the "durability" setting,
+    see DurabilityPolicy.
     """
     
-    def __init__(self, data_dir="data"):
-        """Initialize with directory to store data files."""
+    def __init__(self, data_dir="data", durability=None):
+        """Initialize with directory to store data files, using the saved durability mode unless one is given."""
         self.data_dir = data_dir
         
         # Create data directory if it doesn't exist
         if not os.path.exists(data_dir):
-            DebugPrint.database(f"Creating data directory: {data_dir}")  # <— debug
-            os.makedirs(data_dir)
+            log.debug("Creating data directory: %s", data_dir)  # <— debug
+            os.makedirs(data_dir, exist_ok=True)
             
         self.products_file = os.path.join(data_dir, "products.csv")
         self.locations_file = os.path.join(data_dir, "locations.csv")
         self.settings_file = os.path.join(data_dir, "settings.json")
         self.logs_file = os.path.join(data_dir, "logs.csv")
+        self.versions_file = os.path.join(data_dir, "snapshot_versions.json")
+        
+        # Shared with other processes using the same directory
+        self.process_lock = InterProcessLock(os.path.join(data_dir, ".lock"))
         
         # For thread safety
         self.lock = threading.Lock()
+        
+        # When written files are forced to disk, shared with the journal
+        self.durability = DurabilityPolicy(durability or self.load_settings()["durability"])
+        
+        # Event journal and checkpoints used to rebuild warehouse state at startup
+        self.journal = EventJournal(os.path.join(data_dir, "journal"), process_lock=self.process_lock,
+                                    durability=self.durability)
+        
+        # Background writes still running, so callers can wait for them
+        self._writers = []
+        self._writers_lock = threading.Lock()
+    
+    def _start_writer(self, target, *args):
+        """Run a file write on a background thread that wait_for_saves can join."""
+        def write():
+            try:
+                target(*args)
+            finally:
+                PENDING_WRITES.dec()
+        thread = threading.Thread(target=write)
+        with self._writers_lock:
+            self._writers = [writer for writer in self._writers if writer.is_alive()]
+            self._writers.append(thread)
+        PENDING_WRITES.inc()
+        thread.start()
+    
+    def wait_for_saves(self):
+        """Block until every background save and log write started so far has finished."""
+        with self._writers_lock:
+            writers = list(self._writers)
+        for writer in writers:
+            writer.join()
+    
+    def _temp_path(self, path):
+        """Return a temporary file name next to path that is unique to this process."""
+        return f"{path}.{os.getpid()}.tmp"
+    
+    def load_versions(self):
+        """
+        Read the version stamps of the CSV snapshots.
+        
+        Returns:
+            dict: Snapshot name ("products" or "locations") to journal sequence number
+        """
+        try:
+            with open(self.versions_file, 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+    
+    def _is_newer_on_disk(self, name, version):
+        """Return True if the snapshot on disk already reflects a later journal position."""
+        if version is None:
+            return False
+        return self.load_versions().get(name, -1) > version
+    
+    def _stamp_version(self, name, version):
+        """Record the journal position a freshly written snapshot reflects."""
+        if version is None:
+            return
+        versions = self.load_versions()
+        versions[name] = version
+        temp_file = self._temp_path(self.versions_file)
+        with open(temp_file, 'w') as file:
+            json.dump(versions, file)
+            self.durability.file_written(file, temporary=True)
+        os.replace(temp_file, self.versions_file)
+        self.durability.file_replaced(self.versions_file)
+    
+    def _write_snapshot(self, path, header, rows, version):
+        """
+        Write a CSV snapshot ending in a checksum trailer and move it into place.
+        
+        Args:
+            path (str): Snapshot file to replace
+            header (list): Column names
+            rows (list): Data rows
+            version (int): Journal sequence number the rows reflect, if known
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+        writer.writerows(rows)
+        body = buffer.getvalue()
+        
+        # Create a temporary file first to avoid data corruption if interrupted
+        temp_file = self._temp_path(path)
+        with open(temp_file, 'w', newline='') as file:
+            file.write(body)
+            csv.writer(file).writerow([CHECKSUM_MARKER, "" if version is None else version,
+                                       len(rows), snapshot_checksum(body)])
+            self.durability.file_written(file, temporary=True)
+        
+        # Atomically replace the original file, it is never missing
+        os.replace(temp_file, path)
+        self.durability.file_replaced(path)
+    
+    def _read_snapshot(self, path, report=None):
+        """
+        Read a CSV snapshot and check its checksum trailer.
+        
+        A damaged file is still returned so whatever rows parse can be loaded.
+        
+        Args:
+            path (str): Snapshot file to read
+            report (IntegrityReport): Records whether the checksum matched
+            
+        Returns:
+            str: The file without its trailer, or None if it does not exist
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', newline='') as file:
+            body, status, _ = split_snapshot(file.read())
+        if status == "corrupt":
+            log.error("Checksum mismatch in %s, the file is damaged", path)  # <— debug
+        if report is not None:
+            report.snapshots[os.path.basename(path)] = status
+        return body
+    
+    def recover(self, report=None):
+        """
+        Clean up writes a crash interrupted, before any data is loaded.
+        
+        Every write of a temporary file holds the process lock, so once it is
+        held any temporary file left in the data or journal directory belongs
+        to a write that never finished. A snapshot whose temporary copy
+        passed its checksum but was never renamed is restored when it is newer
+        than the file in place (or that file is damaged); every other
+        temporary file is deleted.
+        
+        Args:
+            report (IntegrityReport): Records what was restored and removed
+            
+        Returns:
+            list: Descriptions of what was cleaned up
+        """
+        recovered = []
+        with self.process_lock, self.lock:
+            for name, path in (("products", self.products_file), ("locations", self.locations_file)):
+                restored = self._restore_snapshot(name, path)
+                if restored:
+                    recovered.append(f"restored {os.path.basename(path)} from interrupted write {os.path.basename(restored)}")
+            
+            temp_files = (glob.glob(os.path.join(self.data_dir, "*.tmp")) +
+                          glob.glob(os.path.join(self.journal.journal_dir, "*.tmp")))
+            for temp_file in temp_files:
+                try:
+                    os.remove(temp_file)
+                    recovered.append(f"removed interrupted write {os.path.basename(temp_file)}")
+                except OSError as e:
+                    log.warning("Could not remove %s: %s", temp_file, e)  # <— debug
+        
+        for action in recovered:
+            log.warning("Recovery: %s", action)  # <— debug
+        if report is not None:
+            report.recovered.extend(recovered)
+        return recovered
+    
+    def _restore_snapshot(self, name, path):
+        """
+        Move the newest complete temporary copy of a snapshot into place.
+        
+        Returns:
+            str: The temporary file that was restored, or None
+        """
+        current_status, current_version = "corrupt", None
+        if os.path.exists(path):
+            with open(path, 'r', newline='') as file:
+                _, current_status, current_version = split_snapshot(file.read())
+            if current_version is None:
+                current_version = self.load_versions().get(name)
+        
+        best = None
+        for temp_file in glob.glob(glob.escape(path) + ".*tmp"):
+            try:
+                with open(temp_file, 'r', newline='') as file:
+                    _, status, version = split_snapshot(file.read())
+            except (OSError, UnicodeDecodeError):
+                continue
+            if status != "valid":
+                continue
+            # A damaged snapshot loses to any complete one; otherwise only a newer one wins
+            newer = (current_status == "corrupt" or
+                     (version is not None and (current_version is None or version > current_version)))
+            if newer and (best is None or (version or -1) > (best[1] or -1)):
+                best = (temp_file, version)
+        
+        if best is None:
+            return None
+        temp_file, version = best
+        os.replace(temp_file, path)
+        self.durability.file_replaced(path)
+        self._stamp_version(name, version)
+        return temp_file
     
-    def save_products(self, products):
+    def save_products(self, products, version=None):
         """
         Save products dictionary to CSV.
         
         Args:
             products (dict): Dictionary of SKU to Product objects
+            version (int): Journal sequence number the products reflect, if known
         """
-        DebugPrint.database(f"Starting thread to save {len(products)} products")  # <— debug
+        log.debug("Starting thread to save %s products", len(products))  # <— debug
         # Use a separate thread for file operations to avoid blocking the UI
-        threading.Thread(target=self._save_products_thread, args=(products,)).start()
+        self._start_writer(self._save_products_thread, products, version)
     
-    def _save_products_thread(self, products):
+    @timed("storage", "save_products")
+    def _save_products_thread(self, products, version=None):
         """Thread function to save products without blocking."""
-        with self.lock:
+        with self.process_lock, self.lock:
             try:
-                DebugPrint.database(f"Saving {len(products)} products to {self.products_file}")  # <— debug
-                # Create a temporary file first to avoid data corruption if interrupted
-                temp_file = self.products_file + ".tmp"
-                
-                with open(temp_file, 'w', newline='') as file:
-                    writer = csv.writer(file)
-                    # Write header
-                    writer.writerow(['sku', 'name', 'price', 'quantity'])
-                    
-                    # Write product data
-                    for product in products.values():
-                        writer.writerow([
-                            product.sku,
-                            product.name,
-                            product.price,
-                            product.quantity
-                        ])
-                
-                # Replace the original file with the temp file
-                if os.path.exists(self.products_file):
-                    os.remove(self.products_file)
-                os.rename(temp_file, self.products_file)
-                DebugPrint.success("Products saved successfully")  # <— debug
+                if self._is_newer_on_disk("products", version):
+                    log.debug("Skipping products save, a newer snapshot is already on disk")  # <— debug
+                    return
+                log.debug("Saving %s products to %s", len(products), self.products_file)  # <— debug
+                # Write product data from a copy, other threads may be adding products
+                rows = [[product.sku, product.name, product.price, product.quantity]
+                        for product in list(products.values())]
+                self._write_snapshot(self.products_file, ['sku', 'name', 'price', 'quantity'], rows, version)
+                self._stamp_version("products", version)
+                log.debug("Products saved successfully")  # <— debug
             except Exception as e:
-                DebugPrint.error(f"Error saving products: {e}")  # <— debug
+                log.error("Error saving products: %s", e)  # <— debug
     
-    def load_products(self):
+    @timed("storage")
+    def load_products(self, report=None):
         """
         Load products from CSV.
         
+        Args:
+            report (IntegrityReport): Counts rows that could not be read
+            
         Returns:
             dict: Dictionary of SKU to Product objects
         """
-        DebugPrint.database("Loading products from CSV")  # <— debug
+        log.debug("Loading products from CSV")  # <— debug
         products = {}
         
+        # No lock needed: saves replace the file atomically, so a reader never sees a partial file
+        try:
+            body = self._read_snapshot(self.products_file, report)
+        except OSError as e:
+            log.error("Error loading products: %s", e)  # <— debug
+            return products
+        
         # If file doesn't exist, return empty dictionary
-        if not os.path.exists(self.products_file):
+        if body is None:
             return products
         
-        with self.lock:    
+        reader = csv.reader(io.StringIO(body))
+        # Skip header
+        next(reader, None)
+        
+        unreadable = 0
+        for row in reader:
             try:
-                with open(self.products_file, 'r', newline='') as file:
-                    reader = csv.reader(file)
-                    # Skip header
-                    next(reader, None)
-                    
-                    for row in reader:
-                        if len(row) >= 4:
-                            sku = row[0]
-                            name = row[1]
-                            price = float(row[2])
-                            quantity = int(row[3])
-                            
-                            # Create product and add to dictionary
-                            product = Product(name, sku, price, quantity)
-                            products[sku] = product
-                DebugPrint.success(f"Loaded {len(products)} products")  # <— debug
-            except Exception as e:
-                DebugPrint.error(f"Error loading products: {e}")  # <— debug
-                    
+                # Create product and add to dictionary
+                product = Product(row[1], row[0], float(row[2]), int(row[3]))
+            except (IndexError, ValueError):
+                unreadable += 1
+                continue
+            products[product.sku] = product
+        
+        if unreadable:
+            log.warning("Skipped %s unreadable rows in %s", unreadable, self.products_file)  # <— debug
+            if report is not None:
+                report.drop("unreadable", unreadable)
+        log.debug("Loaded %s products", len(products))  # <— debug
         return products
     
-    def save_locations(self, warehouse_grid):
+    def save_locations(self, warehouse_grid, version=None):
         """
         Save location inventory to CSV.
         
         Args:
             warehouse_grid (list): 2D array of Location objects
+            version (int): Journal sequence number the locations reflect, if known
         """
-        DebugPrint.database("Starting thread to save locations")  # <— debug
+        log.debug("Starting thread to save locations")  # <— debug
         # Use a separate thread for file operations to avoid blocking the UI
-        threading.Thread(target=self._save_locations_thread, args=(warehouse_grid,)).start()
+        self._start_writer(self._save_locations_thread, warehouse_grid, version)
     
-    def _save_locations_thread(self, warehouse_grid):
+    @timed("storage", "save_locations")
+    def _save_locations_thread(self, warehouse_grid, version=None):
         """Thread function to save locations without blocking."""
-        with self.lock:
+        with self.process_lock, self.lock:
             try:
-                DebugPrint.database(f"Saving locations to {self.locations_file}")  # <— debug
-                # Create a temporary file first to avoid data corruption if interrupted
-                temp_file = self.locations_file + ".tmp"
-                
-                with open(temp_file, 'w', newline='') as file:
-                    writer = csv.writer(file)
-                    # Write header
-                    writer.writerow(['row', 'col', 'sku', 'quantity'])
-                    
-                    # Loop through each location in the grid
-                    for r, row in enumerate(warehouse_grid):
-                        for c, location in enumerate(row):
-                            # Write each product in the location's inventory
-                            for sku, quantity in location.inventory.items():
-                                writer.writerow([r, c, sku, quantity])
-                
-                # Replace the original file with the temp file
-                if os.path.exists(self.locations_file):
-                    os.remove(self.locations_file)
-                os.rename(temp_file, self.locations_file)
-                DebugPrint.success("Locations saved successfully")  # <— debug
+                if self._is_newer_on_disk("locations", version):
+                    log.debug("Skipping locations save, a newer snapshot is already on disk")  # <— debug
+                    return
+                log.debug("Saving locations to %s", self.locations_file)  # <— debug
+                # One row for each product in each location's inventory
+                rows = [[r, c, sku, quantity]
+                        for r, row in enumerate(warehouse_grid)
+                        for c, location in enumerate(row)
+                        for sku, quantity in list(location.inventory.items())]
+                self._write_snapshot(self.locations_file, ['row', 'col', 'sku', 'quantity'], rows, version)
+                self._stamp_version("locations", version)
+                log.debug("Locations saved successfully")  # <— debug
             except Exception as e:
-                DebugPrint.error(f"Error saving locations: {e}")  # <— debug
+                log.error("Error saving locations: %s", e)  # <— debug
     
-    def load_locations(self, warehouse_grid, products):
+    @timed("storage")
+    def read_location_rows(self, report=None):
         """
-        Load location inventory from CSV.
+        Parse the location inventory CSV without applying it.
+        
+        Does not need the products, so it can run at the same time as load_products.
         
         Args:
-            warehouse_grid (list): 2D array of Location objects
-            products (dict): Dictionary of SKU to Product objects
+            report (IntegrityReport): Counts rows that could not be read
             
         Returns:
-            bool: True if successful, False otherwise
+            list: (row, col, sku, quantity) tuples, or None if the file is missing or unreadable
         """
-        DebugPrint.database("Loading locations from CSV")  # <— debug
-        # If file doesn't exist, return False
-        if not os.path.exists(self.locations_file):
-            return False
+        log.debug("Reading locations from CSV")  # <— debug
+        # No lock needed: saves replace the file atomically, so a reader never sees a partial file
+        try:
+            body = self._read_snapshot(self.locations_file, report)
+        except OSError as e:
+            log.error("Error loading locations: %s", e)  # <— debug
+            return None
         
-        with self.lock:    
+        # If file doesn't exist, return None
+        if body is None:
+            return None
+        
+        reader = csv.reader(io.StringIO(body))
+        # Skip header
+        next(reader, None)
+        
+        rows = []
+        unreadable = 0
+        for row in reader:
             try:
-                with open(self.locations_file, 'r', newline='') as file:
-                    reader = csv.reader(file)
-                    # Skip header
-                    next(reader, None)
-                    
-                    # Group locations by position for batch processing
-                    location_data = {}
-                    for row in reader:
-                        if len(row) >= 4:
-                            r = int(row[0])
-                            c = int(row[1])
-                            sku = row[2]
-                            quantity = int(row[3])
-                            
-                            # Skip invalid locations and products
-                            if (r < 0 or r >= len(warehouse_grid) or 
-                                c < 0 or c >= len(warehouse_grid[0]) or
-                                sku not in products):
-                                continue
-                                
-                            # Group by location for more efficient processing
-                            loc_key = (r, c)
-                            if loc_key not in location_data:
-                                location_data[loc_key] = []
-                            location_data[loc_key].append((sku, quantity))
-                    
-                    # Process locations in batches
-                    for (r, c), items in location_data.items():
-                        location = warehouse_grid[r][c]
-                        for sku, quantity in items:
-                            product = products[sku]
-                            location.add_product(product, quantity)
-                            
-                DebugPrint.success("Locations loaded successfully")  # <— debug
-                return True
-            except Exception as e:
-                DebugPrint.error(f"Error loading locations: {e}")  # <— debug
-                return False
+                rows.append((int(row[0]), int(row[1]), row[2], int(row[3])))
+            except (IndexError, ValueError):
+                unreadable += 1
+        
+        if unreadable:
+            log.warning("Skipped %s unreadable rows in %s", unreadable, self.locations_file)  # <— debug
+            if report is not None:
+                report.drop("unreadable", unreadable)
+        return rows
     
+    @timed("storage")
     def save_settings(self, settings):
         """
         Save application settings to JSON file.
@@ -210,26 +408,27 @@ class DataStorage:
         Args:
             settings (dict): Dictionary of application settings
         """
-        DebugPrint.database("Saving settings to JSON")  # <— debug
+        log.debug("Saving settings to JSON")  # <— debug
         try:
-            with self.lock:
+            with self.process_lock, self.lock:
                 # Create a temporary file first to avoid data corruption
-                temp_file = self.settings_file + ".tmp"
+                temp_file = self._temp_path(self.settings_file)
                 
                 with open(temp_file, 'w') as file:
                     json.dump(settings, file, indent=4)
+                    self.durability.file_written(file, temporary=True)
                 
-                # Replace the original file with the temp file
-                if os.path.exists(self.settings_file):
-                    os.remove(self.settings_file)
-                os.rename(temp_file, self.settings_file)
+                # Atomically replace the original file
+                os.replace(temp_file, self.settings_file)
+                self.durability.file_replaced(self.settings_file)
                 
-            DebugPrint.success("Settings saved")  # <— debug
+            log.debug("Settings saved")  # <— debug
             return True
         except Exception as e:
-            DebugPrint.error(f"Error saving settings: {e}")  # <— debug
+            log.error("Error saving settings: %s", e)  # <— debug
             return False
     
+    @timed("storage")
     def load_settings(self):
         """
         Load application settings from JSON file.
@@ -237,39 +436,58 @@ class DataStorage:
         Returns:
             dict: Dictionary of application settings, or default settings if file doesn't exist
         """
-        DebugPrint.database("Loading settings from JSON")  # <— debug
+        return self.read_settings(self.data_dir)
+    
+    @staticmethod
+    def read_settings(data_dir="data"):
+        """
+        Load the settings of a data directory without opening its journal or locks.
+        
+        Startup code reads the warehouse dimensions with this before the
+        Warehouse, and with it the DataStorage that owns the journal, exists.
+        
+        Args:
+            data_dir (str): Directory holding settings.json
+            
+        Returns:
+            dict: Dictionary of application settings, or default settings if file doesn't exist
+        """
+        log.debug("Loading settings from JSON")  # <— debug
         default_settings = {
             "warehouse_rows": 5,
             "warehouse_cols": 8,
+            "durability": "fast",
             "first_run": True
         }
         
-        if not os.path.exists(self.settings_file):
+        settings_file = os.path.join(data_dir, "settings.json")
+        if not os.path.exists(settings_file):
             return default_settings
         
+        # No lock needed: saves replace the file atomically, so a reader never sees a partial file
         try:
-            with self.lock:
-                with open(self.settings_file, 'r') as file:
-                    settings = json.load(file)
+            with open(settings_file, 'r') as file:
+                settings = json.load(file)
+                
+            log.debug("Settings loaded")  # <— debug
+            # Ensure all required settings exist
+            for key, value in default_settings.items():
+                if key not in settings:
+                    settings[key] = value
                     
-                DebugPrint.success("Settings loaded")  # <— debug
-                # Ensure all required settings exist
-                for key, value in default_settings.items():
-                    if key not in settings:
-                        settings[key] = value
-                        
-                return settings
+            return settings
         except Exception as e:
-            DebugPrint.error(f"Error loading settings: {e}")  # <— debug
+            log.error("Error loading settings: %s", e)  # <— debug
             return default_settings
     
     def save_log(self, user, action):
         """Append a timestamped log entry (user, action) to logs_file."""
-        DebugPrint.database(f"Logging action: {user} - {action}")  # <— debug
-        threading.Thread(target=self._save_log_thread, args=(user, action)).start()
+        log.debug("Logging action: %s - %s", user, action)  # <— debug
+        self._start_writer(self._save_log_thread, user, action)
 
+    @timed("storage", "save_log")
     def _save_log_thread(self, user, action):
-        with self.lock:
+        with self.process_lock, self.lock:
             header = not os.path.exists(self.logs_file)
             ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
             # Append file
@@ -278,16 +496,20 @@ class DataStorage:
                 if header:
                     writer.writerow(["timestamp", "user", "action"])
                 writer.writerow([ts, user, action])
+                self.durability.file_written(f)
+            if header:
+                self.durability.file_replaced(self.logs_file)
 
+    @timed("storage")
     def load_logs(self):
         """Return list of (timestamp, user, action) from logs_file."""
-        DebugPrint.database("Loading logs from CSV")  # <— debug
+        log.debug("Loading logs from CSV")  # <— debug
         if not os.path.exists(self.logs_file):
             return []
         with self.lock:
             with open(self.logs_file, "r", newline="") as f:
                 reader = csv.reader(f)
                 rows = list(reader)
-        DebugPrint.success(f"Loaded {len(rows) - 1} log entries")  # <— debug
+        log.debug("Loaded %s log entries", len(rows) - 1)  # <— debug
         # skip header
         return rows[1:] if len(rows) > 1 else []
@@ -0,0 +1,249 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from utils.logging_utils import get_logger
+from utils.virtual_tree import VirtualTreeview
+
+log = get_logger(__name__)
+
+class ManualAssignmentDialog:
+    """
+    Dialog for choosing how many units of a product go to each location.
+    
+    Locations are listed in a virtual table, so a warehouse with thousands
+    of free locations opens as quickly as a small one. Quantities are kept
+    in a dictionary rather than one widget per location, the remaining
+    count is updated by the difference of each edit, and the whole
+    allocation is committed as a single warehouse operation.
+    """
+    
+    # Pause after the last keystroke before the location search runs
+    FILTER_DELAY_MS = 200
+    
+    def __init__(self, parent, warehouse, sku, on_done=None):
+        """
+        Initialize the assignment dialog.
+        
+        Args:
+            parent: Parent widget
+            warehouse (Warehouse): The warehouse to assign stock in
+            sku (str): SKU of the product to assign
+            on_done (callable): Called with the SKU after the assignment was made
+        """
+        self.parent = parent
+        self.warehouse = warehouse
+        self.sku = sku
+        self.product = warehouse.products[sku]
+        self.on_done = on_done
+        
+        # Units the product counts that have no location yet
+        self.unplaced = self.product.quantity - warehouse.stored_totals.get(sku, 0)
+        
+        # Free space of every location that has some, in grid order
+        self.available = {}
+        self.codes = {}
+        for row in warehouse.grid:
+            for location in row:
+                space = location.get_available_capacity()
+                if space > 0:
+                    key = (location.row, location.col)
+                    self.available[key] = space
+                    self.codes[key] = location.get_location_code()
+        
+        self.allocation = {}  # Maps (row, col) to the units chosen for it
+        self.assigned_total = 0
+        self.filter_job = None
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Assign Product Locations")
+        self.dialog.geometry("450x550")
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        
+        self.create_widgets()
+        self.location_list.set_keys(list(self.available))
+        self.update_remaining()
+    
+    def create_widgets(self):
+        """Create the dialog widgets."""
+        ttk.Label(self.dialog, text=f"Assign Locations for {self.product.name}",
+                 font=("Arial", 12, "bold")).pack(pady=10)
+        ttk.Label(self.dialog, text=f"Units to Assign: {self.unplaced}").pack(pady=5)
+        
+        # Search by location code
+        search_frame = ttk.Frame(self.dialog)
+        search_frame.pack(fill=tk.X, padx=10)
+        ttk.Label(search_frame, text="Find Location:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self.schedule_filter())
+        ttk.Entry(search_frame, textvariable=self.search_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        
+        # Only the visible rows of the table exist as tree items
+        table_frame = ttk.Frame(self.dialog)
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.location_list = VirtualTreeview(table_frame, ("location", "available", "assign"),
+                                             self.get_row_values, self.get_row_tags, show="headings")
+        self.location_tree = self.location_list.tree
+        for column, heading, width in (("location", "Location", 120), ("available", "Available", 100), ("assign", "Assign", 100)):
+            self.location_tree.heading(column, text=heading)
+            self.location_tree.column(column, width=width)
+        self.location_tree.tag_configure("assigned", background="#e0f0ff")
+        self.location_tree.bind("<<TreeviewSelect>>", self.on_select, add="+")
+        self.location_tree.bind("<Double-1>", lambda event: self.quantity_entry.focus_set())
+        
+        # One editor for the selected location instead of one per row
+        edit_frame = ttk.Frame(self.dialog)
+        edit_frame.pack(fill=tk.X, padx=10, pady=5)
+        self.selected_label = ttk.Label(edit_frame, text="Select a location", width=18)
+        self.selected_label.pack(side=tk.LEFT)
+        self.quantity_var = tk.StringVar(value="0")
+        self.quantity_entry = ttk.Spinbox(edit_frame, from_=0, to=0, textvariable=self.quantity_var, width=8)
+        self.quantity_entry.pack(side=tk.LEFT, padx=5)
+        self.quantity_entry.bind("<Return>", lambda event: self.set_selected(advance=True))
+        ttk.Button(edit_frame, text="Set", command=self.set_selected).pack(side=tk.LEFT, padx=2)
+        ttk.Button(edit_frame, text="Fill", command=self.fill_selected).pack(side=tk.LEFT, padx=2)
+        
+        self.remaining_label = ttk.Label(self.dialog)
+        self.remaining_label.pack(pady=5)
+        
+        # Action buttons
+        btn_frame = ttk.Frame(self.dialog)
+        btn_frame.pack(fill=tk.X, pady=10, padx=10)
+        ttk.Button(btn_frame, text="Assign Locations", command=self.assign_locations).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Suggest", command=self.suggest).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Clear", command=self.clear).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Cancel", command=self.dialog.destroy).pack(side=tk.RIGHT, padx=5)
+    
+    def get_row_values(self, key):
+        """Return the table columns for a location."""
+        return (self.codes[key], self.available[key], self.allocation.get(key, ""))
+    
+    def get_row_tags(self, key):
+        """Highlight locations that have units assigned."""
+        return ("assigned",) if key in self.allocation else ()
+    
+    def schedule_filter(self):
+        """Run the location search once typing pauses."""
+        if self.filter_job is not None:
+            self.dialog.after_cancel(self.filter_job)
+        self.filter_job = self.dialog.after(self.FILTER_DELAY_MS, self.apply_filter)
+    
+    def apply_filter(self):
+        """Show only locations whose code contains the search text."""
+        self.filter_job = None
+        text = self.search_var.get().strip().upper()
+        if text:
+            keys = [key for key in self.available if text in self.codes[key]]
+        else:
+            keys = list(self.available)
+        self.location_list.set_keys(keys)
+    
+    def on_select(self, event):
+        """Load the selected location into the editor."""
+        key = self.location_list.selected_key
+        if key is None:
+            return
+        self.selected_label.config(text=f"{self.codes[key]} (max {self.available[key]})")
+        self.quantity_entry.config(to=self.available[key])
+        self.quantity_var.set(str(self.allocation.get(key, 0)))
+    
+    def set_quantity(self, key, quantity):
+        """
+        Set the units for one location, keeping the running total.
+        
+        Args:
+            key (tuple): (row, col) of the location
+            quantity (int): Units to assign, limited to the location's free space
+        """
+        quantity = max(0, min(quantity, self.available[key]))
+        # Only the difference to the previous value changes the total
+        self.assigned_total += quantity - self.allocation.get(key, 0)
+        if quantity:
+            self.allocation[key] = quantity
+        else:
+            self.allocation.pop(key, None)
+        self.location_list.refresh_key(key)
+    
+    def set_selected(self, advance=False):
+        """Apply the editor's quantity to the selected location."""
+        key = self.location_list.selected_key
+        if key is None:
+            return "break"
+        try:
+            quantity = int(self.quantity_var.get())
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a whole number of units.", parent=self.dialog)
+            return "break"
+        self.set_quantity(key, quantity)
+        self.update_remaining()
+        if advance:
+            # Enter moves on to the next location for quick keyboard entry
+            self.location_list.move_selection(1)
+        self.quantity_entry.focus_set()
+        self.quantity_entry.selection_range(0, tk.END)
+        return "break"
+    
+    def fill_selected(self):
+        """Assign as many of the remaining units as fit at the selected location."""
+        key = self.location_list.selected_key
+        if key is None:
+            return
+        remaining = self.unplaced - self.assigned_total + self.allocation.get(key, 0)
+        self.set_quantity(key, remaining)
+        self.quantity_var.set(str(self.allocation.get(key, 0)))
+        self.update_remaining()
+    
+    def suggest(self):
+        """Pre-fill the table with the warehouse's suggested first-fit allocation."""
+        self.allocation = {}
+        self.assigned_total = 0
+        for row, col, quantity in self.warehouse.suggest_allocation(self.unplaced):
+            # Only locations listed when the dialog opened can be edited
+            if (row, col) in self.available:
+                self.set_quantity((row, col), quantity)
+        self.location_list.render()
+        self.on_select(None)
+        self.update_remaining()
+    
+    def clear(self):
+        """Remove every assignment."""
+        self.allocation = {}
+        self.assigned_total = 0
+        self.location_list.render()
+        self.on_select(None)
+        self.update_remaining()
+    
+    def update_remaining(self):
+        """Show how many units are still without a location."""
+        remaining = self.unplaced - self.assigned_total
+        if remaining < 0:
+            self.remaining_label.config(text=f"Over-assigned by {-remaining} units", foreground="red")
+        else:
+            self.remaining_label.config(text=f"Remaining Quantity: {remaining}", foreground="")
+    
+    def assign_locations(self):
+        """Commit the allocation as one warehouse operation."""
+        if self.assigned_total > self.unplaced:
+            messagebox.showerror("Error", f"Only {self.unplaced} units can be assigned.", parent=self.dialog)
+            return
+        
+        # Grid order keeps the journal and undo history easy to read
+        placements = [(row, col, self.allocation[(row, col)]) for row, col in sorted(self.allocation)]
+        log.debug("Manually assigning %s units of %s to %s locations", self.assigned_total, self.sku, len(placements))
+        quantity = self.product.quantity
+        if not self.warehouse.assign_stock(self.sku, placements, match_quantity=True):
+            messagebox.showerror("Error", "The locations changed while assigning. Please try again.", parent=self.dialog)
+            return
+        
+        if self.assigned_total < self.unplaced:
+            messagebox.showinfo("Partial Assignment",
+                f"Only {self.assigned_total} of {quantity} units were assigned to locations. Product quantity has been updated.",
+                parent=self.dialog)
+        
+        # Log the action
+        self.warehouse.data_storage.save_log(self.warehouse.user,
+            f"Manually assigned {self.assigned_total} units of {self.sku} to locations")
+        
+        # Close dialog and show the updated product
+        self.dialog.destroy()
+        if self.on_done is not None:
+            self.on_done(self.sku)
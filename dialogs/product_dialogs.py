@@ -168,14 +168,8 @@ class EditProductDialog:
             messagebox.showwarning("Input Error", "Please enter a valid quantity.")
             return
             
-        # Update product
-        self.product.name = name
-        self.product.update_price(price)
-        
-        # Handle quantity change
-        if quantity != self.product.quantity:
-            delta = quantity - self.product.quantity
-            self.product.update_quantity(delta)
+        # Update product through the warehouse so the edit is recorded
+        self.warehouse.update_product(self.sku, name=name, price=price, quantity=quantity)
         
         messagebox.showinfo("Success", "Product updated successfully.")
         self.dialog.destroy()
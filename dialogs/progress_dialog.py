@@ -0,0 +1,81 @@
+import tkinter as tk
+from tkinter import ttk
+from utils.task_runner import TaskRunner
+
+class ProgressDialog:
+    """Dialog that runs a task in the background, showing its progress with a Cancel button."""
+
+    def __init__(self, parent, title, func, *args, on_done=None, on_cancel=None, on_error=None, cancellable=True):
+        """
+        Open the dialog and start func(task, *args) on the task runner.
+
+        The callbacks run on the Tk thread after the dialog has closed.
+
+        Args:
+            parent: Parent widget
+            title (str): Dialog title and first status line
+            func (callable): Function to run; gets the Task as its first argument
+            *args: Further arguments for func
+            on_done (callable): Called with func's result
+            on_cancel (callable): Called if the task stopped because Cancel was pressed
+            on_error (callable): Called with the exception if func raised
+            cancellable (bool): False for work that cannot be stopped part way;
+                the dialog then has no Cancel button
+        """
+        self.on_done = on_done
+        self.on_cancel = on_cancel
+        self.on_error = on_error
+
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(title)
+        self.dialog.geometry("400x150")
+        self.dialog.transient(parent)
+        self.dialog.resizable(False, False)
+
+        self.create_widgets(title, cancellable)
+
+        # Closing the window cancels the task like the Cancel button, or does nothing
+        self.dialog.protocol("WM_DELETE_WINDOW", self.cancel if cancellable else lambda: None)
+
+        self.task = TaskRunner.for_widget(parent).submit(
+            func, *args, name=title, on_progress=self.show_progress,
+            on_done=lambda result: self.finish(self.on_done, result),
+            on_cancel=lambda: self.finish(self.on_cancel),
+            on_error=lambda error: self.finish(self.on_error, error), cancellable=cancellable)
+
+    def create_widgets(self, title, cancellable=True):
+        """Create the dialog widgets."""
+        self.status_var = tk.StringVar(value=f"{title}...")
+        ttk.Label(self.dialog, textvariable=self.status_var, wraplength=360).pack(padx=20, pady=(20, 10), anchor=tk.W)
+
+        # Indeterminate until the task reports a total
+        self.progress = ttk.Progressbar(self.dialog, mode="indeterminate", length=360)
+        self.progress.pack(padx=20, pady=5)
+        self.progress.start(10)
+
+        self.cancel_button = ttk.Button(self.dialog, text="Cancel", command=self.cancel)
+        if cancellable:
+            self.cancel_button.pack(pady=10)
+
+    def show_progress(self, done, total, message):
+        """Show the latest progress reported by the task."""
+        if total:
+            if str(self.progress["mode"]) != "determinate":
+                self.progress.stop()
+                self.progress.config(mode="determinate", maximum=total)
+            self.progress["value"] = done
+        if message:
+            self.status_var.set(message)
+
+    def cancel(self):
+        """Ask the task to stop; the dialog closes once it has."""
+        self.task.cancel()
+        self.cancel_button.config(state=tk.DISABLED)
+        self.status_var.set("Cancelling...")
+
+    def finish(self, callback, *args):
+        """Close the dialog and pass the outcome on."""
+        if self.dialog.winfo_exists():
+            self.dialog.destroy()
+        if callback is not None:
+            callback(*args)
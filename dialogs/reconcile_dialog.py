@@ -0,0 +1,122 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from dialogs.progress_dialog import ProgressDialog
+from utils.logging_utils import get_logger
+
+log = get_logger(__name__)
+
+class ReconcileDialog:
+    """
+    Dialog that previews and applies a reconciliation of mismatched quantities.
+    
+    The preview is a dry run of Warehouse.reconcile, redone whenever the
+    excess policy changes; Apply commits the plan as one operation on the
+    task runner and then shows what was done.
+    """
+    
+    # Policy choices offered for products with more stock than their quantity
+    EXCESS_CHOICES = (
+        ("keep", "Leave excess stock for review"),
+        ("remove", "Remove excess stock from locations"),
+        ("update", "Set product quantity to the stored total"),
+    )
+    
+    # Lines of the plan shown at most, the rest are counted
+    PREVIEW_LINES = 500
+    
+    def __init__(self, parent, warehouse, skus=None, excess="keep", on_done=None):
+        """
+        Initialize the dialog and show the dry-run preview.
+        
+        Args:
+            parent: Parent widget
+            warehouse (Warehouse): The warehouse to reconcile
+            skus (list): Products to reconcile, None for every product
+            excess (str): Excess policy selected when the dialog opens
+            on_done (callable): Called with the applied ReconciliationPlan
+        """
+        self.parent = parent
+        self.warehouse = warehouse
+        self.skus = skus
+        self.on_done = on_done
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Fix Quantities")
+        self.dialog.geometry("550x450")
+        self.dialog.transient(parent)
+        
+        self.excess_var = tk.StringVar(value=excess)
+        self.create_widgets()
+        self.preview()
+    
+    def create_widgets(self):
+        """Create the dialog widgets."""
+        ttk.Label(self.dialog, text="Fix Mismatched Quantities", font=("Arial", 14, "bold")).pack(pady=10)
+        
+        excess_frame = ttk.LabelFrame(self.dialog, text="Excess stock")
+        excess_frame.pack(fill=tk.X, padx=10, pady=5)
+        for value, text in self.EXCESS_CHOICES:
+            ttk.Radiobutton(excess_frame, text=text, value=value, variable=self.excess_var,
+                            command=self.preview).pack(anchor=tk.W, padx=10)
+        
+        self.summary_label = ttk.Label(self.dialog, wraplength=520)
+        self.summary_label.pack(padx=10, pady=5, anchor=tk.W)
+        
+        # Scrollable text area for the plan
+        text_frame = ttk.Frame(self.dialog)
+        text_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        scrollbar = ttk.Scrollbar(text_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text_area = tk.Text(text_frame, wrap=tk.WORD, height=15, yscrollcommand=scrollbar.set)
+        self.text_area.pack(fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.text_area.yview)
+        
+        btn_frame = ttk.Frame(self.dialog)
+        btn_frame.pack(fill=tk.X, pady=10, padx=10)
+        self.apply_button = ttk.Button(btn_frame, text="Apply", command=self.apply)
+        self.apply_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Close", command=self.dialog.destroy).pack(side=tk.RIGHT, padx=5)
+    
+    def show_plan(self, plan, heading):
+        """Show a plan's summary and change lines."""
+        self.summary_label.config(text=f"{heading}: {plan.summary()}")
+        self.text_area.config(state=tk.NORMAL)
+        self.text_area.delete(1.0, tk.END)
+        for line in plan.report_lines(self.warehouse, limit=self.PREVIEW_LINES):
+            self.text_area.insert(tk.END, line + "\n")
+        self.text_area.config(state=tk.DISABLED)  # Make the text area read-only
+    
+    def preview(self):
+        """Show the dry-run plan for the selected excess policy."""
+        plan = self.warehouse.reconcile(self.skus, excess=self.excess_var.get(), dry_run=True)
+        self.show_plan(plan, "Preview")
+        self.apply_button.config(state=tk.NORMAL if plan.has_changes else tk.DISABLED)
+    
+    def apply(self):
+        """Apply the plan in the background."""
+        self.apply_button.config(state=tk.DISABLED)
+        # The main window's task runner does the work, so closing this dialog does not stop it.
+        # The plan is committed as one operation, so there is no Cancel button.
+        ProgressDialog(self.parent, "Fixing mismatched quantities", self.run_reconcile, self.excess_var.get(),
+                       on_done=self.finish,
+                       on_error=lambda e: messagebox.showerror("Fix Failed", f"Quantities could not be fixed:\n{e}"),
+                       cancellable=False)
+    
+    def run_reconcile(self, task, excess):
+        """Reconcile on a worker thread; the plan is rebuilt under the warehouse lock."""
+        task.report(0, None, "Applying changes")
+        return self.warehouse.reconcile(self.skus, excess=excess)
+    
+    def finish(self, plan):
+        """Show what was done and pass the plan on."""
+        if plan.has_changes and not plan.applied:
+            messagebox.showerror("Fix Failed", "The warehouse changed while fixing. Nothing was changed.")
+            if self.dialog.winfo_exists():
+                self.preview()
+            return
+        if self.dialog.winfo_exists():
+            self.show_plan(plan, "Done")
+        self.warehouse.data_storage.save_log(self.warehouse.user, f"Reconciled quantities: {plan.summary()}")
+        log.debug("%s", plan)
+        if self.on_done is not None:
+            self.on_done(plan)
@@ -1,5 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+from utils.product_picker import ProductPicker, product_label
+
+def describe_stock(product):
+    """List a product with the quantity it has in stock."""
+    return f"{product_label(product)} - In Stock: {product.quantity}"
 
 class StoreProductDialog:
     """Dialog for storing a product in the warehouse (general operation)."""
@@ -29,11 +34,8 @@ class StoreProductDialog:
         # Product selection
         ttk.Label(self.dialog, text="Select Product:").pack(anchor=tk.W, padx=20, pady=5)
         
-        self.product_var = tk.StringVar()
-        product_dropdown = ttk.Combobox(self.dialog, textvariable=self.product_var, width=30)
-        product_dropdown['values'] = [f"{p.name} ({p.sku}) - In Stock: {p.quantity}" 
-                                      for p in self.warehouse.products.values()]
-        product_dropdown.pack(padx=20, pady=5, fill=tk.X)
+        self.product_picker = ProductPicker(self.dialog, self.warehouse, describe=describe_stock)
+        self.product_picker.pack(padx=20, pady=5, fill=tk.X)
         
         # Quantity selection
         ttk.Label(self.dialog, text="Quantity:").pack(anchor=tk.W, padx=20, pady=5)
@@ -67,7 +69,8 @@ class StoreProductDialog:
         
     def store_action(self):
         """Handle the store product action."""
-        if not self.product_var.get():
+        sku = self.product_picker.get_sku()
+        if sku is None:
             messagebox.showwarning("Input Error", "Please select a product.")
             return
             
@@ -83,9 +86,6 @@ class StoreProductDialog:
             messagebox.showwarning("Input Error", "Please enter a valid quantity.")
             return
             
-        # Extract SKU from dropdown selection
-        sku = self.product_var.get().split("(")[1].split(")")[0]
-        
         # Convert row letter to index (A=0, B=1, etc.)
         row = ord(self.row_var.get()) - 65
         # Convert column number to index (1=0, 2=1, etc.)
@@ -131,10 +131,8 @@ class StoreLocationDialog:
         # Product selection
         ttk.Label(self.dialog, text="Select Product:").pack(anchor=tk.W, padx=20, pady=5)
         
-        self.product_var = tk.StringVar()
-        product_dropdown = ttk.Combobox(self.dialog, textvariable=self.product_var, width=30)
-        product_dropdown['values'] = [f"{p.name} ({p.sku})" for p in self.warehouse.products.values()]
-        product_dropdown.pack(padx=20, pady=5, fill=tk.X)
+        self.product_picker = ProductPicker(self.dialog, self.warehouse)
+        self.product_picker.pack(padx=20, pady=5, fill=tk.X)
         
         # Quantity selection
         ttk.Label(self.dialog, text="Quantity:").pack(anchor=tk.W, padx=20, pady=5)
@@ -151,7 +149,8 @@ class StoreLocationDialog:
         
     def store_action(self):
         """Handle the store product action."""
-        if not self.product_var.get():
+        sku = self.product_picker.get_sku()
+        if sku is None:
             messagebox.showwarning("Input Error", "Please select a product.")
             return
             
@@ -163,9 +162,6 @@ class StoreLocationDialog:
             messagebox.showwarning("Input Error", "Please enter a valid quantity.")
             return
             
-        # Extract SKU from dropdown selection
-        sku = self.product_var.get().split("(")[1].split(")")[0]
-        
         if self.warehouse.store_product(sku, quantity, self.row, self.col):
             messagebox.showinfo("Success", f"Successfully stored {quantity} units at location {self.location.get_location_code()}")
             self.dialog.destroy()
@@ -199,10 +195,8 @@ class RetrieveProductDialog:
         product_frame = ttk.LabelFrame(self.dialog, text="Step 1: Select Product")
         product_frame.pack(fill=tk.X, padx=20, pady=10)
         
-        self.product_var = tk.StringVar()
-        product_dropdown = ttk.Combobox(product_frame, textvariable=self.product_var, width=30)
-        product_dropdown['values'] = [f"{p.name} ({p.sku})" for p in self.warehouse.products.values()]
-        product_dropdown.pack(padx=10, pady=10, fill=tk.X)
+        self.product_picker = ProductPicker(product_frame, self.warehouse)
+        self.product_picker.pack(padx=10, pady=10, fill=tk.X)
         
         # Second frame: will show locations after product selection
         location_frame = ttk.LabelFrame(self.dialog, text="Step 2: Select Location")
@@ -215,10 +209,10 @@ class RetrieveProductDialog:
         def update_locations(*args):
             self.location_list.delete(0, tk.END)
             
-            if not self.product_var.get():
+            sku = self.product_picker.get_sku()
+            if sku is None:
                 return
                 
-            sku = self.product_var.get().split("(")[1].split(")")[0]
             locations = self.warehouse.find_product(sku)
             
             if not locations:
@@ -229,7 +223,7 @@ class RetrieveProductDialog:
                     self.location_list.insert(tk.END, 
                                         f"{location.get_location_code()} - {location.inventory[sku]} units")
         
-        self.product_var.trace("w", update_locations)
+        self.product_picker.variable.trace_add("write", update_locations)
         
         # Third frame: quantity selection
         quantity_frame = ttk.LabelFrame(self.dialog, text="Step 3: Enter Quantity")
@@ -248,7 +242,8 @@ class RetrieveProductDialog:
         
     def retrieve_action(self):
         """Handle the retrieve product action."""
-        if not self.product_var.get():
+        sku = self.product_picker.get_sku()
+        if sku is None:
             messagebox.showwarning("Input Error", "Please select a product.")
             return
             
@@ -270,9 +265,6 @@ class RetrieveProductDialog:
             messagebox.showwarning("Input Error", "Please enter a valid quantity.")
             return
             
-        # Extract SKU from dropdown selection
-        sku = self.product_var.get().split("(")[1].split(")")[0]
-        
         # Extract location code from list selection
         location_code = location_text.split(" - ")[0]
         row = ord(location_code[0]) - 65
@@ -314,16 +306,11 @@ class RetrieveLocationDialog:
         # Product selection
         ttk.Label(self.dialog, text="Select Product:").pack(anchor=tk.W, padx=20, pady=5)
         
-        product_options = []
-        for sku, qty in self.location.inventory.items():
-            if sku in self.warehouse.products:
-                product_name = self.warehouse.products[sku].name
-                product_options.append(f"{product_name} ({sku}) - Available: {qty}")
-        
-        self.product_var = tk.StringVar()
-        product_dropdown = ttk.Combobox(self.dialog, textvariable=self.product_var, width=30)
-        product_dropdown['values'] = product_options
-        product_dropdown.pack(padx=20, pady=5, fill=tk.X)
+        # Only the products stored here can be picked
+        inventory = self.location.inventory
+        self.product_picker = ProductPicker(self.dialog, self.warehouse, skus=list(inventory),
+            describe=lambda product: f"{product_label(product)} - Available: {inventory.get(product.sku, 0)}")
+        self.product_picker.pack(padx=20, pady=5, fill=tk.X)
         
         # Quantity selection
         ttk.Label(self.dialog, text="Quantity:").pack(anchor=tk.W, padx=20, pady=5)
@@ -340,7 +327,8 @@ class RetrieveLocationDialog:
         
     def retrieve_action(self):
         """Handle the retrieve product action."""
-        if not self.product_var.get():
+        sku = self.product_picker.get_sku()
+        if sku is None:
             messagebox.showwarning("Input Error", "Please select a product.")
             return
             
@@ -352,10 +340,6 @@ class RetrieveLocationDialog:
             messagebox.showwarning("Input Error", "Please enter a valid quantity.")
             return
             
-        # Extract SKU from dropdown selection
-        selected = self.product_var.get()
-        sku = selected.split("(")[1].split(")")[0]
-        
         if self.warehouse.retrieve_product(sku, quantity, self.row, self.col):
             messagebox.showinfo("Success", f"Successfully retrieved {quantity} units from location {self.location.get_location_code()}")
             self.dialog.destroy()
@@ -0,0 +1,68 @@
+class WarehouseChange:
+    """
+    Notification sent to subscribers after the warehouse changed.
+
+    Attributes:
+        topic (str): One of the EventBus topic names
+        sku (str): The SKU of the affected product, or None for whole-warehouse changes
+        cells (frozenset): (row, col) locations whose stock changed
+    """
+
+    def __init__(self, topic, sku=None, cells=()):
+        """Initialize a new WarehouseChange instance."""
+        self.topic = topic
+        self.sku = sku
+        self.cells = frozenset(cells)
+
+    def __repr__(self):
+        """Debug representation of the change."""
+        return f"WarehouseChange({self.topic!r}, sku={self.sku!r}, cells={sorted(self.cells)})"
+
+
+class EventBus:
+    """
+    Lightweight publish/subscribe hub for warehouse change notifications.
+
+    Callbacks run synchronously on the thread that changed the warehouse and
+    receive a single WarehouseChange argument.
+
+    Topics:
+        product_added      A product was registered
+        product_changed    A product's name, price or total quantity changed
+        product_deleted    A product was removed; cells lists where it was stored
+        location_changed   Stock of sku changed at the given cells
+        warehouse_reloaded The whole state was replaced, e.g. after load_data
+    """
+
+    TOPICS = ("product_added", "product_changed", "product_deleted",
+              "location_changed", "warehouse_reloaded")
+
+    def __init__(self):
+        """Initialize with no subscribers."""
+        self.subscribers = {topic: [] for topic in self.TOPICS}
+
+    def subscribe(self, topic, callback):
+        """
+        Register a callback for a topic.
+
+        Args:
+            topic (str): Topic name from EventBus.TOPICS
+            callback (callable): Called with a WarehouseChange
+
+        Returns:
+            callable: The callback, so it can be passed to unsubscribe later
+        """
+        if topic not in self.subscribers:
+            raise ValueError(f"Unknown topic: {topic}")
+        self.subscribers[topic].append(callback)
+        return callback
+
+    def unsubscribe(self, topic, callback):
+        """Remove a previously registered callback, ignoring unknown ones."""
+        if callback in self.subscribers.get(topic, []):
+            self.subscribers[topic].remove(callback)
+
+    def publish(self, change):
+        """Deliver a WarehouseChange to every subscriber of its topic."""
+        for callback in list(self.subscribers[change.topic]):
+            callback(change)
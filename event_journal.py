@@ -0,0 +1,389 @@
+import json
+import os
+import re
+import threading
+import time
+from events import InventoryEvent
+from utils.durability import DurabilityPolicy
+from utils.file_lock import InterProcessLock
+from utils.logging_utils import get_logger
+from utils.metrics import timed
+
+log = get_logger(__name__)
+
+class EventJournal:
+    """
+    Append-only journal of inventory events with periodic checkpoints.
+
+    The journal directory holds these files:
+        checkpoint-<seq>.json   Full warehouse state after event <seq>
+        events-<seq>.jsonl      One JSON event per line, for events after <seq>
+        checkpoints.jsonl       Index of checkpoint sequence numbers and times
+        head                    Version stamp: the newest event and checkpoint
+
+    Startup loads the newest checkpoint and replays only the events in the
+    segments that follow it, so load time depends on the number of events since
+    the last checkpoint rather than on the length of the whole history. Older
+    checkpoints and segments are kept as an exact audit trail.
+
+    Several processes may share one journal. Appends and checkpoints hold an
+    inter-process lock and first compare the head stamp with what this process
+    has seen; events written by other processes since then are read into
+    `unapplied` for the owner to merge, and an append whose events touch the
+    same products or locations as an unmerged event is refused so the caller
+    can merge and retry.
+
+    Attributes:
+        journal_dir (str): Directory holding checkpoints and event segments
+        checkpoint_interval (int): Events between automatic checkpoints
+        last_seq (int): Sequence number of the newest persisted event
+        checkpoint_seq (int): Sequence number covered by the newest checkpoint
+        unapplied (list): Events from other processes not yet merged by the owner
+        process_lock (InterProcessLock): Lock shared with other processes using the journal
+        durability (DurabilityPolicy): When appended events and checkpoints are forced to disk
+    """
+
+    CHECKPOINT_PATTERN = re.compile(r"^checkpoint-(\d+)\.json$")
+    HEAD_SIZE = 42
+    SEGMENT_PATTERN = re.compile(r"^events-(\d+)\.jsonl$")
+
+    def __init__(self, journal_dir, checkpoint_interval=1000, process_lock=None, durability=None):
+        """Initialize the journal and find where the existing history ends."""
+        self.journal_dir = journal_dir
+        self.checkpoint_interval = checkpoint_interval
+        self.last_seq = 0
+        self.checkpoint_seq = 0
+        self.unapplied = []
+
+        if not os.path.exists(journal_dir):
+            log.debug("Creating journal directory: %s", journal_dir)
+            os.makedirs(journal_dir, exist_ok=True)
+
+        # For thread safety, and against other processes sharing the directory
+        self.lock = threading.Lock()
+        self.process_lock = process_lock or InterProcessLock(os.path.join(journal_dir, ".lock"))
+        self.durability = durability or DurabilityPolicy()
+
+        with self.process_lock:
+            self._scan()
+
+    def _checkpoint_path(self, seq):
+        return os.path.join(self.journal_dir, f"checkpoint-{seq:012d}.json")
+
+    def _segment_path(self, seq):
+        return os.path.join(self.journal_dir, f"events-{seq:012d}.jsonl")
+
+    def _index_path(self):
+        return os.path.join(self.journal_dir, "checkpoints.jsonl")
+
+    def _head_path(self):
+        return os.path.join(self.journal_dir, "head")
+
+    def _list_files(self, pattern):
+        """Return the sequence numbers of journal files matching pattern, oldest first."""
+        seqs = []
+        for name in os.listdir(self.journal_dir):
+            match = pattern.match(name)
+            if match:
+                seqs.append(int(match.group(1)))
+        return sorted(seqs)
+
+    def list_checkpoints(self):
+        """Return the sequence numbers of all checkpoints, oldest first."""
+        return self._list_files(self.CHECKPOINT_PATTERN)
+
+    def _scan(self):
+        """Find the newest checkpoint and the last event written after it."""
+        checkpoints = self.list_checkpoints()
+        self.checkpoint_seq = checkpoints[-1] if checkpoints else 0
+        self.last_seq = self.checkpoint_seq
+
+        for event in self.read_events(self.checkpoint_seq):
+            self.last_seq = event.seq
+
+        # An append interrupted after stamping the head leaves a gap, never a reused number
+        head = self._read_head()
+        if head is not None:
+            self.last_seq = max(self.last_seq, head[0])
+
+    def _read_head(self):
+        """
+        Read the version stamp written by the last append or checkpoint.
+
+        Returns:
+            tuple: (last_seq, checkpoint_seq), or None if there is no readable stamp
+        """
+        try:
+            with open(self._head_path(), "rb") as file:
+                last_seq, checkpoint_seq = file.read(self.HEAD_SIZE).split()
+            return int(last_seq), int(checkpoint_seq)
+        except (OSError, ValueError):
+            return None
+
+    def _write_head(self):
+        """Publish this process's view of the journal end to other processes."""
+        # A fixed-size record rewritten in place is far cheaper than a replace per append,
+        # and readers only look at it while holding the process lock
+        record = f"{self.last_seq:020d} {self.checkpoint_seq:020d}\n".encode()
+        mode = "r+b" if os.path.exists(self._head_path()) else "wb"
+        with open(self._head_path(), mode) as file:
+            file.write(record)
+
+    def _refresh(self):
+        """
+        Pick up events and checkpoints written by other processes.
+
+        Must be called with process_lock held. New events are queued in
+        unapplied for the owner to merge.
+        """
+        head = self._read_head()
+        if head is None:
+            return
+        head_seq, head_checkpoint = head
+        if head_seq > self.last_seq:
+            new_events = list(self.read_events(self.last_seq, head_seq))
+            log.debug("Journal has %s new events from other processes", len(new_events))
+            with self.lock:
+                self.unapplied.extend(new_events)
+                self.last_seq = head_seq
+        if head_checkpoint > self.checkpoint_seq:
+            self.checkpoint_seq = head_checkpoint
+
+    def refresh(self):
+        """
+        Check the shared journal for changes made by other processes.
+
+        Returns:
+            bool: True if events from other processes are waiting to be merged
+        """
+        with self.process_lock:
+            self._refresh()
+        return bool(self.unapplied)
+
+    def reset(self):
+        """Re-read where the journal ends, forgetting unmerged events (used before a full load)."""
+        with self.process_lock:
+            with self.lock:
+                self.unapplied = []
+            self._scan()
+
+    def pending(self):
+        """Return a copy of the events from other processes waiting to be merged."""
+        with self.lock:
+            return list(self.unapplied)
+
+    def mark_applied(self, count):
+        """Drop the first count events from unapplied once the owner has merged them."""
+        with self.lock:
+            del self.unapplied[:count]
+
+    @property
+    def applied_seq(self):
+        """Sequence number up to which every event is merged into the owner's state."""
+        with self.lock:
+            return self.unapplied[0].seq - 1 if self.unapplied else self.last_seq
+
+    @property
+    def events_since_checkpoint(self):
+        """Number of events persisted after the newest checkpoint."""
+        return self.last_seq - self.checkpoint_seq
+
+    def needs_checkpoint(self):
+        """Return True once enough events have accumulated for a new checkpoint."""
+        return self.events_since_checkpoint >= self.checkpoint_interval
+
+    @timed("journal")
+    def append(self, events):
+        """
+        Persist events at the end of the journal.
+
+        Each event is given the next sequence number and the current time.
+
+        Args:
+            events (list): InventoryEvent objects to persist, in order
+
+        Returns:
+            bool: True if written, False if another process changed the same
+            products or locations and those changes are not merged yet
+        """
+        if not events:
+            return True
+        with self.process_lock:
+            self._refresh()
+            with self.lock:
+                if self.unapplied:
+                    touched = set()
+                    for event in events:
+                        touched |= event.keys()
+                    if any(touched & event.keys() for event in self.unapplied):
+                        return False
+
+                now = time.time()
+                lines = []
+                for event in events:
+                    self.last_seq += 1
+                    event.seq = self.last_seq
+                    event.timestamp = now
+                    lines.append(json.dumps(event.to_dict()) + "\n")
+
+                # Stamp the head first: a crash before the write leaves a harmless gap.
+                # Only the segment is synced, startup recovers the head from it
+                self._write_head()
+                segment = self._segment_path(self.checkpoint_seq)
+                created = self.durability.mode != "fast" and not os.path.exists(segment)
+                with open(segment, "a") as file:
+                    file.writelines(lines)
+                    self.durability.file_written(file)
+                if created:
+                    self.durability.file_replaced(segment)
+        return True
+
+    def read_events(self, after_seq=0, until_seq=None):
+        """
+        Iterate over persisted events in sequence order.
+
+        Args:
+            after_seq (int): Only events with a greater sequence number are returned
+            until_seq (int): If given, stop after this sequence number
+
+        Yields:
+            InventoryEvent: Events in the order they were written
+        """
+        segments = self._list_files(self.SEGMENT_PATTERN)
+
+        # Start at the last segment that begins at or before after_seq
+        start = 0
+        for index, base in enumerate(segments):
+            if base <= after_seq:
+                start = index
+
+        for base in segments[start:]:
+            if until_seq is not None and base >= until_seq:
+                break
+            with open(self._segment_path(base), "r") as file:
+                for line in file:
+                    try:
+                        event = InventoryEvent.from_dict(json.loads(line))
+                    except (ValueError, KeyError, TypeError):
+                        # A torn final line from an interrupted write is ignored
+                        log.warning("Skipping unreadable journal line in segment %s", base)
+                        continue
+                    if event.seq <= after_seq:
+                        continue
+                    if until_seq is not None and event.seq > until_seq:
+                        return
+                    yield event
+
+    @timed("journal")
+    def write_checkpoint(self, products, grid):
+        """
+        Write a compacted snapshot of the warehouse covering all persisted events.
+
+        Args:
+            products (dict): Dictionary of SKU to Product objects
+            grid (list): 2D array of Location objects
+
+        Returns:
+            bool: True if written, False if events from other processes are
+            not merged into the given state yet
+        """
+        with self.process_lock:
+            self._refresh()
+            with self.lock:
+                if self.unapplied:
+                    return False
+                state = {
+                    "seq": self.last_seq,
+                    "timestamp": time.time(),
+                    "products": [[p.sku, p.name, p.price, p.quantity] for p in products.values()],
+                    "locations": [
+                        [location.row, location.col, sku, quantity]
+                        for row in grid for location in row
+                        for sku, quantity in location.inventory.items()
+                    ],
+                }
+                path = self._checkpoint_path(self.last_seq)
+                temp_file = f"{path}.{os.getpid()}.tmp"
+                with open(temp_file, "w") as file:
+                    json.dump(state, file)
+                    self.durability.file_written(file, temporary=True)
+                os.replace(temp_file, path)
+                self.durability.file_replaced(path)
+                self.checkpoint_seq = self.last_seq
+
+                # Record when the checkpoint was taken so time queries can find it without loading it
+                with open(self._index_path(), "a") as file:
+                    file.write(json.dumps({"seq": state["seq"], "ts": state["timestamp"]}) + "\n")
+                self._write_head()
+        log.debug("Wrote checkpoint at event %s", self.checkpoint_seq)
+        return True
+
+    @timed("journal")
+    def load_checkpoint(self, seq):
+        """
+        Read the checkpoint written at a given sequence number.
+
+        Returns:
+            dict: The checkpoint state, or None if it is missing or unreadable
+        """
+        try:
+            with open(self._checkpoint_path(seq), "r") as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            log.error("Error loading checkpoint %s: %s", seq, e)
+            return None
+
+    def load_latest_checkpoint(self):
+        """
+        Read the newest readable checkpoint.
+
+        Returns:
+            dict: The checkpoint state, or None if the journal has no checkpoint
+        """
+        for seq in reversed(self.list_checkpoints()):
+            state = self.load_checkpoint(seq)
+            if state is not None:
+                return state
+        return None
+
+    def checkpoint_times(self):
+        """
+        Return when each checkpoint was taken.
+
+        Returns:
+            list: (seq, timestamp) tuples for all checkpoints, oldest first
+        """
+        times = {}
+        if os.path.exists(self._index_path()):
+            with open(self._index_path(), "r") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                        times[entry["seq"]] = entry["ts"]
+                    except (ValueError, KeyError, TypeError):
+                        continue
+
+        # Checkpoints written before the index existed are read directly
+        for seq in self.list_checkpoints():
+            if seq not in times:
+                state = self.load_checkpoint(seq)
+                if state is not None:
+                    times[seq] = state["timestamp"]
+        return sorted(times.items())
+
+    def find_checkpoint_before(self, timestamp):
+        """
+        Find the newest checkpoint taken at or before a point in time.
+
+        Args:
+            timestamp (float): Unix time
+
+        Returns:
+            int: The checkpoint's sequence number, or None if there is none
+        """
+        found = None
+        for seq, taken in self.checkpoint_times():
+            if taken > timestamp:
+                break
+            found = seq
+        return found
@@ -0,0 +1,164 @@
+class InventoryEvent:
+    """
+    Base class for a single change to the warehouse inventory.
+
+    Every mutation of products or location stock is expressed as one of the
+    event types below. Events are applied by Warehouse, recorded for undo, and
+    appended to the event journal so that state can be rebuilt by replaying them.
+
+    Attributes:
+        event_type (str): Short type tag used when serializing the event
+        sku (str): The SKU of the product the event affects
+        seq (int): Journal sequence number, set when the event is persisted
+        timestamp (float): Unix time the event was persisted
+    """
+
+    event_type = None
+    fields = ()
+
+    def __init__(self, sku):
+        """Initialize the fields common to all events."""
+        self.sku = sku
+        self.seq = None
+        self.timestamp = None
+
+    def inverse(self):
+        """Return the event that cancels out this event."""
+        raise NotImplementedError
+
+    def copy(self):
+        """Return an unpersisted copy of this event (no seq or timestamp)."""
+        event = InventoryEvent.from_dict(self.to_dict())
+        event.seq = None
+        event.timestamp = None
+        return event
+
+    def keys(self):
+        """
+        Return the pieces of state this event touches.
+
+        Two groups of events whose keys do not overlap can be applied in
+        either order with the same result.
+
+        Returns:
+            set: ("sku", sku) and, for stock events, ("cell", row, col) tuples
+        """
+        return {("sku", self.sku)}
+
+    def to_dict(self):
+        """Return a JSON-serializable dictionary for this event."""
+        data = {"seq": self.seq, "ts": self.timestamp, "type": self.event_type, "sku": self.sku}
+        for field in self.fields:
+            data[field] = getattr(self, field)
+        return data
+
+    @staticmethod
+    def from_dict(data):
+        """
+        Recreate an event from a dictionary produced by to_dict.
+
+        Args:
+            data (dict): Serialized event
+
+        Returns:
+            InventoryEvent: The event, with its seq and timestamp restored
+        """
+        event_class = EVENT_TYPES.get(data.get("type"))
+        if event_class is None:
+            raise ValueError(f"Unknown event type: {data.get('type')}")
+        event = event_class(data["sku"], *(data[field] for field in event_class.fields))
+        event.seq = data.get("seq")
+        event.timestamp = data.get("ts")
+        return event
+
+    def __repr__(self):
+        """Debug representation of the event."""
+        values = ", ".join(f"{field}={getattr(self, field)!r}" for field in self.fields)
+        return f"{type(self).__name__}(sku={self.sku!r}, {values})"
+
+
+class StockAdjusted(InventoryEvent):
+    """Stock of a product at one location changed by delta units."""
+
+    event_type = "stock"
+    fields = ("row", "col", "delta")
+
+    def __init__(self, sku, row, col, delta):
+        super().__init__(sku)
+        self.row = row
+        self.col = col
+        self.delta = delta
+
+    def inverse(self):
+        return StockAdjusted(self.sku, self.row, self.col, -self.delta)
+
+    def keys(self):
+        return {("sku", self.sku), ("cell", self.row, self.col)}
+
+
+class QuantityAdjusted(InventoryEvent):
+    """A product's total quantity changed by delta units."""
+
+    event_type = "quantity"
+    fields = ("delta",)
+
+    def __init__(self, sku, delta):
+        super().__init__(sku)
+        self.delta = delta
+
+    def inverse(self):
+        return QuantityAdjusted(self.sku, -self.delta)
+
+
+class ProductAdded(InventoryEvent):
+    """A product was registered in the warehouse."""
+
+    event_type = "product_added"
+    fields = ("name", "price", "quantity")
+
+    def __init__(self, sku, name, price, quantity):
+        super().__init__(sku)
+        self.name = name
+        self.price = price
+        self.quantity = quantity
+
+    def inverse(self):
+        return ProductRemoved(self.sku, self.name, self.price, self.quantity)
+
+
+class ProductRemoved(InventoryEvent):
+    """A product was removed from the warehouse."""
+
+    event_type = "product_removed"
+    fields = ("name", "price", "quantity")
+
+    def __init__(self, sku, name, price, quantity):
+        super().__init__(sku)
+        self.name = name
+        self.price = price
+        self.quantity = quantity
+
+    def inverse(self):
+        return ProductAdded(self.sku, self.name, self.price, self.quantity)
+
+
+class ProductUpdated(InventoryEvent):
+    """Fields of a product were edited; old and new map field names to values."""
+
+    event_type = "product_updated"
+    fields = ("old", "new")
+
+    def __init__(self, sku, old, new):
+        super().__init__(sku)
+        self.old = dict(old)
+        self.new = dict(new)
+
+    def inverse(self):
+        return ProductUpdated(self.sku, self.new, self.old)
+
+
+# Lookup table used when deserializing events from the journal
+EVENT_TYPES = {
+    event_class.event_type: event_class
+    for event_class in (StockAdjusted, QuantityAdjusted, ProductAdded, ProductRemoved, ProductUpdated)
+}
@@ -0,0 +1,122 @@
+import threading
+import zlib
+
+# First field of the trailer row that ends every CSV snapshot:
+# #checksum,<journal sequence number>,<data rows>,<crc32 of everything before the trailer>
+CHECKSUM_MARKER = "#checksum"
+
+
+def snapshot_checksum(text):
+    """Return the checksum embedded in a CSV snapshot for the text before its trailer."""
+    return f"{zlib.crc32(text.encode('utf-8')):08x}"
+
+
+def split_snapshot(text):
+    """
+    Separate a CSV snapshot from its checksum trailer and verify it.
+
+    Args:
+        text (str): Whole contents of the file
+
+    Returns:
+        tuple: (body, status, version). status is "valid", "unverified" for a
+        file written before snapshots carried a checksum, or "corrupt" for a
+        torn or damaged file; version is the journal sequence number in the
+        trailer, or None
+    """
+    position = text.rfind("\n" + CHECKSUM_MARKER + ",")
+    if position == -1:
+        return text, "unverified", None
+    body = text[:position + 1]
+    fields = text[position + 1:].strip().split(",")
+    if len(fields) != 4 or fields[3] != snapshot_checksum(body):
+        return body, "corrupt", None
+    try:
+        version = int(fields[1]) if fields[1] else None
+        rows = int(fields[2])
+    except ValueError:
+        return body, "corrupt", None
+    # The header line is not a data row
+    if body.count("\n") - 1 < rows:
+        return body, "corrupt", None
+    return body, "valid", version
+
+
+class IntegrityReport:
+    """
+    What startup recovery and the integrity pass found while loading the warehouse.
+
+    Attributes:
+        recovered (list): Descriptions of interrupted writes that were cleaned up
+        snapshots (dict): Snapshot file name to "valid", "unverified" or "corrupt"
+        dropped (dict): Reason to number of stored rows that could not be loaded;
+            reasons are "unreadable", "unknown_sku", "out_of_range" and "over_capacity"
+        mismatched (dict): SKU to (product quantity, quantity stored in locations)
+    """
+
+    def __init__(self):
+        """Initialize an empty report."""
+        self.recovered = []
+        self.snapshots = {}
+        self.dropped = {}
+        self.mismatched = {}
+        # Products and locations are parsed on different threads
+        self._lock = threading.Lock()
+
+    def drop(self, reason, count=1):
+        """Count stored rows skipped for a reason."""
+        with self._lock:
+            self.dropped[reason] = self.dropped.get(reason, 0) + count
+
+    def compare_totals(self, products, stored_totals):
+        """
+        Record every product whose quantity differs from the stock held in locations.
+
+        Args:
+            products (dict): Dictionary of SKU to Product objects
+            stored_totals (dict): SKU to the quantity stored across all locations
+        """
+        self.mismatched = {
+            sku: (product.quantity, stored_totals.get(sku, 0))
+            for sku, product in products.items()
+            if stored_totals.get(sku, 0) != product.quantity
+        }
+
+    @property
+    def ok(self):
+        """True if nothing was dropped, damaged or mismatched."""
+        return not (self.dropped or self.mismatched or "corrupt" in self.snapshots.values())
+
+    def summary(self):
+        """
+        Describe the findings in one line.
+
+        Returns:
+            str: A short human-readable summary
+        """
+        parts = []
+        if self.recovered:
+            parts.append(f"{len(self.recovered)} interrupted writes cleaned up")
+        corrupt = sorted(name for name, status in self.snapshots.items() if status == "corrupt")
+        if corrupt:
+            parts.append(f"checksum mismatch in {', '.join(corrupt)}")
+        if self.dropped:
+            dropped = ", ".join(f"{count} {reason.replace('_', ' ')}" for reason, count in sorted(self.dropped.items()))
+            parts.append(f"{sum(self.dropped.values())} rows dropped ({dropped})")
+        if self.mismatched:
+            parts.append(f"{len(self.mismatched)} products with mismatched quantities")
+        return "; ".join(parts) if parts else "no problems found"
+
+    def to_dict(self):
+        """Describe the report as plain data, e.g. for JSON output."""
+        return {
+            "ok": self.ok,
+            "recovered": list(self.recovered),
+            "snapshots": dict(self.snapshots),
+            "dropped": dict(self.dropped),
+            "mismatched": {sku: list(pair) for sku, pair in self.mismatched.items()},
+        }
+
+    def __str__(self):
+        """String representation of the report."""
+        return f"Integrity check: {self.summary()}"
@@ -0,0 +1,203 @@
+from collections import namedtuple
+from types import MappingProxyType
+from events import StockAdjusted, QuantityAdjusted, ProductAdded, ProductRemoved, ProductUpdated
+
+# Read-only record of a product as it was at some point in time
+ProductRecord = namedtuple("ProductRecord", ["sku", "name", "price", "quantity"])
+
+
+class InventorySnapshot:
+    """
+    Read-only view of the warehouse inventory at a past point in time.
+
+    Attributes:
+        timestamp (float): The Unix time the snapshot describes
+        seq (int): Sequence number of the last event included
+        products (Mapping): SKU to ProductRecord
+        locations (Mapping): (row, col) to a mapping of SKU to quantity
+    """
+
+    def __init__(self, timestamp, seq, products, locations):
+        """Freeze the given product and location data into a snapshot."""
+        self.timestamp = timestamp
+        self.seq = seq
+        self.products = MappingProxyType({
+            sku: ProductRecord(sku, *fields) for sku, fields in products.items()
+        })
+        self.locations = MappingProxyType({
+            cell: MappingProxyType(dict(inventory)) for cell, inventory in locations.items() if inventory
+        })
+
+    def find_product(self, sku):
+        """
+        Find all locations where a product was stored.
+
+        Returns:
+            list: List of (row, col) tuples, in grid order
+        """
+        return sorted(cell for cell, inventory in self.locations.items() if sku in inventory)
+
+    def quantity_at(self, row, col, sku):
+        """Return the quantity of a product stored at a location."""
+        return self.locations.get((row, col), {}).get(sku, 0)
+
+    def __str__(self):
+        """String representation of the snapshot."""
+        return f"Inventory at event {self.seq}: {len(self.products)} products, {len(self.locations)} occupied locations"
+
+
+class InventoryDiff:
+    """
+    Net inventory changes between two points in time.
+
+    Attributes:
+        start (float): Start of the period (exclusive)
+        end (float): End of the period (inclusive)
+        event_count (int): Number of events in the period
+        stock_changes (dict): (sku, row, col) to net change in stock
+        quantity_changes (dict): SKU to net change in the product total
+        added (set): SKUs registered during the period
+        removed (set): SKUs removed during the period
+        updated (dict): SKU to (old fields, new fields) for edited products
+    """
+
+    def __init__(self, start, end):
+        """Initialize an empty diff for the period."""
+        self.start = start
+        self.end = end
+        self.event_count = 0
+        self.stock_changes = {}
+        self.quantity_changes = {}
+        self.added = set()
+        self.removed = set()
+        self.updated = {}
+
+    def add_event(self, event):
+        """Fold one event into the net changes."""
+        self.event_count += 1
+        sku = event.sku
+        if isinstance(event, StockAdjusted):
+            key = (sku, event.row, event.col)
+            self.stock_changes[key] = self.stock_changes.get(key, 0) + event.delta
+            if self.stock_changes[key] == 0:
+                del self.stock_changes[key]
+        elif isinstance(event, QuantityAdjusted):
+            self.quantity_changes[sku] = self.quantity_changes.get(sku, 0) + event.delta
+            if self.quantity_changes[sku] == 0:
+                del self.quantity_changes[sku]
+        elif isinstance(event, ProductAdded):
+            # A product removed and re-added within the period nets out
+            if sku in self.removed:
+                self.removed.discard(sku)
+            else:
+                self.added.add(sku)
+        elif isinstance(event, ProductRemoved):
+            # The removal itself carries the final total, so earlier adjustments are moot
+            self.quantity_changes.pop(sku, None)
+            if sku in self.added:
+                self.added.discard(sku)
+                self.updated.pop(sku, None)
+            else:
+                self.removed.add(sku)
+        elif isinstance(event, ProductUpdated):
+            old, new = self.updated.get(sku, ({}, {}))
+            for field, value in event.old.items():
+                old.setdefault(field, value)
+            new.update(event.new)
+            self.updated[sku] = (old, new)
+
+    def is_empty(self):
+        """Return True if nothing changed overall during the period."""
+        return not (self.stock_changes or self.quantity_changes or self.added
+                    or self.removed or self.updated)
+
+
+class InventoryHistory:
+    """
+    Answers point-in-time questions from the event journal.
+
+    State at a timestamp is rebuilt from the newest checkpoint taken before
+    that time plus the events recorded after it, so a query reads at most one
+    checkpoint interval of events rather than the whole history.
+    """
+
+    def __init__(self, journal):
+        """Initialize with the EventJournal to read from."""
+        self.journal = journal
+
+    def state_at(self, timestamp):
+        """
+        Rebuild the inventory as it was at a point in time.
+
+        Args:
+            timestamp (float): Unix time to rebuild
+
+        Returns:
+            InventorySnapshot: The inventory at that time, or None if the
+            journal has no checkpoint that early
+        """
+        checkpoint_seq = self.journal.find_checkpoint_before(timestamp)
+        if checkpoint_seq is None:
+            return None
+        checkpoint = self.journal.load_checkpoint(checkpoint_seq)
+        if checkpoint is None:
+            return None
+
+        products = {sku: [name, price, quantity] for sku, name, price, quantity in checkpoint["products"]}
+        locations = {}
+        for r, c, sku, quantity in checkpoint["locations"]:
+            locations.setdefault((r, c), {})[sku] = quantity
+
+        seq = checkpoint["seq"]
+        for event in self.journal.read_events(checkpoint["seq"]):
+            if event.timestamp > timestamp:
+                break
+            self._apply(products, locations, event)
+            seq = event.seq
+
+        return InventorySnapshot(timestamp, seq, products, locations)
+
+    def changes_between(self, start, end):
+        """
+        Summarize what changed between two points in time.
+
+        Args:
+            start (float): Unix time the period starts (exclusive)
+            end (float): Unix time the period ends (inclusive)
+
+        Returns:
+            InventoryDiff: Net changes made by the events in the period
+        """
+        diff = InventoryDiff(start, end)
+
+        # Skip straight to the checkpoint before the period instead of reading all history
+        after_seq = self.journal.find_checkpoint_before(start) or 0
+        for event in self.journal.read_events(after_seq):
+            if event.timestamp <= start:
+                continue
+            if event.timestamp > end:
+                break
+            diff.add_event(event)
+        return diff
+
+    @staticmethod
+    def _apply(products, locations, event):
+        """Apply an event to plain product and location dictionaries."""
+        sku = event.sku
+        if isinstance(event, StockAdjusted):
+            inventory = locations.setdefault((event.row, event.col), {})
+            inventory[sku] = inventory.get(sku, 0) + event.delta
+            if inventory[sku] <= 0:
+                del inventory[sku]
+        elif isinstance(event, QuantityAdjusted):
+            if sku in products:
+                products[sku][2] += event.delta
+        elif isinstance(event, ProductAdded):
+            products[sku] = [event.name, event.price, event.quantity]
+        elif isinstance(event, ProductRemoved):
+            products.pop(sku, None)
+        elif isinstance(event, ProductUpdated):
+            if sku in products:
+                for index, field in enumerate(("name", "price", "quantity")):
+                    if field in event.new:
+                        products[sku][index] = event.new[field]
@@ -1,9 +1,8 @@
-import tkinter as tk
+import argparse
 import os
 import platform
-import time
 import sys
-from warehouse_app import WarehouseApp
+from utils.logging_utils import configure_logging
 
 # Simple cross-platform color solution with no dependencies
 class Colors:
@@ -32,19 +31,33 @@ def display_banner():
 
 def main():
     """Main function to run the warehouse management application."""
-    # Clear the console
-    clear_console()
+    parser = argparse.ArgumentParser(description="Start the warehouse management GUI. "
+                                                 "Use warehouse_cli.py for scripts and cron jobs.")
+    parser.add_argument("--user", help="Log in as this user instead of being asked")
+    parser.add_argument("--log-level", help="Console log level: DEBUG, INFO, WARNING or ERROR "
+                                            "(default: $WAREHOUSE_LOG_LEVEL or WARNING)")
+    parser.add_argument("--log-file", help="Also write log records to this file as JSON lines")
+    args = parser.parse_args()
+    configure_logging(args.log_level, log_file=args.log_file)
     
-    # Display banner
-    display_banner()
+    user = args.user
+    if not user:
+        # Clear the console
+        clear_console()
+        
+        # Display banner
+        display_banner()
+        
+        print(f"{Colors.GREEN}Welcome to the Warehouse Management System!")
+        print(f"{Colors.YELLOW}Please log in to continue.\n")
+        
+        user = input(f"{Colors.CYAN}Enter username: {Colors.RESET}").strip()
+        
+        print(f"\n{Colors.GREEN}Welcome, {Colors.YELLOW}{user}{Colors.GREEN}! Loading application...")
     
-    print(f"{Colors.GREEN}Welcome to the Warehouse Management System!")
-    print(f"{Colors.YELLOW}Please log in to continue.\n")
-    
-    user = input(f"{Colors.CYAN}Enter username: {Colors.RESET}").strip()
-    
-    print(f"\n{Colors.GREEN}Welcome, {Colors.YELLOW}{user}{Colors.GREEN}! Loading application...")
-    time.sleep(1)  # Small delay for better user experience
+    # tkinter is only imported once the GUI is actually started
+    import tkinter as tk
+    from warehouse_app import WarehouseApp
     
     # Start the GUI application
     root = tk.Tk()
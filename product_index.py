@@ -0,0 +1,234 @@
+import heapq
+from bisect import bisect_left, bisect_right, insort
+
+
+class _Top:
+    """Sentinel that sorts after any SKU, used for inclusive upper bounds."""
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+
+_TOP = _Top()
+
+
+class ProductIndex:
+    """
+    Sorted secondary indexes over product attributes.
+
+    Each index is a sorted list of (key, sku) tuples, kept up to date as
+    products are added, edited and removed, so range and prefix queries use
+    bisect instead of scanning every product.
+
+    Attributes:
+        by_name (list): Sorted (lower-case name, sku) tuples
+        by_sku (list): Sorted (lower-case sku, sku) tuples
+        by_price (list): Sorted (price, sku) tuples
+        by_quantity (list): Sorted (quantity, sku) tuples
+    """
+
+    def __init__(self):
+        """Initialize empty indexes."""
+        self.by_name = []
+        self.by_sku = []
+        self.by_price = []
+        self.by_quantity = []
+        self.entries = {}  # Maps SKU to the (name, sku, price, quantity) keys currently indexed
+
+    def rebuild(self, products):
+        """
+        Rebuild every index from scratch.
+
+        Args:
+            products (dict): Dictionary of SKU to Product objects
+        """
+        self.entries = {sku: self._keys(product) for sku, product in products.items()}
+        self.by_name = sorted((keys[0], sku) for sku, keys in self.entries.items())
+        self.by_sku = sorted((keys[1], sku) for sku, keys in self.entries.items())
+        self.by_price = sorted((keys[2], sku) for sku, keys in self.entries.items())
+        self.by_quantity = sorted((keys[3], sku) for sku, keys in self.entries.items())
+
+    def add(self, product):
+        """Index a product, replacing any previous entry for its SKU."""
+        if product.sku in self.entries:
+            self.remove(product.sku)
+        keys = self._keys(product)
+        self.entries[product.sku] = keys
+        for index, key in zip(self._indexes(), keys):
+            insort(index, (key, product.sku))
+
+    def remove(self, sku):
+        """Drop a product from every index."""
+        keys = self.entries.pop(sku, None)
+        if keys is None:
+            return
+        for index, key in zip(self._indexes(), keys):
+            position = bisect_left(index, (key, sku))
+            if position < len(index) and index[position] == (key, sku):
+                del index[position]
+
+    def update(self, product):
+        """Re-index a product whose attributes may have changed."""
+        if self.entries.get(product.sku) != self._keys(product):
+            self.add(product)
+
+    def name_prefix(self, prefix):
+        """
+        Iterate over SKUs whose name starts with prefix (case-insensitive), in name order.
+
+        Yields:
+            str: Matching SKUs
+        """
+        yield from self._prefix(self.by_name, prefix.lower())
+
+    def sku_prefix(self, prefix):
+        """
+        Iterate over SKUs that start with prefix (case-insensitive), in SKU order.
+
+        Yields:
+            str: Matching SKUs
+        """
+        yield from self._prefix(self.by_sku, prefix.lower())
+
+    def price_range(self, low=None, high=None):
+        """
+        Iterate over SKUs with low <= price <= high, cheapest first.
+
+        Yields:
+            str: Matching SKUs
+        """
+        yield from self._range(self.by_price, low, high)
+
+    def quantity_range(self, low=None, high=None):
+        """
+        Iterate over SKUs with low <= quantity <= high, smallest first.
+
+        Yields:
+            str: Matching SKUs
+        """
+        yield from self._range(self.by_quantity, low, high)
+
+    @staticmethod
+    def _prefix(index, prefix):
+        position = bisect_left(index, (prefix,))
+        while position < len(index) and index[position][0].startswith(prefix):
+            yield index[position][1]
+            position += 1
+
+    @staticmethod
+    def _range(index, low, high):
+        start = 0 if low is None else bisect_left(index, (low,))
+        end = len(index) if high is None else bisect_right(index, (high, _TOP))
+        for position in range(start, end):
+            yield index[position][1]
+
+    def _indexes(self):
+        return (self.by_name, self.by_sku, self.by_price, self.by_quantity)
+
+    @staticmethod
+    def _keys(product):
+        return (product.name.lower(), product.sku.lower(), product.price, product.quantity)
+
+
+class TrigramIndex:
+    """
+    Inverted index of character trigrams for fuzzy product-name search.
+
+    Every product's name and SKU are lower-cased, padded and split into
+    overlapping three-character grams. A query is split the same way and
+    candidates are ranked by the share of the query's grams they contain,
+    with ties going to the closer overall match, so typos and transposed
+    letters still find the intended product.
+
+    Attributes:
+        postings (dict): Maps a trigram to the set of SKUs containing it
+        grams (dict): Maps a SKU to the set of trigrams indexed for it
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self.postings = {}
+        self.grams = {}
+
+    @staticmethod
+    def trigrams(text):
+        """
+        Split text into its set of padded, lower-case trigrams.
+
+        Args:
+            text (str): Text to split
+
+        Returns:
+            set: The trigrams of every word in text
+        """
+        grams = set()
+        for word in text.lower().split():
+            padded = f"  {word} "
+            for i in range(len(padded) - 2):
+                grams.add(padded[i:i + 3])
+        return grams
+
+    def rebuild(self, products):
+        """Rebuild the index from a dictionary of SKU to Product objects."""
+        self.postings = {}
+        self.grams = {}
+        for product in products.values():
+            self.add(product)
+
+    def add(self, product):
+        """Index a product's name and SKU, replacing any previous entry."""
+        if product.sku in self.grams:
+            self.remove(product.sku)
+        grams = self.trigrams(f"{product.name} {product.sku}")
+        self.grams[product.sku] = grams
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(product.sku)
+
+    def remove(self, sku):
+        """Drop a product from the index."""
+        for gram in self.grams.pop(sku, ()):
+            skus = self.postings.get(gram)
+            if skus is not None:
+                skus.discard(sku)
+                if not skus:
+                    del self.postings[gram]
+
+    def update(self, product):
+        """Re-index a product whose name may have changed."""
+        if self.grams.get(product.sku) != self.trigrams(f"{product.name} {product.sku}"):
+            self.add(product)
+
+    def search(self, text, limit=10, min_score=0.5):
+        """
+        Rank products by trigram similarity to text.
+
+        Args:
+            text (str): What the user typed
+            limit (int): Maximum number of results
+            min_score (float): Lowest share (0-1) of the query's trigrams a match must contain
+
+        Returns:
+            list: (score, sku) tuples, best match first
+        """
+        query = self.trigrams(text)
+        if not query:
+            return []
+
+        # Count shared trigrams per candidate using only the query's posting lists
+        shared = {}
+        for gram in query:
+            for sku in self.postings.get(gram, ()):
+                shared[sku] = shared.get(sku, 0) + 1
+
+        scored = []
+        for sku, hits in shared.items():
+            coverage = hits / len(query)
+            if coverage >= min_score:
+                # Jaccard similarity prefers the product whose own text is closest to the query
+                similarity = hits / (len(query) + len(self.grams[sku]) - hits)
+                scored.append((coverage, similarity, sku))
+        best = heapq.nlargest(limit, scored)
+        return [(coverage, sku) for coverage, _, sku in best]
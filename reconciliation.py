@@ -0,0 +1,141 @@
+from events import StockAdjusted, QuantityAdjusted
+
+# How stock beyond a product's quantity is resolved:
+#   keep    Leave it in place and only report it, for someone to decide on
+#   remove  Take the excess units out of the product's locations
+#   update  Set the product's quantity to the units actually stored
+EXCESS_POLICIES = ("keep", "remove", "update")
+
+
+class ReconciliationPlan:
+    """
+    The changes that make every product's quantity match the stock held in locations.
+
+    Built by Warehouse.plan_reconciliation without changing anything, so it
+    can be shown as a dry run; Warehouse.reconcile commits all of its
+    events as one operation.
+
+    Attributes:
+        excess_policy (str): One of EXCESS_POLICIES
+        mismatched (dict): SKU to (product quantity, quantity stored) before the plan
+        placements (dict): SKU to (row, col, units) stored to cover a shortfall
+        unplaced (dict): SKU to units of a shortfall that did not fit anywhere
+        removals (dict): SKU to (row, col, units) taken out as excess
+        quantity_changes (dict): SKU to (old quantity, new quantity)
+        excess (dict): SKU to excess units left in place under the "keep" policy
+        applied (bool): True once the plan has been committed
+    """
+
+    def __init__(self, excess_policy="keep"):
+        """Initialize an empty plan."""
+        self.excess_policy = excess_policy
+        self.mismatched = {}
+        self.placements = {}
+        self.unplaced = {}
+        self.removals = {}
+        self.quantity_changes = {}
+        self.excess = {}
+        self.applied = False
+
+    def events(self):
+        """
+        Return the events that carry out the plan.
+
+        Returns:
+            list: StockAdjusted and QuantityAdjusted events, in SKU order
+        """
+        events = []
+        for sku in self.mismatched:
+            for row, col, units in self.placements.get(sku, ()):
+                events.append(StockAdjusted(sku, row, col, units))
+            for row, col, units in self.removals.get(sku, ()):
+                events.append(StockAdjusted(sku, row, col, -units))
+            if sku in self.quantity_changes:
+                old, new = self.quantity_changes[sku]
+                events.append(QuantityAdjusted(sku, new - old))
+        return events
+
+    @property
+    def has_changes(self):
+        """True if the plan changes any stock or quantity."""
+        return bool(self.placements or self.removals or self.quantity_changes)
+
+    def summary(self):
+        """
+        Describe the plan in one line.
+
+        Returns:
+            str: A short human-readable summary
+        """
+        if not self.mismatched:
+            return "all quantities match"
+        parts = [f"{len(self.mismatched)} mismatched products"]
+        if self.placements:
+            placed = sum(units for cells in self.placements.values() for _, _, units in cells)
+            parts.append(f"{placed} units stored for {len(self.placements)} products")
+        if self.unplaced:
+            parts.append(f"{sum(self.unplaced.values())} units without space")
+        if self.removals:
+            removed = sum(units for cells in self.removals.values() for _, _, units in cells)
+            parts.append(f"{removed} excess units removed from {len(self.removals)} products")
+        if self.quantity_changes:
+            parts.append(f"{len(self.quantity_changes)} quantities set to the stored total")
+        if self.excess:
+            parts.append(f"{len(self.excess)} products with excess stock left for review")
+        return "; ".join(parts)
+
+    def report_lines(self, warehouse, limit=None):
+        """
+        Describe every change of the plan, one line each.
+
+        Args:
+            warehouse (Warehouse): Supplies product names and location codes
+            limit (int): Most lines to return, None for all
+
+        Returns:
+            list: Report lines, ending with a count of the lines left out
+        """
+        lines = []
+        total = 0
+
+        def add(line):
+            nonlocal total
+            total += 1
+            if limit is None or len(lines) < limit:
+                lines.append(line)
+
+        for sku in self.mismatched:
+            product = warehouse.products.get(sku)
+            label = f"{product.name if product is not None else 'Unknown product'} (SKU: {sku})"
+            for row, col, units in self.placements.get(sku, ()):
+                add(f"Moved {units} units of {label} to Location {warehouse.grid[row][col].get_location_code()} "
+                    f"due to available space.")
+            if sku in self.unplaced:
+                add(f"⚠️ Unable to fully distribute {self.unplaced[sku]} units of {label} due to insufficient space.")
+            for row, col, units in self.removals.get(sku, ()):
+                add(f"Removed {units} units of {label} from Location {warehouse.grid[row][col].get_location_code()}.")
+            if sku in self.quantity_changes:
+                add(f"Updated product quantity for {label} to match the warehouse: {self.quantity_changes[sku][1]}.")
+            if sku in self.excess:
+                add(f"⚠️ {self.excess[sku]} more units of {label} are stored than its quantity; left for review.")
+        if total > len(lines):
+            lines.append(f"... and {total - len(lines)} more changes.")
+        return lines
+
+    def to_dict(self):
+        """Describe the plan as plain data, e.g. for JSON output."""
+        return {
+            "applied": self.applied,
+            "excess_policy": self.excess_policy,
+            "summary": self.summary(),
+            "mismatched": {sku: list(pair) for sku, pair in self.mismatched.items()},
+            "placements": {sku: [list(cell) for cell in cells] for sku, cells in self.placements.items()},
+            "unplaced": dict(self.unplaced),
+            "removals": {sku: [list(cell) for cell in cells] for sku, cells in self.removals.items()},
+            "quantity_changes": {sku: list(pair) for sku, pair in self.quantity_changes.items()},
+            "excess": dict(self.excess),
+        }
+
+    def __str__(self):
+        """String representation of the plan."""
+        return f"Reconciliation: {self.summary()}"
@@ -0,0 +1,78 @@
+class Operation:
+    """
+    A single user-level warehouse mutation recorded for undo/redo.
+
+    An operation is stored as the ordered list of inventory events that were
+    applied to the warehouse. Every event can be inverted on its own, so undoing
+    an operation only touches the data the operation touched.
+
+    Attributes:
+        description (str): Human readable summary, e.g. "Store 5 x ABC1234 at A1"
+        events (list): InventoryEvent objects in the order they were applied
+    """
+
+    def __init__(self, description, events):
+        """Initialize a new Operation instance."""
+        self.description = description
+        self.events = list(events)
+
+    def inverse_events(self):
+        """
+        Build the events that revert this operation.
+
+        Returns:
+            list: Inverted events in reverse order of application
+        """
+        return [event.inverse() for event in reversed(self.events)]
+
+    def replay_events(self):
+        """
+        Build fresh copies of the events to re-apply this operation.
+
+        Returns:
+            list: Unpersisted copies of the events in their original order
+        """
+        return [event.copy() for event in self.events]
+
+    def __str__(self):
+        """String representation of the operation."""
+        return self.description
+
+
+class UndoHistory:
+    """
+    Undo/redo stacks of recorded warehouse operations.
+
+    Attributes:
+        limit (int): Maximum number of operations kept on the undo stack
+        undo_stack (list): Operations that can be undone, newest last
+        redo_stack (list): Operations that can be redone, newest last
+    """
+
+    def __init__(self, limit=200):
+        """Initialize empty undo and redo stacks."""
+        self.limit = limit
+        self.undo_stack = []
+        self.redo_stack = []
+
+    def record(self, operation):
+        """Record a newly applied operation, discarding any redo history."""
+        self.undo_stack.append(operation)
+        self.redo_stack.clear()
+
+        # Drop the oldest operations once the history grows past its limit
+        if len(self.undo_stack) > self.limit:
+            del self.undo_stack[0:len(self.undo_stack) - self.limit]
+
+    def can_undo(self):
+        """Return True if there is an operation to undo."""
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        """Return True if there is an operation to redo."""
+        return bool(self.redo_stack)
+
+    def clear(self):
+        """Forget all recorded operations."""
+        self.undo_stack.clear()
+        self.redo_stack.clear()
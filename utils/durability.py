@@ -0,0 +1,142 @@
+import atexit
+import os
+import threading
+import time
+from utils.logging_utils import get_logger
+from utils.metrics import REGISTRY
+
+log = get_logger(__name__)
+
+# fsync calls made by any policy, and files waiting for the group commit thread
+FSYNC_CALLS = REGISTRY.counter("durability_fsync_total", "fsync calls made for durability")
+GROUP_PENDING = REGISTRY.gauge("durability_group_pending_files", "Files waiting for the next group fsync")
+
+
+def fsync_path(path):
+    """Flush a file or directory that is already written to stable storage."""
+    if os.path.isdir(path):
+        # Windows cannot open directories; its renames are durable once the file is
+        if os.name == "nt":
+            return
+        flags = os.O_RDONLY
+    else:
+        # Windows needs write access to flush a file
+        flags = os.O_RDWR if os.name == "nt" else os.O_RDONLY
+    fd = os.open(path, flags)
+    try:
+        os.fsync(fd)
+        FSYNC_CALLS.inc()
+    finally:
+        os.close(fd)
+
+
+class DurabilityPolicy:
+    """
+    Decides when written files are forced to disk with fsync.
+
+    Modes:
+        fast    Never fsync. The operating system writes files back on its own,
+                so a power cut can lose the last several seconds of changes.
+        group   A background thread fsyncs every file written during a short
+                window with one fsync per file, however many writes it had.
+                At most about one window of changes can be lost, and callers
+                never wait for the disk.
+        strict  fsync each file before it is renamed into place or its write
+                returns, and fsync the directory after a rename or a new file.
+                A completed change is never lost, at the cost of a disk flush
+                per commit.
+
+    Writers call file_written() with the still-open file after writing it,
+    and file_replaced() after an os.replace or after creating a file.
+
+    Attributes:
+        mode (str): "fast", "group" or "strict"; may be changed at any time
+        window (float): Seconds the group commit thread collects writes before syncing
+    """
+
+    MODES = ("fast", "group", "strict")
+
+    def __init__(self, mode="fast", window=0.02):
+        """Initialize the policy; the group commit thread starts when first needed."""
+        if mode not in self.MODES:
+            log.warning("Unknown durability mode %r, using fast", mode)
+            mode = "fast"
+        self.mode = mode
+        self.window = window
+        self._pending = set()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def file_written(self, file, temporary=False):
+        """
+        Handle a file that has just been written and is still open.
+
+        Args:
+            file: The open file object
+            temporary (bool): The file is about to be renamed; in group mode it
+                is synced under its final name by file_replaced instead
+        """
+        if self.mode == "fast":
+            return
+        file.flush()
+        if self.mode == "strict":
+            os.fsync(file.fileno())
+            FSYNC_CALLS.inc()
+        elif not temporary:
+            self._schedule(os.path.abspath(file.name))
+
+    def file_replaced(self, path):
+        """
+        Handle a file renamed into place or newly created, making its directory entry durable.
+
+        Args:
+            path (str): The file's final path
+        """
+        if self.mode == "fast":
+            return
+        directory = os.path.dirname(os.path.abspath(path))
+        if self.mode == "strict":
+            fsync_path(directory)
+        else:
+            # The renamed file is synced again under its final name, its temporary name is gone
+            self._schedule(os.path.abspath(path), directory)
+
+    def _schedule(self, *paths):
+        with self._condition:
+            self._pending.update(paths)
+            GROUP_PENDING.set(len(self._pending))
+            if self._thread is None or not self._thread.is_alive():
+                if self._thread is None:
+                    # The thread is a daemon, so whatever it has not synced yet is synced at exit
+                    atexit.register(self.flush)
+                self._thread = threading.Thread(target=self._group_loop, name="group-commit", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _group_loop(self):
+        """Collect written files for one window at a time and fsync each of them once."""
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+            # Let more writes join this group before syncing
+            time.sleep(self.window)
+            with self._condition:
+                paths, self._pending = self._pending, set()
+                GROUP_PENDING.set(0)
+            self._sync(paths)
+
+    def _sync(self, paths):
+        # Files before directories, so a new name never points at unsynced data
+        for path in sorted(paths, key=os.path.isdir):
+            try:
+                fsync_path(path)
+            except OSError as e:
+                log.warning("Group fsync of %s failed: %s", path, e)
+
+    def flush(self):
+        """Sync everything the group commit thread is still waiting to sync."""
+        with self._condition:
+            paths, self._pending = self._pending, set()
+            GROUP_PENDING.set(0)
+        self._sync(paths)
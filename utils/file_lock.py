@@ -0,0 +1,82 @@
+import os
+import threading
+
+try:
+    import fcntl  # POSIX
+except ImportError:
+    fcntl = None
+    import msvcrt  # Windows
+
+class InterProcessLock:
+    """
+    Exclusive lock shared by every process using the same lock file.
+
+    Uses fcntl.flock on POSIX systems and msvcrt.locking on Windows. The lock
+    is reentrant for the thread holding it, and threads of the same process
+    also exclude each other, since OS file locks are held per process.
+
+    Attributes:
+        path (str): Path of the lock file
+    """
+
+    def __init__(self, path):
+        """Initialize the lock; the lock file is created on first use."""
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+        self._pid = None
+
+    def acquire(self):
+        """Block until this thread holds the lock."""
+        self._thread_lock.acquire()
+        self._depth += 1
+        if self._depth > 1:
+            return
+        try:
+            # The file stays open between acquisitions, opening it costs more than locking it
+            # (reopened after a fork, a shared descriptor would share the lock with the parent)
+            if self._file is None or self._pid != os.getpid():
+                self._file = open(self.path, "a+")
+                self._pid = os.getpid()
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            else:
+                # msvcrt locks a byte range; LK_LOCK retries for about 10 seconds, so keep trying
+                self._file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+        except Exception:
+            self._close()
+            self._depth -= 1
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        """Release one level of the lock."""
+        self._depth -= 1
+        try:
+            if self._depth == 0:
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+                else:
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._thread_lock.release()
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
@@ -0,0 +1,190 @@
+import atexit
+import collections
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+# Environment variable that sets the level when configure_logging is not given one
+LEVEL_VARIABLE = "WAREHOUSE_LOG_LEVEL"
+
+# Handlers installed by configure_logging, so reconfiguring replaces them
+_installed = {"handlers": [], "listener": None, "ring_buffer": None}
+
+
+def get_logger(name):
+    """
+    Return the logger for a module.
+
+    Call sites pass the message template and its values separately,
+    log.debug("Stored %s units of %s", quantity, sku), so nothing is
+    formatted unless the level is enabled; a disabled call costs one level
+    check.
+
+    Args:
+        name (str): Logger name, normally the module's __name__
+
+    Returns:
+        logging.Logger: The module's logger
+    """
+    return logging.getLogger(name)
+
+
+class ColorFormatter(logging.Formatter):
+    """Formats records for the console, colored by level like the old debug output."""
+
+    COLORS = {
+        logging.DEBUG: '\033[96m',     # Cyan
+        logging.INFO: '\033[94m',      # Blue
+        logging.WARNING: '\033[93m',   # Yellow
+        logging.ERROR: '\033[91m',     # Red
+        logging.CRITICAL: '\033[91m',  # Red
+    }
+    RESET = '\033[0m'
+
+    def __init__(self, use_colors=True):
+        """Initialize the formatter, optionally without color codes."""
+        super().__init__()
+        self.use_colors = use_colors
+
+    def format(self, record):
+        ts = f"{self.formatTime(record, '%H:%M:%S')}.{int(record.msecs):03d}"
+        text = f"{record.levelname} [{ts}] {record.name}: {record.getMessage()}"
+        if record.exc_info:
+            text += "\n" + self.formatException(record.exc_info)
+        if not self.use_colors:
+            return text
+        return f"{self.COLORS.get(record.levelno, '')}{text}{self.RESET}"
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+            # The unformatted template groups repeated messages with different values
+            "template": str(record.msg),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RingBufferHandler(logging.Handler):
+    """
+    Keeps the most recent records in memory.
+
+    Records are stored unformatted; their messages are only built when read.
+
+    Attributes:
+        records (deque): The newest records, oldest first
+    """
+
+    def __init__(self, capacity=1000):
+        """Initialize the buffer to hold at most capacity records."""
+        super().__init__()
+        self.records = collections.deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def messages(self, count=None):
+        """
+        Return the newest formatted messages.
+
+        Args:
+            count (int): Number of messages to return, or None for all of them
+
+        Returns:
+            list: Formatted messages, oldest first
+        """
+        records = list(self.records)
+        if count is not None:
+            records = records[-count:]
+        return [self.format(record) for record in records]
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves formatting to the writer thread."""
+
+    def prepare(self, record):
+        # The standard handler formats here, on the logging thread; the file
+        # formatter runs on the listener thread instead
+        return record
+
+
+def configure_logging(level=None, console=True, ring_buffer=0, log_file=None):
+    """
+    Set up where log records go. Calling it again replaces the previous setup.
+
+    Args:
+        level (str): DEBUG, INFO, WARNING or ERROR; defaults to the
+            WAREHOUSE_LOG_LEVEL environment variable, else WARNING
+        console (bool): Print records to stderr, colored by level
+        ring_buffer (int): Keep this many recent records in memory (0 for none)
+        log_file (str): Append records as JSON lines to this file, written by a
+            background thread so logging never waits for the disk
+    """
+    level = (level or os.environ.get(LEVEL_VARIABLE) or "WARNING").upper()
+    root = logging.getLogger()
+
+    # Remove what an earlier call installed
+    for handler in _installed["handlers"]:
+        root.removeHandler(handler)
+    if _installed["listener"] is not None:
+        _installed["listener"].stop()
+    _installed.update(handlers=[], listener=None, ring_buffer=None)
+
+    # Loggers check this before building a record, which keeps disabled levels free
+    root.setLevel(getattr(logging, level, logging.WARNING))
+
+    if console:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(ColorFormatter(use_colors=sys.stderr.isatty() and os.name != "nt"))
+        _installed["handlers"].append(handler)
+    if ring_buffer:
+        handler = RingBufferHandler(ring_buffer)
+        handler.setFormatter(ColorFormatter(use_colors=False))
+        _installed["handlers"].append(handler)
+        _installed["ring_buffer"] = handler
+    if log_file:
+        records = queue.SimpleQueue()
+        file_handler = logging.FileHandler(log_file, encoding="utf-8")
+        file_handler.setFormatter(JsonFormatter())
+        listener = logging.handlers.QueueListener(records, file_handler)
+        listener.start()
+        _installed["listener"] = listener
+        _installed["handlers"].append(_DeferredQueueHandler(records))
+
+    for handler in _installed["handlers"]:
+        root.addHandler(handler)
+
+
+def recent_messages(count=None):
+    """
+    Return the newest messages kept by the in-memory ring buffer.
+
+    Args:
+        count (int): Number of messages to return, or None for all of them
+
+    Returns:
+        list: Formatted messages, oldest first; empty if no ring buffer is configured
+    """
+    buffer = _installed["ring_buffer"]
+    return buffer.messages(count) if buffer is not None else []
+
+
+def _shutdown():
+    """Write out records still queued for the log file."""
+    if _installed["listener"] is not None:
+        _installed["listener"].stop()
+        _installed["listener"] = None
+
+atexit.register(_shutdown)
@@ -0,0 +1,323 @@
+import bisect
+import functools
+import json
+import math
+import os
+import threading
+import time
+
+# Latency bucket upper bounds in seconds, from 100 microseconds to 10 seconds
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    """
+    A value that only goes up, such as the number of failed operations.
+
+    Attributes:
+        name (str): Metric name
+        help (str): One-line description
+        labels (dict): Label names and values identifying this series
+        value (float): Current count
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, help, labels):
+        """Initialize the counter at zero."""
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        """Add amount to the counter."""
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        return {"value": self.value}
+
+
+class Gauge:
+    """
+    A value that goes up and down, such as the number of writes waiting.
+
+    Attributes:
+        name (str): Metric name
+        help (str): One-line description
+        labels (dict): Label names and values identifying this series
+        value (float): Current value
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, help, labels):
+        """Initialize the gauge at zero."""
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        """Set the gauge to value."""
+        self.value = value
+
+    def inc(self, amount=1):
+        """Raise the gauge by amount."""
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        """Lower the gauge by amount."""
+        with self._lock:
+            self.value -= amount
+
+    def snapshot(self):
+        return {"value": self.value}
+
+
+class Histogram:
+    """
+    Distribution of observed values, counted in fixed buckets.
+
+    Attributes:
+        name (str): Metric name
+        help (str): One-line description
+        labels (dict): Label names and values identifying this series
+        buckets (tuple): Upper bounds of the buckets, ascending
+        counts (list): Observations per bucket, the last one for values above every bound
+        count (int): Number of observations
+        sum (float): Total of all observations
+        max (float): Largest observation
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labels, buckets=DEFAULT_BUCKETS):
+        """Initialize an empty histogram."""
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Record one observation."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, p):
+        """
+        Estimate a percentile from the buckets.
+
+        Args:
+            p (float): Percentile between 0 and 1
+
+        Returns:
+            float: Upper bound of the bucket holding the percentile (the
+            largest observation if it is above every bound), or None if empty
+        """
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+            largest = self.max
+        if total == 0:
+            return None
+        rank = max(1, math.ceil(total * p))
+        seen = 0
+        for bound, count in zip(self.buckets, counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, largest)
+        return largest
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self.counts)
+            result = {"count": self.count, "sum": self.sum, "max": self.max}
+        result["buckets"] = {str(bound): count for bound, count in zip(self.buckets, counts)}
+        result["buckets"]["+Inf"] = counts[-1]
+        for name, p in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            result[name] = self.percentile(p)
+        return result
+
+
+class MetricsRegistry:
+    """
+    Holds every metric of the process, queryable in process and dumpable to a file.
+
+    A metric is identified by its name and labels; asking for the same name
+    and labels again returns the existing metric.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help, labels, **kwargs):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            metric = self._metrics.get(key)
+            if metric is None:
+                metric = cls(name, help, labels, **kwargs)
+                self._metrics[key] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, help="", **labels):
+        """Return the counter with this name and labels, creating it on first use."""
+        return self._get_or_create(Counter, name, help, labels)
+
+    def gauge(self, name, help="", **labels):
+        """Return the gauge with this name and labels, creating it on first use."""
+        return self._get_or_create(Gauge, name, help, labels)
+
+    def histogram(self, name, help="", buckets=DEFAULT_BUCKETS, **labels):
+        """Return the histogram with this name and labels, creating it on first use."""
+        return self._get_or_create(Histogram, name, help, labels, buckets=buckets)
+
+    def get(self, name, **labels):
+        """
+        Look up a metric.
+
+        Returns:
+            Counter, Gauge or Histogram: The metric, or None if it does not exist
+        """
+        with self._lock:
+            return self._metrics.get((name, tuple(sorted(labels.items()))))
+
+    def collect(self):
+        """Return every metric, sorted by name and labels."""
+        with self._lock:
+            return [self._metrics[key] for key in sorted(self._metrics)]
+
+    def to_dict(self):
+        """
+        Describe every metric as plain data.
+
+        Returns:
+            dict: Collection time and a list of metrics with their values
+        """
+        metrics = []
+        for metric in self.collect():
+            entry = {"name": metric.name, "type": metric.kind, "labels": metric.labels}
+            entry.update(metric.snapshot())
+            metrics.append(entry)
+        return {"timestamp": time.time(), "metrics": metrics}
+
+    def to_prometheus(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics, one sample per line
+        """
+        lines = []
+        described = set()
+        for metric in self.collect():
+            if metric.name not in described:
+                described.add(metric.name)
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if metric.kind != "histogram":
+                lines.append(f"{metric.name}{_labels(metric.labels)} {metric.value}")
+                continue
+            snapshot = metric.snapshot()
+            cumulative = 0
+            for bound, count in snapshot["buckets"].items():
+                cumulative += count
+                lines.append(f"{metric.name}_bucket{_labels(metric.labels, le=bound)} {cumulative}")
+            lines.append(f"{metric.name}_sum{_labels(metric.labels)} {snapshot['sum']}")
+            lines.append(f"{metric.name}_count{_labels(metric.labels)} {snapshot['count']}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path, fmt=None):
+        """
+        Write every metric to a file, replacing it atomically.
+
+        Args:
+            path (str): File to write
+            fmt (str): "json" or "prometheus"; by default .prom and .txt files
+                get the Prometheus format and anything else JSON
+        """
+        if fmt is None:
+            fmt = "prometheus" if path.endswith((".prom", ".txt")) else "json"
+        text = self.to_prometheus() if fmt == "prometheus" else json.dumps(self.to_dict(), indent=2)
+        temp_file = f"{path}.{os.getpid()}.tmp"
+        with open(temp_file, "w") as file:
+            file.write(text)
+        os.replace(temp_file, path)
+
+
+def _labels(labels, **extra):
+    """Format labels as {name="value",...} for the Prometheus text format."""
+    items = list(labels.items()) + list(extra.items())
+    if not items:
+        return ""
+    pairs = []
+    for key, value in items:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+# The process-wide registry used by the warehouse, storage and servers
+REGISTRY = MetricsRegistry()
+
+
+def timed(component, operation=None, registry=REGISTRY):
+    """
+    Decorator that records how often an operation runs, how long it takes and how it ends.
+
+    Three series are kept per operation, labelled with component and operation:
+        operation_duration_seconds   Latency histogram, its count is the number of calls
+        operation_errors_total       Calls that raised an exception
+        operation_failures_total     Calls that returned False, the repo's failure result
+
+    Args:
+        component (str): Part of the system, e.g. "warehouse" or "storage"
+        operation (str): Operation name, defaults to the function name
+        registry (MetricsRegistry): Registry to record into
+
+    Returns:
+        callable: The decorator
+    """
+    def decorate(func):
+        name = operation or func.__name__
+        duration = registry.histogram("operation_duration_seconds", "Time spent in each operation",
+                                      component=component, operation=name)
+        errors = registry.counter("operation_errors_total", "Operations that raised an exception",
+                                  component=component, operation=name)
+        failures = registry.counter("operation_failures_total", "Operations that returned False",
+                                    component=component, operation=name)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                duration.observe(time.perf_counter() - start)
+            if result is False:
+                failures.inc()
+            return result
+        return wrapper
+    return decorate
@@ -0,0 +1,129 @@
+import tkinter as tk
+from tkinter import ttk
+
+def product_label(product):
+    """Return the text a picker shows for a product."""
+    return f"{product.name} ({product.sku})"
+
+
+class ProductPicker:
+    """
+    A combobox for choosing a product that only ever lists a few matches.
+
+    The dropdown is filled when it is opened and whenever typing pauses,
+    from the warehouse's product indexes rather than the whole catalog, so
+    opening a form costs the same for ten products as for a hundred
+    thousand. Each listed line remembers the SKU it was made for, so
+    product names containing parentheses or dashes do not matter.
+
+    Attributes:
+        combo (ttk.Combobox): The underlying combobox widget
+        variable (tk.StringVar): Text shown in the combobox
+    """
+
+    # Pause after the last keystroke before the matches are looked up
+    FILTER_DELAY_MS = 150
+
+    def __init__(self, parent, warehouse, skus=None, describe=product_label, limit=50, width=30):
+        """
+        Create the picker inside parent; pack or grid its combo like any widget.
+
+        Args:
+            parent: Parent widget
+            warehouse (Warehouse): Warehouse whose products can be picked
+            skus (iterable): Only offer these SKUs, e.g. the products at one
+                location; None offers the whole catalog
+            describe (callable): Returns the text listed for a product
+            limit (int): Most matches listed at once
+            width (int): Width of the combobox in characters
+        """
+        self.warehouse = warehouse
+        self.skus = list(skus) if skus is not None else None
+        self.allowed = set(self.skus or ())
+        self.describe = describe
+        self.limit = limit
+        self.shown = {}  # Maps each listed text to its SKU
+        self.filter_job = None
+        self.filtered_text = None
+
+        self.variable = tk.StringVar()
+        self.combo = ttk.Combobox(parent, textvariable=self.variable, width=width,
+                                  postcommand=self.update_options)
+        self.combo.bind("<KeyRelease>", self.on_key)
+
+    def pack(self, **options):
+        """Pack the combobox."""
+        self.combo.pack(**options)
+
+    def on_key(self, event):
+        """Look up new matches once typing pauses; keys that do not edit the text are ignored."""
+        if event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        if self.filter_job is not None:
+            self.combo.after_cancel(self.filter_job)
+        self.filter_job = self.combo.after(self.FILTER_DELAY_MS, self.update_options)
+
+    def matches(self, text):
+        """
+        Return the best products for the typed text.
+
+        Args:
+            text (str): What the user typed, stripped
+
+        Returns:
+            list: At most limit Product objects
+        """
+        if self.skus is None:
+            if text:
+                return self.warehouse.search_products(text, limit=self.limit)
+            return self.warehouse.query_products(limit=self.limit)
+
+        # A restricted list is short, a plain scan finds its matches
+        products = self.warehouse.products
+        needle = text.lower()
+        found = []
+        for sku in self.skus:
+            product = products.get(sku)
+            if product is not None and (needle in product.name.lower() or needle in sku.lower()):
+                found.append(product)
+                if len(found) >= self.limit:
+                    break
+        return found
+
+    def update_options(self):
+        """List the matches for the current text in the dropdown."""
+        self.filter_job = None
+        text = self.variable.get().strip()
+        # A picked line is already an option, keep the list it came from
+        if text == self.filtered_text or text in self.shown:
+            return
+        self.filtered_text = text
+        self.shown = {}
+        options = []
+        for product in self.matches(text):
+            label = self.describe(product)
+            self.shown[label.strip()] = product.sku
+            options.append(label)
+        self.combo['values'] = options
+
+    def get_sku(self):
+        """
+        Return the SKU of the chosen product.
+
+        A line picked from the dropdown gives its SKU, and typing an exact
+        SKU works as well.
+
+        Returns:
+            str: The SKU, or None if the text names no product that can be picked
+        """
+        text = self.variable.get().strip()
+        sku = self.shown.get(text)
+        if sku is None and text in self.warehouse.products:
+            sku = text
+        if sku is None or (self.skus is not None and sku not in self.allowed):
+            return None
+        return sku
+
+    def get_text(self):
+        """Return the text as typed."""
+        return self.variable.get().strip()
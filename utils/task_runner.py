@@ -0,0 +1,190 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.logging_utils import get_logger
+
+log = get_logger(__name__)
+
+class TaskCancelled(Exception):
+    """Raised inside a task by Task.check() once the task has been cancelled."""
+
+
+class Task:
+    """
+    A function running on the task runner's worker pool.
+
+    The function gets the task as its first argument and uses it to report
+    progress and to notice cancellation; it must not touch Tk widgets.
+
+    Attributes:
+        name (str): Description used in log messages
+        cancellable (bool): False for work that cannot be stopped part way
+        progress (tuple): Latest (done, total, message) reported by the task
+        future (Future): Resolves to the function's result
+    """
+
+    def __init__(self, name, on_progress=None, on_done=None, on_error=None, on_cancel=None, cancellable=True):
+        """Initialize the task with the callbacks the runner calls on the Tk thread."""
+        self.name = name
+        self.cancellable = cancellable
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.progress = (0, None, "")
+        self.future = None
+        self._reported = None
+        self._cancelled = threading.Event()
+
+    def report(self, done, total=None, message=""):
+        """
+        Record how far the task has got; called from the worker thread.
+
+        Only the latest report is delivered, so a task can report as often as
+        it likes without flooding the Tk thread.
+
+        Args:
+            done (int): Units of work finished
+            total (int): Units of work in all, or None if unknown
+            message (str): What the task is doing now
+        """
+        self.progress = (done, total, message)
+
+    def cancel(self):
+        """Ask the task to stop at its next check; ignored if the task is not cancellable."""
+        if self.cancellable:
+            self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        """True once cancel() has been called."""
+        return self._cancelled.is_set()
+
+    def check(self):
+        """Raise TaskCancelled if the task has been cancelled; call between units of work."""
+        if self._cancelled.is_set():
+            raise TaskCancelled()
+
+    def done(self):
+        """Return True if the function has returned or raised."""
+        return self.future is not None and self.future.done()
+
+
+class TaskRunner:
+    """
+    Runs slow GUI actions on a worker pool so the window stays responsive.
+
+    Progress and results are handed back by a root.after poll, so every
+    callback runs on the Tk thread and may update widgets. The poll only
+    runs while tasks are active.
+    """
+
+    def __init__(self, root, max_workers=2, poll_ms=50):
+        """Initialize the runner; worker threads start with the first task."""
+        self.root = root
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ui-task")
+        self.active = []
+        self._polling = False
+
+    @classmethod
+    def for_widget(cls, widget):
+        """
+        Return the task runner for a widget's toplevel window, creating it on first use.
+
+        Args:
+            widget: Any Tk widget
+
+        Returns:
+            TaskRunner: The shared runner of that window
+        """
+        root = widget.winfo_toplevel()
+        runner = getattr(root, "_task_runner", None)
+        if runner is None:
+            runner = cls(root)
+            root._task_runner = runner
+        return runner
+
+    def submit(self, func, *args, name=None, on_progress=None, on_done=None, on_error=None, on_cancel=None,
+               cancellable=True):
+        """
+        Start func(task, *args) on the worker pool.
+
+        Args:
+            func (callable): Function to run; gets the Task as its first argument
+            *args: Further arguments for func
+            name (str): Description used in log messages, defaults to the function name
+            on_progress (callable): Called with (done, total, message) when progress changes
+            on_done (callable): Called with the result when func returns
+            on_error (callable): Called with the exception when func raises
+            on_cancel (callable): Called without arguments when func raises TaskCancelled,
+                or returns after the task was cancelled
+            cancellable (bool): False if func cannot be stopped part way; cancel() is then ignored
+
+        Returns:
+            Task: The started task, which can be cancelled
+        """
+        task = Task(name or func.__name__, on_progress, on_done, on_error, on_cancel, cancellable)
+        task.future = self.executor.submit(func, task, *args)
+        self.active.append(task)
+        log.debug("Started task %s", task.name)
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+        return task
+
+    def _poll(self):
+        """Deliver progress and results of active tasks, then schedule the next poll."""
+        still_running = []
+        for task in self.active:
+            progress = task.progress
+            if progress != task._reported:
+                task._reported = progress
+                self._call(task, task.on_progress, *progress)
+            if task.future.done():
+                self._finish(task)
+            else:
+                still_running.append(task)
+        self.active = still_running
+
+        if still_running:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def _finish(self, task):
+        """Hand a finished task's result or exception to its callbacks."""
+        try:
+            result = task.future.result()
+        except TaskCancelled:
+            log.debug("Task %s cancelled", task.name)
+            self._call(task, task.on_cancel)
+        except Exception as e:
+            log.error("Task %s failed: %s", task.name, e, exc_info=True)
+            self._call(task, task.on_error, e)
+        else:
+            if task.cancelled:
+                # Cancel was pressed, so the result is not reported as a success
+                log.debug("Task %s finished after it was cancelled", task.name)
+                self._call(task, task.on_cancel)
+                return
+            log.debug("Task %s finished", task.name)
+            self._call(task, task.on_done, result)
+
+    def _call(self, task, callback, *args):
+        """Run a callback, logging its errors so one bad callback does not stop the poll."""
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception as e:
+            log.error("Callback of task %s failed: %s", task.name, e, exc_info=True)
+
+    def cancel_all(self):
+        """Ask every active task to stop."""
+        for task in self.active:
+            task.cancel()
+
+    def shutdown(self, wait=True):
+        """Cancel active tasks and stop the worker threads, waiting for them if wait is True."""
+        self.cancel_all()
+        self.executor.shutdown(wait=wait)
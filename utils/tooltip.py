@@ -0,0 +1,69 @@
+import tkinter as tk
+
+class Tooltip:
+    """
+    A small borderless window showing text next to the mouse pointer.
+
+    The window is created on first use and then only moved, relabelled,
+    shown and hidden, so following the pointer across many items costs no
+    widget creation.
+    """
+
+    # Distance from the pointer, so the tooltip never ends up under it
+    OFFSET = 12
+
+    def __init__(self, widget):
+        """
+        Initialize the tooltip.
+
+        Args:
+            widget: Widget the tooltip belongs to
+        """
+        self.widget = widget
+        self.window = None
+        self.label = None
+        self.text = None
+        self.visible = False
+
+    def show(self, text, x_root, y_root):
+        """
+        Show text near a point on the screen.
+
+        Args:
+            text (str): Text to show, may span several lines
+            x_root (int): Screen x coordinate of the pointer
+            y_root (int): Screen y coordinate of the pointer
+        """
+        if self.window is None:
+            self.window = tk.Toplevel(self.widget)
+            self.window.wm_overrideredirect(True)
+            self.label = tk.Label(self.window, justify=tk.LEFT, background="#ffffe0",
+                                  relief=tk.SOLID, borderwidth=1, font=("Arial", 9))
+            self.label.pack(ipadx=4, ipady=2)
+        self.set_text(text)
+        self.window.wm_geometry(f"+{x_root + self.OFFSET}+{y_root + self.OFFSET}")
+        if not self.visible:
+            self.window.deiconify()
+            self.window.lift()
+            self.visible = True
+
+    def set_text(self, text):
+        """Change the text, also while the tooltip is showing."""
+        if self.label is not None and text != self.text:
+            self.label.config(text=text)
+            self.text = text
+
+    def hide(self):
+        """Hide the tooltip if it is showing."""
+        if self.visible:
+            self.window.withdraw()
+            self.visible = False
+
+    def destroy(self):
+        """Destroy the tooltip window."""
+        if self.window is not None:
+            self.window.destroy()
+        self.window = None
+        self.label = None
+        self.text = None
+        self.visible = False
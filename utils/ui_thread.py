@@ -0,0 +1,74 @@
+import queue
+import threading
+from utils.logging_utils import get_logger
+
+log = get_logger(__name__)
+
+class MainThreadDispatcher:
+    """
+    Runs warehouse change callbacks on the Tk main thread.
+
+    Tkinter widgets may only be touched from the thread running the main loop,
+    but warehouse notifications are published on whichever thread changed the
+    warehouse. Callbacks wrapped by the dispatcher run immediately when called
+    on the main thread and are otherwise queued and drained by a root.after poll.
+    """
+
+    def __init__(self, root, poll_ms=50):
+        """Initialize the dispatcher and start polling the queue."""
+        self.root = root
+        self.poll_ms = poll_ms
+        self.pending = queue.Queue()
+        self.root.after(self.poll_ms, self._drain)
+
+    @classmethod
+    def for_widget(cls, widget):
+        """
+        Return the dispatcher for a widget's toplevel window, creating it on first use.
+
+        Args:
+            widget: Any Tk widget
+
+        Returns:
+            MainThreadDispatcher: The shared dispatcher of that window
+        """
+        root = widget.winfo_toplevel()
+        dispatcher = getattr(root, "_main_thread_dispatcher", None)
+        if dispatcher is None:
+            dispatcher = cls(root)
+            root._main_thread_dispatcher = dispatcher
+        return dispatcher
+
+    def wrap(self, callback):
+        """
+        Wrap a callback so it always runs on the main thread.
+
+        Args:
+            callback (callable): Function taking the same arguments as the wrapper
+
+        Returns:
+            callable: Wrapper that can be passed to Warehouse.subscribe
+        """
+        def dispatch(*args):
+            if threading.current_thread() is threading.main_thread():
+                callback(*args)
+            else:
+                self.pending.put((callback, args))
+        return dispatch
+
+    def _drain(self):
+        """Run queued callbacks, then schedule the next poll."""
+        try:
+            while True:
+                try:
+                    callback, args = self.pending.get_nowait()
+                except queue.Empty:
+                    break
+                # One failing view must not stop the notifications of the others
+                try:
+                    callback(*args)
+                except Exception as e:
+                    log.error("Main thread callback %s failed: %s", getattr(callback, "__name__", callback), e,
+                              exc_info=True)
+        finally:
+            self.root.after(self.poll_ms, self._drain)
@@ -0,0 +1,221 @@
+import tkinter as tk
+from tkinter import ttk
+
+class VirtualTreeview:
+    """
+    A ttk.Treeview that only materializes the rows currently on screen.
+
+    The rows are an ordered list of keys (for products, their SKUs). The
+    tree holds a fixed pool of items, one per visible line, and scrolling
+    refills those items with the keys at the new position instead of
+    inserting and deleting rows. Values and tags are asked for only when a
+    key becomes visible, so showing a list of a hundred thousand products
+    costs the same as showing thirty.
+
+    Attributes:
+        tree (ttk.Treeview): The underlying tree widget
+        keys (list): Keys of all rows, in display order
+        offset (int): Position in keys of the first visible row
+        selected_key: Key of the selected row, kept while it is scrolled out of view
+    """
+
+    # Line height used until a row can be measured
+    DEFAULT_ROW_HEIGHT = 20
+
+    def __init__(self, parent, columns, row_values, row_tags=None, **tree_options):
+        """
+        Create the tree and its scrollbar inside parent.
+
+        Args:
+            parent: Frame to pack the tree and scrollbar into
+            columns (tuple): Column identifiers of the tree
+            row_values (callable): Returns the column values for a key
+            row_tags (callable): Returns the tags for a key, or None for no tags
+            **tree_options: Further ttk.Treeview options, such as show="headings"
+        """
+        self.row_values = row_values
+        self.row_tags = row_tags or (lambda key: ())
+        self.keys = []
+        self.positions = {}  # Maps each key to its index in keys
+        self.offset = 0
+        self.selected_key = None
+        self.visible_rows = 1
+        self.row_height = None
+        self.slots = []  # Item ids of the pooled rows, top to bottom
+        self.slot_keys = {}  # Maps pooled item id to the key it is showing
+
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree = ttk.Treeview(parent, columns=columns, selectmode="browse", **tree_options)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self.on_select, add="+")
+        # Windows and macOS send MouseWheel events, X11 sends buttons 4 and 5
+        self.tree.bind("<MouseWheel>", lambda event: self.scroll(-1 if event.delta > 0 else 1, "units") or "break")
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-1, "units") or "break")
+        self.tree.bind("<Button-5>", lambda event: self.scroll(1, "units") or "break")
+        # Arrow and page keys move past the ends of the pool by scrolling it
+        self.tree.bind("<Up>", lambda event: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda event: self.move_selection(1))
+        self.tree.bind("<Prior>", lambda event: self.move_selection(-self.visible_rows))
+        self.tree.bind("<Next>", lambda event: self.move_selection(self.visible_rows))
+
+    def set_keys(self, keys):
+        """
+        Replace the rows, keeping the scroll position where possible.
+
+        Args:
+            keys (list): Keys of all rows, in display order
+        """
+        self.keys = list(keys)
+        self.positions = {key: index for index, key in enumerate(self.keys)}
+        self.render()
+
+    def add_key(self, key):
+        """Append a row if it is not shown yet, and draw it if it is visible."""
+        if key in self.positions:
+            self.refresh_key(key)
+            return
+        self.insert_key(len(self.keys), key)
+
+    def insert_key(self, position, key):
+        """Insert a row at a position in the display order."""
+        self.keys.insert(position, key)
+        self._reindex(position)
+        if position < self.offset + self.visible_rows:
+            self.render()
+        else:
+            self.update_scrollbar()
+
+    def remove_key(self, key):
+        """Remove a row."""
+        if key not in self.positions:
+            return
+        position = self.positions.pop(key)
+        del self.keys[position]
+        self._reindex(position)
+        if self.selected_key == key:
+            self.selected_key = None
+        if position < self.offset + self.visible_rows:
+            self.render()
+        else:
+            self.update_scrollbar()
+
+    def _reindex(self, start):
+        """Update the stored positions of the keys from start onwards."""
+        keys = self.keys
+        for index in range(start, len(keys)):
+            self.positions[keys[index]] = index
+
+    def refresh_key(self, key):
+        """Redraw a row in place if it is visible; off-screen rows are drawn when scrolled to."""
+        position = self.positions.get(key)
+        if position is None or not self.offset <= position < self.offset + len(self.slots):
+            return
+        item = self.slots[position - self.offset]
+        self.tree.item(item, values=self.row_values(key), tags=self.row_tags(key))
+
+    def render(self):
+        """Fill the pooled items with the keys at the current scroll position."""
+        self.offset = max(0, min(self.offset, len(self.keys) - self.visible_rows))
+        wanted = min(self.visible_rows, len(self.keys) - self.offset)
+
+        # Grow or shrink the pool to the number of rows on screen
+        while len(self.slots) < wanted:
+            self.slots.append(self.tree.insert("", tk.END))
+        while len(self.slots) > wanted:
+            self.tree.delete(self.slots.pop())
+
+        self.slot_keys = {}
+        selected_item = None
+        for index, item in enumerate(self.slots):
+            key = self.keys[self.offset + index]
+            self.slot_keys[item] = key
+            self.tree.item(item, values=self.row_values(key), tags=self.row_tags(key))
+            if key == self.selected_key:
+                selected_item = item
+
+        # The selection follows its key, not the pooled item it was drawn in
+        if selected_item is not None:
+            self.tree.selection_set(selected_item)
+            self.tree.focus(selected_item)
+        elif self.tree.selection():
+            self.tree.selection_remove(self.tree.selection())
+        self.update_scrollbar()
+
+    def update_scrollbar(self):
+        """Size and place the scrollbar thumb for the visible part of the rows."""
+        total = len(self.keys)
+        if total <= self.visible_rows:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self.visible_rows) / total)
+
+    def scroll_to(self, position):
+        """Scroll so the row at position is the first visible one."""
+        if position != self.offset:
+            self.offset = position
+            self.render()
+
+    def scroll(self, amount, unit):
+        """Scroll by a number of rows ("units") or screens ("pages")."""
+        step = self.visible_rows if unit == "pages" else 1
+        self.scroll_to(max(0, self.offset + int(amount) * step))
+
+    def see(self, key):
+        """Scroll a row into view, selecting it."""
+        position = self.positions.get(key)
+        if position is None:
+            return
+        self.selected_key = key
+        if position < self.offset or position >= self.offset + self.visible_rows:
+            # Put the row in the middle of the screen
+            self.offset = max(0, position - self.visible_rows // 2)
+        self.render()
+
+    def on_scrollbar(self, action, amount, unit=None):
+        """Handle the scrollbar's moveto and scroll commands."""
+        if action == "moveto":
+            self.scroll_to(max(0, int(float(amount) * len(self.keys))))
+        else:
+            self.scroll(amount, unit)
+
+    def move_selection(self, step):
+        """Move the selection by step rows, scrolling when it leaves the screen."""
+        position = self.positions.get(self.selected_key, self.offset - 1 if step > 0 else self.offset)
+        position = max(0, min(len(self.keys) - 1, position + step))
+        if not self.keys:
+            return "break"
+        # Selecting the row in render() raises <<TreeviewSelect>> like a click would
+        self.see(self.keys[position])
+        return "break"
+
+    def on_select(self, event):
+        """Remember which key is selected."""
+        selection = self.tree.selection()
+        if selection and selection[0] in self.slot_keys:
+            self.selected_key = self.slot_keys[selection[0]]
+
+    def on_resize(self, event):
+        """Resize the pool to the number of rows that fit in the tree."""
+        if self.row_height is None and self.slots:
+            # Measure a real row once one is on screen
+            bbox = self.tree.bbox(self.slots[0])
+            if bbox:
+                self.row_height = bbox[3]
+        row_height = self.row_height or self.DEFAULT_ROW_HEIGHT
+        # The heading takes about one line
+        visible_rows = max(1, event.height // row_height - 1)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.render()
+
+    def focused_key(self):
+        """
+        Return the key of the focused row.
+
+        Returns:
+            The key, or None if no row has the focus
+        """
+        return self.slot_keys.get(self.tree.focus())
@@ -1,19 +1,66 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import time
-from utils.debug_utils import DebugPrint  # Import DebugPrint
+import heapq
+from utils.logging_utils import get_logger
+from utils.ui_thread import MainThreadDispatcher
+from utils.product_picker import ProductPicker, product_label
+from utils.tooltip import Tooltip
+from dialogs.reconcile_dialog import ReconcileDialog
+
+log = get_logger(__name__)
 
 class DashboardView:
-    """View class for the dashboard tab with warehouse visualization."""
+    """
+    View class for the dashboard tab with warehouse visualization.
+    
+    The grid is drawn on a single canvas, one rectangle and one symbol per
+    cell, so refreshing, zooming and panning never create or destroy widgets.
+    """
+    
+    # Grid geometry in canvas units at zoom level 1
+    CELL_SIZE = 28
+    CELL_GAP = 4
+    HEADER_SIZE = 24
+    FONT_SIZE = 10
+    
+    # Background colour and symbol of each fill level: empty, under 50%, under 100% and full
+    FILL_STYLES = (("white", "□"), ("light green", "▲"), ("sky blue", "■"), ("orange red", "▓"))
+    FILL_LABELS = ("Empty", "Under 50% full", "Under 100% full", "Full")
+    
+    # Products listed by name in a cell's hover tooltip
+    TOOLTIP_TOP_SKUS = 3
+    
+    # Zoom range and the step of one wheel notch or button press
+    MIN_ZOOM = 0.25
+    MAX_ZOOM = 4.0
+    ZOOM_STEP = 1.25
     
     def __init__(self, parent, warehouse):
         self.parent = parent
         self.warehouse = warehouse
         self.last_hover_time = 0  # For throttling hover events
         self.hover_cooldown = 0.1  # Seconds between hover events
-        self.active_cells = {}  # Store references to avoid garbage collection
+        self.hover_job = None  # Pending hover update, at most one at a time
+        self.hover_point = None  # Latest pointer position as (x, y, x_root, y_root)
+        self.hover_cell = None  # (row, col) the tooltip is showing
+        self.location_summaries = {}  # Maps (row, col) to its cached tooltip text
+        self.cell_items = {}  # Maps (row, col) to the cell's (rectangle, symbol) canvas items
+        self.rendered_levels = {}  # Maps (row, col) to the fill level the cell was last drawn with
+        self.mismatched_skus = set()  # Products whose quantity differs from the stock stored for them
+        self.rendered_mismatches = None  # Mismatched SKUs the notifications last showed
+        self.zoom = 1.0  # Current scale of the canvas items
         self.setup_dashboard()
         
+        # Patch only the affected cells when the warehouse reports a change
+        # (callbacks are moved onto the Tk thread when scanner threads change stock)
+        ui = MainThreadDispatcher.for_widget(self.parent)
+        self.warehouse.subscribe("product_added", ui.wrap(self.on_product_added))
+        self.warehouse.subscribe("location_changed", ui.wrap(self.on_location_changed))
+        self.warehouse.subscribe("product_deleted", ui.wrap(self.on_location_changed))
+        self.warehouse.subscribe("product_changed", ui.wrap(self.on_product_changed))
+        self.warehouse.subscribe("warehouse_reloaded", ui.wrap(lambda change: self.refresh_warehouse_view()))
+        
     def setup_dashboard(self):
         """Set up the dashboard tab with warehouse visualization."""
         # Main container with horizontal split
@@ -35,10 +82,16 @@ class DashboardView:
         ttk.Label(control_frame, text="Warehouse Layout", font=("Arial", 14, "bold")).pack(side=tk.LEFT)
         ttk.Button(control_frame, text="Refresh", command=self.refresh_warehouse_view).pack(side=tk.RIGHT)
         ttk.Button(control_frame, text="Search Product", command=self.show_search_form).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(control_frame, text="Reset Zoom", command=self.reset_zoom).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(control_frame, text="+", width=3,
+                   command=lambda: self.zoom_by(self.ZOOM_STEP)).pack(side=tk.RIGHT)
+        ttk.Button(control_frame, text="-", width=3,
+                   command=lambda: self.zoom_by(1 / self.ZOOM_STEP)).pack(side=tk.RIGHT)
         
         # Frame for warehouse grid
         self.warehouse_frame = ttk.Frame(self.left_panel)
         self.warehouse_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        self.setup_canvas()
         
         # Legend for the warehouse grid
         legend_frame = ttk.Frame(self.left_panel)
@@ -57,6 +110,7 @@ class DashboardView:
         # Notification section for mismatched quantities
         self.notification_frame = ttk.LabelFrame(self.right_panel, text="Notifications")
         self.notification_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.update_mismatches()
         self.refresh_notifications()
         
         # Draw initial warehouse view
@@ -72,66 +126,306 @@ class DashboardView:
         ttk.Label(self.right_panel, text="Location Details", font=("Arial", 12, "bold")).pack(pady=10)
         ttk.Label(self.right_panel, text="Click on a location to view details").pack(pady=20)
         
+    def setup_canvas(self):
+        """Create the scrollable canvas the warehouse grid is drawn on, with its mouse bindings."""
+        self.canvas = tk.Canvas(self.warehouse_frame, background="white", highlightthickness=0)
+        x_scroll = ttk.Scrollbar(self.warehouse_frame, orient=tk.HORIZONTAL, command=self.canvas.xview)
+        y_scroll = ttk.Scrollbar(self.warehouse_frame, orient=tk.VERTICAL, command=self.canvas.yview)
+        self.canvas.configure(xscrollcommand=x_scroll.set, yscrollcommand=y_scroll.set)
+        
+        x_scroll.pack(side=tk.BOTTOM, fill=tk.X)
+        y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        # One click handler for the whole grid, mapped to a cell by position
+        self.canvas.bind("<Button-1>", self.on_canvas_click)
+        
+        # Hovering over a cell shows a summary of its contents
+        self.tooltip = Tooltip(self.canvas)
+        self.canvas.bind("<Motion>", self.on_canvas_motion)
+        self.canvas.bind("<Leave>", lambda event: self.hide_tooltip())
+        
+        # Drag with the middle button to pan
+        self.canvas.bind("<ButtonPress-2>", lambda event: self.canvas.scan_mark(event.x, event.y))
+        self.canvas.bind("<B2-Motion>", lambda event: self.canvas.scan_dragto(event.x, event.y, gain=1))
+        
+        # Wheel scrolls, Shift+wheel scrolls sideways, Ctrl+wheel zooms around the pointer
+        # (Windows and macOS send MouseWheel events, X11 sends buttons 4 and 5)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.canvas.bind(sequence, lambda event: self.on_mousewheel(event, "scroll"))
+            self.canvas.bind(f"<Shift-{sequence[1:]}", lambda event: self.on_mousewheel(event, "pan"))
+            self.canvas.bind(f"<Control-{sequence[1:]}", lambda event: self.on_mousewheel(event, "zoom"))
+    
     def draw_warehouse(self):
-        """Draw the warehouse grid visualization."""
-        # Clear existing widgets in the warehouse frame
-        for widget in self.warehouse_frame.winfo_children():
-            widget.destroy()
-        
-        # Reset active cells dictionary
-        self.active_cells = {}
-            
-        # Create grid labels (column headers)
-        ttk.Label(self.warehouse_frame, text="").grid(row=0, column=0)
+        """
+        Draw the warehouse grid visualization.
+        
+        The canvas items are created once; later calls only recolour the
+        cells whose fill level changed since they were last drawn.
+        """
+        if len(self.cell_items) != self.warehouse.rows * self.warehouse.cols:
+            self.create_grid_items()
+        self.update_cells(self.cell_items)
+    
+    def create_grid_items(self):
+        """Create the header labels and the rectangle and symbol of every cell."""
+        self.canvas.delete("all")
+        self.cell_items = {}
+        self.rendered_levels = {}
+        self.zoom = 1.0
+        pitch = self.CELL_SIZE + self.CELL_GAP
+        font = ("Arial", self.FONT_SIZE, "bold")
+        
+        # Column numbers across the top, row letters down the side
         for c in range(self.warehouse.cols):
-            ttk.Label(self.warehouse_frame, text=f"{c+1}", font=("Arial", 10, "bold")).grid(row=0, column=c+1, padx=2, pady=2)
-            
-        # Create cells for the warehouse grid
+            x = self.HEADER_SIZE + c * pitch + self.CELL_SIZE / 2
+            self.canvas.create_text(x, self.HEADER_SIZE / 2, text=f"{c+1}", font=font, tags=("header",))
+        for r in range(self.warehouse.rows):
+            y = self.HEADER_SIZE + r * pitch + self.CELL_SIZE / 2
+            self.canvas.create_text(self.HEADER_SIZE / 2, y, text=chr(65 + r), font=font, tags=("header",))
+        
         for r in range(self.warehouse.rows):
-            row_label = chr(65 + r)
-            ttk.Label(self.warehouse_frame, text=row_label, font=("Arial", 10, "bold")).grid(row=r+1, column=0, padx=2, pady=2)
-            
             for c in range(self.warehouse.cols):
-                location = self.warehouse.grid[r][c]
-                
-                # Determine color and symbol based on fill level
-                if location.current_stock == 0:
-                    bg_color = "white"  # Empty
-                    text = "□"
-                elif location.current_stock < location.capacity // 2:
-                    bg_color = "light green"  # Less than 50%
-                    text = "▲"
-                elif location.current_stock < location.capacity:
-                    bg_color = "sky blue"  # Less than 100%
-                    text = "■"
-                else:
-                    bg_color = "orange red"  # Full
-                    text = "▓"
-                
-                # Create cell with hover info
-                cell = tk.Label(self.warehouse_frame, text=text, width=3, height=1, 
-                                relief=tk.RAISED, bg=bg_color)
-                cell.grid(row=r+1, column=c+1, padx=2, pady=2)
-                
-                # Store cell reference with its coordinates for event handling
-                cell_id = f"r{r}c{c}"
-                self.active_cells[cell_id] = {
-                    "widget": cell,
-                    "row": r,
-                    "col": c
-                }
-                
-                # Bind click event to show location actions
-                cell.bind("<Button-1>", lambda event, id=cell_id: self.location_click(id))
+                x = self.HEADER_SIZE + c * pitch
+                y = self.HEADER_SIZE + r * pitch
+                rectangle = self.canvas.create_rectangle(x, y, x + self.CELL_SIZE, y + self.CELL_SIZE,
+                                                         outline="gray50", tags=("cell",))
+                symbol = self.canvas.create_text(x + self.CELL_SIZE / 2, y + self.CELL_SIZE / 2,
+                                                 font=("Arial", self.FONT_SIZE), tags=("symbol",))
+                self.cell_items[(r, c)] = (rectangle, symbol)
+        
+        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
     
-    def location_click(self, cell_id):
-        """Handle click on a location cell."""
-        if cell_id not in self.active_cells:
+    def cell_at(self, x, y):
+        """
+        Find the cell under a point in canvas coordinates.
+        
+        Returns:
+            tuple: (row, col), or None if the point is outside every cell
+        """
+        if (0, 0) not in self.cell_items:
+            return None
+        # Zooming moves and scales every item, so measure the grid from its first cell
+        left, top, right, _ = self.canvas.coords(self.cell_items[(0, 0)][0])
+        size = right - left
+        pitch = size * (self.CELL_SIZE + self.CELL_GAP) / self.CELL_SIZE
+        col, x_offset = divmod(x - left, pitch)
+        row, y_offset = divmod(y - top, pitch)
+        # Clicks in the gaps between cells belong to no cell
+        if x_offset > size or y_offset > size:
+            return None
+        if 0 <= row < self.warehouse.rows and 0 <= col < self.warehouse.cols:
+            return int(row), int(col)
+        return None
+    
+    def on_canvas_click(self, event):
+        """Handle a click anywhere on the grid canvas."""
+        cell = self.cell_at(self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+        if cell is not None:
+            self.location_click(*cell)
+    
+    def on_canvas_motion(self, event):
+        """
+        Track the pointer over the grid, updating the tooltip at most once per cooldown.
+        
+        Only the latest position is kept; a pending update picks it up, so a
+        pointer that comes to rest is always handled.
+        """
+        self.hover_point = (event.x, event.y, event.x_root, event.y_root)
+        if self.hover_job is None:
+            wait = self.last_hover_time + self.hover_cooldown - time.monotonic()
+            self.hover_job = self.canvas.after(max(0, int(wait * 1000)), self.update_hover)
+    
+    def update_hover(self):
+        """Show the tooltip of the cell under the pointer, or hide it between cells."""
+        self.hover_job = None
+        self.last_hover_time = time.monotonic()
+        x, y, x_root, y_root = self.hover_point
+        cell = self.cell_at(self.canvas.canvasx(x), self.canvas.canvasy(y))
+        if cell is None:
+            self.tooltip.hide()
+            self.hover_cell = None
             return
-            
-        cell_data = self.active_cells[cell_id]
-        row, col = cell_data["row"], cell_data["col"]
+        self.hover_cell = cell
+        self.tooltip.show(self.location_summary(*cell), x_root, y_root)
+    
+    def hide_tooltip(self):
+        """Hide the tooltip and drop any pending hover update."""
+        if self.hover_job is not None:
+            self.canvas.after_cancel(self.hover_job)
+            self.hover_job = None
+        self.tooltip.hide()
+        self.hover_cell = None
+    
+    def location_summary(self, row, col):
+        """
+        Return the tooltip text of a location: its code, fill level and largest products.
         
+        The text is cached until a change notification names the location.
+        """
+        cell = (row, col)
+        summary = self.location_summaries.get(cell)
+        if summary is not None:
+            return summary
+        
+        location = self.warehouse.grid[row][col]
+        percent = 100 * location.current_stock // location.capacity if location.capacity else 0
+        lines = [
+            f"Location {location.get_location_code()}",
+            f"{self.FILL_LABELS[self.get_fill_level(location)]}: "
+            f"{location.current_stock}/{location.capacity} units ({percent}%)",
+        ]
+        top = heapq.nlargest(self.TOOLTIP_TOP_SKUS, location.inventory.items(), key=lambda item: item[1])
+        for sku, qty in top:
+            product = self.warehouse.products.get(sku)
+            name = product.name if product is not None else "Unknown product"
+            lines.append(f"{qty} x {name} ({sku})")
+        if len(location.inventory) > len(top):
+            lines.append(f"+{len(location.inventory) - len(top)} more products")
+        
+        summary = "\n".join(lines)
+        self.location_summaries[cell] = summary
+        return summary
+    
+    def invalidate_summaries(self, cells):
+        """Drop the cached tooltips of cells, refreshing the one on screen if it is among them."""
+        for cell in cells:
+            self.location_summaries.pop(cell, None)
+        if self.hover_cell in cells and self.tooltip.visible:
+            self.tooltip.set_text(self.location_summary(*self.hover_cell))
+    
+    def on_mousewheel(self, event, action):
+        """Scroll, pan or zoom the grid by one wheel notch."""
+        # The grid moves under the pointer, the next motion shows the new cell
+        self.hide_tooltip()
+        step = 1 if event.num == 4 or getattr(event, "delta", 0) > 0 else -1
+        if action == "zoom":
+            factor = self.ZOOM_STEP if step > 0 else 1 / self.ZOOM_STEP
+            self.zoom_by(factor, self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+        elif action == "pan":
+            self.canvas.xview_scroll(-step, "units")
+        else:
+            self.canvas.yview_scroll(-step, "units")
+    
+    def zoom_by(self, factor, x=0, y=0):
+        """
+        Scale the grid around a point in canvas coordinates.
+        
+        Items are scaled in place; only the font size of the text changes.
+        """
+        factor = max(self.MIN_ZOOM, min(self.MAX_ZOOM, self.zoom * factor)) / self.zoom
+        if factor == 1:
+            return
+        self.zoom *= factor
+        self.canvas.scale("all", x, y, factor, factor)
+        # Text does not scale with the canvas, so its font follows the zoom level
+        font_size = max(1, round(self.FONT_SIZE * self.zoom))
+        self.canvas.itemconfigure("header", font=("Arial", font_size, "bold"))
+        self.canvas.itemconfigure("symbol", font=("Arial", font_size))
+        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+    
+    def reset_zoom(self):
+        """Return the grid to its original size and scroll it to the top left."""
+        self.zoom_by(1 / self.zoom)
+        # Zooming about different points shifts the grid, so move it back to where it was drawn
+        left, top, _, _ = self.canvas.coords(self.cell_items[(0, 0)][0]) if self.cell_items else (0, 0, 0, 0)
+        self.canvas.move("all", self.HEADER_SIZE - left, self.HEADER_SIZE - top)
+        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        self.canvas.xview_moveto(0)
+        self.canvas.yview_moveto(0)
+    
+    def get_fill_level(self, location):
+        """
+        Return the fill level of a location: 0 empty, 1 under 50%, 2 under 100%, 3 full.
+        """
+        if location.current_stock == 0:
+            return 0  # Empty
+        elif location.current_stock < location.capacity // 2:
+            return 1  # Less than 50%
+        elif location.current_stock < location.capacity:
+            return 2  # Less than 100%
+        return 3  # Full
+    
+    def get_cell_style(self, location):
+        """
+        Return the background colour and symbol for a location's fill level.
+        
+        Args:
+            location (Location): The location to style
+            
+        Returns:
+            tuple: (background colour, symbol)
+        """
+        return self.FILL_STYLES[self.get_fill_level(location)]
+    
+    def update_cells(self, cells):
+        """
+        Redraw the given (row, col) cells whose fill level changed since they were last drawn.
+        
+        Returns:
+            int: Number of cells redrawn
+        """
+        redrawn = 0
+        for cell in cells:
+            items = self.cell_items.get(cell)
+            if items is None:
+                continue
+            r, c = cell
+            level = self.get_fill_level(self.warehouse.grid[r][c])
+            if self.rendered_levels.get(cell) == level:
+                continue
+            bg_color, text = self.FILL_STYLES[level]
+            self.canvas.itemconfigure(items[0], fill=bg_color)
+            self.canvas.itemconfigure(items[1], text=text)
+            self.rendered_levels[cell] = level
+            redrawn += 1
+        return redrawn
+    
+    def on_location_changed(self, change):
+        """Handle a location_changed or product_deleted notification from the warehouse."""
+        try:
+            self.update_cells(change.cells)
+            self.invalidate_summaries(change.cells)
+            self.update_mismatches((change.sku,))
+            self.refresh_notifications()
+        except tk.TclError as e:
+            log.error("Error in on_location_changed: %s", e)
+    
+    def on_product_added(self, change):
+        """Handle a product_added notification; a new product has no stock stored yet."""
+        self.update_mismatches((change.sku,))
+        self.refresh_notifications()
+    
+    def on_product_changed(self, change):
+        """Handle a product_changed notification from the warehouse."""
+        # A renamed product changes the tooltips of the cells that hold it
+        self.invalidate_summaries(set(self.warehouse.find_product(change.sku)))
+        self.update_mismatches((change.sku,))
+        self.refresh_notifications(force=True)
+    
+    def update_mismatches(self, skus=None):
+        """
+        Bring the set of products with mismatched quantities up to date.
+        
+        A change only re-checks the products it names against the
+        warehouse's stored totals; every product is validated only when
+        the whole view is reloaded.
+        
+        Args:
+            skus (iterable): SKUs that changed, None to validate every product
+        """
+        if skus is None:
+            self.mismatched_skus = set(self.warehouse.validate_quantities())
+            return
+        for sku in skus:
+            product = self.warehouse.products.get(sku)
+            if product is not None and self.warehouse.stored_totals.get(sku, 0) != product.quantity:
+                self.mismatched_skus.add(sku)
+            else:
+                self.mismatched_skus.discard(sku)
+    
+    def location_click(self, row, col):
+        """Handle click on a location cell."""
         # Show location details in the right panel
         self.show_location_details(row, col)
         # Log dashboard click
@@ -210,16 +504,12 @@ class DashboardView:
         # Product selection dropdown
         ttk.Label(form_frame, text="Select Product:").pack(anchor=tk.W, pady=5)
         
-        product_var = tk.StringVar()
-        product_options = [f"{p.name} ({p.sku})" for p in self.warehouse.products.values()]
-        
-        if product_options:
-            product_dropdown = ttk.Combobox(form_frame, textvariable=product_var, width=30)
-            product_dropdown['values'] = product_options
-            product_dropdown.pack(pady=5, fill=tk.X)
+        if self.warehouse.products:
+            product_picker = ProductPicker(form_frame, self.warehouse)
+            product_picker.pack(pady=5, fill=tk.X)
         else:
             ttk.Label(form_frame, text="No products available").pack(pady=5)
-            product_var = None
+            product_picker = None
         
         # Quantity selection
         ttk.Label(form_frame, text="Quantity:").pack(anchor=tk.W, pady=5)
@@ -233,7 +523,8 @@ class DashboardView:
         
         # Store action function
         def store_action():
-            if not product_var or not product_var.get():
+            sku = product_picker.get_sku() if product_picker else None
+            if sku is None:
                 self.show_message("Please select a product")
                 return
                 
@@ -245,14 +536,10 @@ class DashboardView:
                 self.show_message("Please enter a valid quantity")
                 return
                 
-            # Extract SKU
-            sku = product_var.get().split("(")[1].split(")")[0]
-            
             # Perform store operation
             if self.warehouse.store_product(sku, quantity, row, col):
-                self.show_message(f"Successfully stored {quantity} units")
-                self.refresh_warehouse_view()
                 self.show_location_details(row, col)
+                self.show_message(f"Successfully stored {quantity} units")
             else:
                 self.show_message("Failed to store product. Check product quantity and location capacity.")
         
@@ -285,17 +572,11 @@ class DashboardView:
         # Product selection dropdown
         ttk.Label(form_frame, text="Select Product:").pack(anchor=tk.W, pady=5)
         
-        product_var = tk.StringVar()
-        product_options = []
-        
-        for sku, qty in location.inventory.items():
-            if sku in self.warehouse.products:
-                product_name = self.warehouse.products[sku].name
-                product_options.append(f"{product_name} ({sku}) - Available: {qty}")
-        
-        product_dropdown = ttk.Combobox(form_frame, textvariable=product_var, width=30)
-        product_dropdown['values'] = product_options
-        product_dropdown.pack(pady=5, fill=tk.X)
+        # Only the products stored here can be picked
+        inventory = location.inventory
+        product_picker = ProductPicker(form_frame, self.warehouse, skus=list(inventory),
+            describe=lambda product: f"{product_label(product)} - Available: {inventory.get(product.sku, 0)}")
+        product_picker.pack(pady=5, fill=tk.X)
         
         # Quantity selection
         ttk.Label(form_frame, text="Quantity:").pack(anchor=tk.W, pady=5)
@@ -309,7 +590,8 @@ class DashboardView:
         
         # Retrieve action function
         def retrieve_action():
-            if not product_var.get():
+            sku = product_picker.get_sku()
+            if sku is None:
                 self.show_message("Please select a product")
                 return
                 
@@ -321,15 +603,10 @@ class DashboardView:
                 self.show_message("Please enter a valid quantity")
                 return
                 
-            # Extract SKU
-            selected = product_var.get()
-            sku = selected.split("(")[1].split(")")[0]
-            
             # Perform retrieve operation
             if self.warehouse.retrieve_product(sku, quantity, row, col):
-                self.show_message(f"Successfully retrieved {quantity} units")
-                self.refresh_warehouse_view()
                 self.show_location_details(row, col)
+                self.show_message(f"Successfully retrieved {quantity} units")
             else:
                 self.show_message("Failed to retrieve product. Check quantity.")
         
@@ -354,15 +631,26 @@ class DashboardView:
         # Auto-remove the message after 3 seconds
         self.parent.after(3000, lambda: msg_frame.destroy())
     
-    def refresh_notifications(self):
-        """Refresh the notification section with flagged issues."""
+    def refresh_notifications(self, force=False):
+        """
+        Refresh the notification section with flagged issues.
+        
+        Args:
+            force (bool): Rebuild the panel even if the flagged products are
+                unchanged, e.g. because a product was renamed
+        """
         try:
-            # Clear previous notification widgets if frame exists and is valid
+            # Only touch the notification widgets if the frame exists and is valid
             if hasattr(self, 'notification_frame') and self.notification_frame.winfo_exists():
+                # Rebuild the panel only when the flagged products changed
+                if not force and self.mismatched_skus == self.rendered_mismatches:
+                    return
+                mismatched_skus = sorted(self.mismatched_skus)
+                self.rendered_mismatches = set(mismatched_skus)
+                
                 for widget in self.notification_frame.winfo_children():
                     widget.destroy()
                 
-                mismatched_skus = self.warehouse.validate_quantities()
                 if mismatched_skus:
                     # Show warning for mismatched quantities
                     ttk.Label(self.notification_frame, text="⚠️ Mismatched Quantities Detected:", foreground="red").pack(anchor=tk.W, padx=10, pady=5)
@@ -375,142 +663,26 @@ class DashboardView:
                 else:
                     ttk.Label(self.notification_frame, text="✅ All quantities are accounted for.", foreground="green").pack(anchor=tk.W, padx=10, pady=5)
         except (tk.TclError, AttributeError, RuntimeError) as e:
-            print(f"DEBUG: Error in refresh_notifications: {e}")
+            log.error("Error in refresh_notifications: %s", e)
             # The frame may have been destroyed during tab switching, just ignore the error
             pass
 
     def refresh_warehouse_view(self):
         """Refresh the warehouse grid visualization and notifications."""
         try:
+            self.location_summaries = {}
             self.draw_warehouse()
-            self.refresh_notifications()
+            self.update_mismatches()
+            self.refresh_notifications(force=True)
         except (tk.TclError, AttributeError, RuntimeError) as e:
-            print(f"DEBUG: Error in refresh_warehouse_view: {e}")
+            log.error("Error in refresh_warehouse_view: %s", e)
             # Handle any errors during refresh operations
             pass
 
     def fix_mismatched_quantities(self):
-        """Automatically handle mismatched quantities and inform the user."""
-        mismatched_skus = self.warehouse.validate_quantities()
-        fix_report = []
-
-        for sku in mismatched_skus:
-            product = self.warehouse.products[sku]
-            total_in_warehouse = sum(
-                location.inventory.get(sku, 0) for row in self.warehouse.grid for location in row
-            )
-            
-            if total_in_warehouse > product.quantity:
-                # Excess quantity detected
-                excess_quantity = total_in_warehouse - product.quantity
-                self.handle_excess_quantity(product, total_in_warehouse, excess_quantity, fix_report)
-            else:
-                # Distribute missing quantities
-                quantity_to_distribute = product.quantity - total_in_warehouse
-                for row in self.warehouse.grid:
-                    for location in row:
-                        if quantity_to_distribute <= 0:
-                            break
-                        available_space = location.get_available_capacity()
-                        if available_space > 0:
-                            quantity_to_store = min(quantity_to_distribute, available_space)
-                            location.add_product(product, quantity_to_store)
-                            quantity_to_distribute -= quantity_to_store
-                            fix_report.append(
-                                f"Moved {quantity_to_store} units of {product.name} (SKU: {sku}) to Location {location.get_location_code()} "
-                                f"due to available space."
-                            )
-                if quantity_to_distribute > 0:
-                    fix_report.append(
-                        f"⚠️ Unable to fully distribute {quantity_to_distribute} units of {product.name} (SKU: {sku}) due to insufficient space."
-                    )
-                # Save updated location data
-                self.warehouse.data_storage.save_locations(self.warehouse.grid)
-        
-        # Display the fix report
-        self.show_fix_report(fix_report)
-        self.refresh_notifications()
-        self.refresh_warehouse_view()
-
-    def handle_excess_quantity(self, product, total_in_warehouse, excess_quantity, fix_report):
-        """Handle excess quantities for a product."""
-        def update_product_quantity():
-            """Update the product's total quantity to match the warehouse."""
-            product.update_quantity(excess_quantity)
-            fix_report.append(
-                f"Updated product quantity for {product.name} (SKU: {product.sku}) to match the warehouse: {total_in_warehouse}."
-            )
-            self.update_fix_report_live(fix_report[-1])  # Update fix report live
-            # Save updated product data
-            self.warehouse.data_storage.save_products(self.warehouse.products)
-            self.refresh_notifications()
-            self.refresh_warehouse_view()
-
-        def remove_excess_from_warehouse():
-            """Remove excess quantity from the warehouse."""
-            remaining_to_remove = excess_quantity
-            for row in self.warehouse.grid:
-                for location in row:
-                    if remaining_to_remove <= 0:
-                        break
-                    if product.sku in location.inventory:
-                        qty_at_location = location.inventory[product.sku]
-                        qty_to_remove = min(remaining_to_remove, qty_at_location)
-                        location.remove_product(product.sku, qty_to_remove)
-                        remaining_to_remove -= qty_to_remove
-                        fix_report.append(
-                            f"Removed {qty_to_remove} units of {product.name} (SKU: {product.sku}) from Location {location.get_location_code()}."
-                        )
-                        self.update_fix_report_live(fix_report[-1])  # Update fix report live
-            self.warehouse._rebuild_location_cache()
-            # Save updated location data
-            self.warehouse.data_storage.save_locations(self.warehouse.grid)
-            self.refresh_notifications()
-            self.refresh_warehouse_view()
-
-        # Prompt user for action to resolve excess
-        action_window = tk.Toplevel(self.parent)
-        action_window.title("Resolve Excess Quantity")
-        action_window.geometry("400x200")
-        
-        ttk.Label(action_window, text=f"Excess quantity detected for {product.name} (SKU: {product.sku})", 
-                 font=("Arial", 12, "bold")).pack(pady=10)
-        ttk.Label(action_window, text=f"Total in warehouse: {total_in_warehouse}, Reported quantity: {product.quantity}", 
-                 foreground="red").pack(pady=5)
-        
-        ttk.Label(action_window, text="Choose an action:").pack(pady=10)
-        
-        ttk.Button(action_window, text="Update Product Quantity", 
-                   command=lambda: [update_product_quantity(), action_window.destroy()]).pack(pady=5)
-        ttk.Button(action_window, text="Remove Excess from Warehouse", 
-                   command=lambda: [remove_excess_from_warehouse(), action_window.destroy()]).pack(pady=5)
-        ttk.Button(action_window, text="Cancel", command=action_window.destroy).pack(pady=5)
-
-    def show_fix_report(self, report):
-        """Display the fix report in a popup dialog."""
-        self.report_window = tk.Toplevel(self.parent)
-        self.report_window.title("Fix Report")
-        self.report_window.geometry("500x400")
-        
-        ttk.Label(self.report_window, text="Fix Report", font=("Arial", 14, "bold")).pack(pady=10)
-        
-        # Scrollable text area for fix report
-        self.text_area = tk.Text(self.report_window, wrap=tk.WORD, height=20)
-        self.text_area.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        for line in report:
-            self.text_area.insert(tk.END, line + "\n")
-        
-        self.text_area.config(state=tk.DISABLED)  # Make the text area read-only
-        
-        ttk.Button(self.report_window, text="Close", command=self.report_window.destroy).pack(pady=10)
-
-    def update_fix_report_live(self, new_entry):
-        """Update the fix report live by appending a new entry."""
-        if hasattr(self, 'text_area') and self.text_area.winfo_exists():
-            self.text_area.config(state=tk.NORMAL)
-            self.text_area.insert(tk.END, new_entry + "\n")
-            self.text_area.config(state=tk.DISABLED)
+        """Preview and apply the fixes for every product with mismatched quantities."""
+        # The grid and notifications update through change notifications
+        ReconcileDialog(self.parent, self.warehouse)
     
     def show_search_form(self):
         """Show search product form in dashboard."""
@@ -523,10 +695,8 @@ class DashboardView:
         frm.pack(fill=tk.X, padx=10, pady=5)
 
         ttk.Label(frm, text="Select or enter SKU:").pack(anchor=tk.W)
-        self.search_var = tk.StringVar()
-        combo = ttk.Combobox(frm, textvariable=self.search_var, width=30)
-        combo['values'] = [f"{p.name} ({p.sku})" for p in self.warehouse.products.values()]
-        combo.pack(pady=5, fill=tk.X)
+        self.search_picker = ProductPicker(frm, self.warehouse)
+        self.search_picker.pack(pady=5, fill=tk.X)
 
         ttk.Label(frm, text="OR enter SKU directly:").pack(anchor=tk.W, pady=(10,0))
         self.sku_entry = ttk.Entry(frm)
@@ -545,18 +715,26 @@ class DashboardView:
     def search_action(self):
         """Handle search from dashboard."""
         self.results_text.delete(1.0, tk.END)
-        sku = ""
-        if self.search_var.get():
-            sku = self.search_var.get().split("(")[1].split(")")[0]
-        elif self.sku_entry.get().strip():
-            sku = self.sku_entry.get().strip()
-        if not sku:
+        text = self.search_picker.get_text() or self.sku_entry.get().strip()
+        if not text:
             messagebox.showwarning("Input Error", "Please select or enter an SKU.")
             return
 
+        # A picked product or an exact SKU is used as is
+        sku = self.search_picker.get_sku() or text
+        
         if sku not in self.warehouse.products:
-            self.results_text.insert(tk.END, f"Product with SKU '{sku}' not found.\n")
-            return
+            # Fall back to fuzzy matching on the name and SKU
+            matches = self.warehouse.search_products(text, limit=10)
+            if not matches:
+                self.results_text.insert(tk.END, f"No product matching '{text}' was found.\n")
+                return
+            sku = matches[0].sku
+            if len(matches) > 1:
+                self.results_text.insert(tk.END, f"Closest matches for '{text}':\n")
+                for match in matches:
+                    self.results_text.insert(tk.END, f"- {match.name} ({match.sku})\n")
+                self.results_text.insert(tk.END, "\nShowing the best match:\n\n")
 
         p = self.warehouse.products[sku]
         self.results_text.insert(tk.END, f"Product: {p.name} (SKU: {sku})\n")
@@ -2,17 +2,45 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import random
 import string
-from utils.debug_utils import DebugPrint  # Import DebugPrint
+from utils.logging_utils import get_logger
+from utils.ui_thread import MainThreadDispatcher
+from utils.virtual_tree import VirtualTreeview
+from dialogs.progress_dialog import ProgressDialog
+from dialogs.assignment_dialog import ManualAssignmentDialog
+from dialogs.reconcile_dialog import ReconcileDialog
+
+log = get_logger(__name__)
 
 class ProductView:
     """View class for the products management tab."""
     
-    def __init__(self, parent, warehouse, refresh_warehouse_callback):
+    # Column headings, in display order
+    COLUMNS = (("name", "Product Name"), ("sku", "SKU"), ("price", "Price"), ("quantity", "Quantity"))
+    
+    # Milliseconds of no typing before the filter is applied
+    FILTER_DELAY_MS = 200
+    
+    def __init__(self, parent, warehouse):
         self.parent = parent
         self.warehouse = warehouse
-        self.refresh_warehouse_callback = refresh_warehouse_callback
+        self.sort_column = "name"  # Column the list is sorted by
+        self.sort_reverse = False  # Sorted descending if True
+        self.sort_keys = {}  # Maps SKU to its sort key in each column, by column name
+        self.search_text = {}  # Maps SKU to the lowercase text the filter matches against
+        self.sorted_skus = []  # Every SKU in ascending order of the sort column
+        self.filter_text = ""  # Filter the displayed rows match
+        self.filter_job = None  # Pending after() call applying the filter
         self.setup_products_tab()
         
+        # Patch individual rows when the warehouse reports a change
+        # (callbacks are moved onto the Tk thread when scanner threads change stock)
+        ui = MainThreadDispatcher.for_widget(self.parent)
+        self.warehouse.subscribe("product_added", ui.wrap(self.on_product_changed))
+        self.warehouse.subscribe("product_changed", ui.wrap(self.on_product_changed))
+        self.warehouse.subscribe("location_changed", ui.wrap(self.on_product_changed))
+        self.warehouse.subscribe("product_deleted", ui.wrap(self.on_product_deleted))
+        self.warehouse.subscribe("warehouse_reloaded", ui.wrap(lambda change: self.refresh_product_list()))
+        
     def setup_products_tab(self):
         """Set up the products management tab."""
         # Main container with horizontal split
@@ -58,26 +86,30 @@ class ProductView:
                  text="Select a product from the list to view details\nor click 'Add New Product' to create one.").pack(pady=10)
     
     def setup_product_treeview(self):
-        """Set up the treeview for product listing."""
+        """Set up the treeview for product listing, with sortable columns and a filter box."""
         # Clear existing widgets
         for widget in self.product_list_frame.winfo_children():
             widget.destroy()
-            
-        # Create scrollbar
-        scrollbar = ttk.Scrollbar(self.product_list_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # Create treeview
-        columns = ("name", "sku", "price", "quantity")
-        self.product_tree = ttk.Treeview(self.product_list_frame, columns=columns, show="headings", 
-                                          yscrollcommand=scrollbar.set)
-        scrollbar.config(command=self.product_tree.yview)
-        
-        # Define headings
-        self.product_tree.heading("name", text="Product Name")
-        self.product_tree.heading("sku", text="SKU")
-        self.product_tree.heading("price", text="Price")
-        self.product_tree.heading("quantity", text="Quantity")
+        
+        # Filter box, applied once typing pauses
+        filter_frame = ttk.Frame(self.product_list_frame)
+        filter_frame.pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
+        ttk.Label(filter_frame, text="Filter:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *args: self.schedule_filter())
+        ttk.Entry(filter_frame, textvariable=self.filter_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.match_label = ttk.Label(filter_frame, text="")
+        self.match_label.pack(side=tk.RIGHT)
+            
+        # Create treeview; only the rows on screen exist as items, keyed by SKU
+        columns = tuple(column for column, _ in self.COLUMNS)
+        self.product_list = VirtualTreeview(self.product_list_frame, columns, self.get_row_values,
+                                            self.get_row_tags, show="headings")
+        self.product_tree = self.product_list.tree
+        
+        # Define headings, clicking one sorts by it
+        for column, text in self.COLUMNS:
+            self.product_tree.heading(column, text=text, command=lambda c=column: self.sort_by(c))
         
         # Define columns
         self.product_tree.column("name", width=200)
@@ -85,35 +117,204 @@ class ProductView:
         self.product_tree.column("price", width=100)
         self.product_tree.column("quantity", width=100)
         
+        # Apply row styling
+        self.product_tree.tag_configure("mismatch", background="red")
+        
         # Populate with products
         self.refresh_product_list()
         
-        self.product_tree.pack(fill=tk.BOTH, expand=True)
-        
         # Bind click event to show product details
         self.product_tree.bind("<ButtonRelease-1>", self.show_product_details)
     
     def refresh_product_list(self):
-        """Refresh the product list in the treeview."""
-        # Clear existing items
-        for item in self.product_tree.get_children():
-            self.product_tree.delete(item)
-            
-        # Add all products
-        for product in self.warehouse.products.values():
-            total_in_warehouse = sum(
-                location.inventory.get(product.sku, 0) for row in self.warehouse.grid for location in row
-            )
-            row_color = "red" if total_in_warehouse != product.quantity else ""
-            self.product_tree.insert("", tk.END, values=(
-                product.name, 
-                product.sku, 
-                f"${product.price:.2f}", 
-                product.quantity
-            ), tags=("mismatch",) if row_color == "red" else ())
+        """
+        Rebuild the sort keys and the row order from the warehouse.
+        
+        Only the visible rows are drawn, so this costs one sort of the
+        precomputed keys rather than a treeview insert per product.
+        """
+        self.sort_keys = {}
+        self.search_text = {}
+        for product in list(self.warehouse.products.values()):
+            self.sort_keys[product.sku], self.search_text[product.sku] = self.product_keys(product)
+        self.sort_rows()
+    
+    def product_keys(self, product):
+        """
+        Compute the sort keys and filter text of a product.
+        
+        Returns:
+            tuple: (dict of column name to sort key, lowercase filter text)
+        """
+        # The SKU breaks ties, so every key is unique and rows keep a stable order
+        keys = {
+            "name": (product.name.lower(), product.sku),
+            "sku": product.sku,
+            "price": (product.price, product.sku),
+            "quantity": (product.quantity, product.sku),
+        }
+        return keys, f"{product.name} {product.sku}".lower()
+    
+    def sort_by(self, column):
+        """Sort by a column, or reverse the order if it is already sorted by it."""
+        if column == self.sort_column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+        self.sort_rows()
+    
+    def sort_rows(self):
+        """Order every product by the sort column and show the ones matching the filter."""
+        keys = self.sort_keys
+        column = self.sort_column
+        self.sorted_skus = sorted(keys, key=lambda sku: keys[sku][column])
+        
+        # Show the sort column and direction in the headings
+        for name, text in self.COLUMNS:
+            if name == column:
+                text += " ▼" if self.sort_reverse else " ▲"
+            self.product_tree.heading(name, text=text)
+        self.apply_filter(rescan=True)
+    
+    def schedule_filter(self):
+        """Apply the filter once typing has paused, instead of on every keystroke."""
+        if self.filter_job is not None:
+            self.parent.after_cancel(self.filter_job)
+        self.filter_job = self.parent.after(self.FILTER_DELAY_MS, self.apply_filter)
+    
+    def apply_filter(self, rescan=False):
+        """
+        Show the products whose name or SKU contains the filter text, in sorted order.
+        
+        Args:
+            rescan (bool): Check every product; otherwise a filter that only
+                got longer narrows the rows already shown
+        """
+        self.filter_job = None
+        text = self.filter_var.get().strip().lower()
+        if text and not rescan and self.filter_text and text.startswith(self.filter_text):
+            # A longer filter can only match rows the shorter one matched
+            candidates = self.displayed_ascending()
+        else:
+            candidates = self.sorted_skus
+        self.filter_text = text
         
-        # Apply row styling
-        self.product_tree.tag_configure("mismatch", background="red")
+        if text:
+            search_text = self.search_text
+            rows = [sku for sku in candidates if text in search_text[sku]]
+        else:
+            rows = list(candidates)
+        if self.sort_reverse:
+            rows.reverse()
+        self.product_list.set_keys(rows)
+        self.update_match_count()
+    
+    def displayed_ascending(self):
+        """Return the displayed SKUs in ascending order of the sort column."""
+        rows = self.product_list.keys
+        return rows[::-1] if self.sort_reverse else rows
+    
+    def update_match_count(self):
+        """Show how many products the filter matches."""
+        shown = len(self.product_list.keys)
+        total = len(self.sorted_skus)
+        self.match_label.config(text=f"{shown} of {total}" if self.filter_text else f"{total} products")
+    
+    def find_position(self, skus, key, descending=False):
+        """
+        Binary search for where a sort key belongs in an ordered list of SKUs.
+        
+        Args:
+            skus (list): SKUs ordered by the sort column
+            key: Sort key to place
+            descending (bool): The list is in descending order
+            
+        Returns:
+            int: Index of the first SKU whose key is not before key
+        """
+        column = self.sort_column
+        low, high = 0, len(skus)
+        while low < high:
+            middle = (low + high) // 2
+            current = self.sort_keys[skus[middle]][column]
+            if (current > key) if descending else (current < key):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+    
+    def place_row(self, sku):
+        """
+        Move one product's row to where its sort keys and the filter put it.
+        
+        Rows whose sort key and filter text did not change are only redrawn.
+        """
+        product = self.warehouse.products.get(sku)
+        if product is None:
+            return
+        keys, text = self.product_keys(product)
+        column = self.sort_column
+        old_keys = self.sort_keys.get(sku)
+        if old_keys is not None and old_keys[column] == keys[column] and self.search_text[sku] == text:
+            self.sort_keys[sku] = keys
+            self.product_list.refresh_key(sku)
+            return
+        
+        # Take the row out at its old key, then put it back at the new one
+        if old_keys is not None:
+            self.remove_row(sku)
+        self.sort_keys[sku], self.search_text[sku] = keys, text
+        self.sorted_skus.insert(self.find_position(self.sorted_skus, keys[column]), sku)
+        if self.filter_text in text:
+            position = self.find_position(self.product_list.keys, keys[column], descending=self.sort_reverse)
+            self.product_list.insert_key(position, sku)
+        self.update_match_count()
+    
+    def remove_row(self, sku):
+        """Remove a product from the ordered lists and forget its keys."""
+        old_keys = self.sort_keys.get(sku)
+        if old_keys is None:
+            return
+        # The binary search finds the row by the key it was sorted under
+        del self.sorted_skus[self.find_position(self.sorted_skus, old_keys[self.sort_column])]
+        del self.sort_keys[sku]
+        del self.search_text[sku]
+        self.product_list.remove_key(sku)
+    
+    def get_row_values(self, sku):
+        """Return the treeview column values for a product."""
+        product = self.warehouse.products.get(sku)
+        if product is None:
+            return ("", sku, "", "")
+        return (product.name, product.sku, f"${product.price:.2f}", product.quantity)
+    
+    def get_row_tags(self, sku):
+        """Return the treeview tags for a product, flagging quantity mismatches."""
+        product = self.warehouse.products.get(sku)
+        if product is None:
+            return ()
+        # Stored totals are maintained by the warehouse, so no locations are summed here
+        return ("mismatch",) if self.warehouse.stored_totals.get(sku, 0) != product.quantity else ()
+    
+    def update_product_row(self, sku):
+        """Insert, update or move the treeview row of a single product."""
+        self.place_row(sku)
+    
+    def on_product_changed(self, change):
+        """Handle product_added, product_changed and location_changed notifications."""
+        try:
+            self.update_product_row(change.sku)
+        except tk.TclError as e:
+            log.error("Error in on_product_changed: %s", e)
+    
+    def on_product_deleted(self, change):
+        """Handle a product_deleted notification by removing its row."""
+        try:
+            self.remove_row(change.sku)
+            self.update_match_count()
+        except tk.TclError as e:
+            log.error("Error in on_product_deleted: %s", e)
     
     def show_message(self, message, is_error=False):
         """Show a message in the UI instead of a popup dialog."""
@@ -137,17 +338,8 @@ class ProductView:
     
     def show_product_details(self, event):
         """Show details of the selected product."""
-        # Get selected item
-        selected_item = self.product_tree.focus()
-        if not selected_item:
-            return
-            
-        # Get item data
-        item_data = self.product_tree.item(selected_item, "values")
-        if not item_data:
-            return
-            
-        sku = item_data[1]
+        # Get the SKU of the selected row
+        sku = self.product_list.focused_key()
         if sku not in self.warehouse.products:
             return
             
@@ -170,18 +362,16 @@ class ProductView:
         ttk.Label(details_frame, text=f"Quantity: {product.quantity}").pack(anchor=tk.W, padx=10, pady=2)
         
         # Check for mismatched quantities
-        total_in_warehouse = sum(
-            location.inventory.get(product.sku, 0) for row in self.warehouse.grid for location in row
-        )
+        total_in_warehouse = self.warehouse.stored_totals.get(product.sku, 0)
         if total_in_warehouse != product.quantity:
             ttk.Label(details_frame, text="⚠️ Mismatched Quantities Detected", foreground="red").pack(anchor=tk.W, padx=10, pady=5)
             ttk.Label(details_frame, text=f"Total in warehouse: {total_in_warehouse}", foreground="red").pack(anchor=tk.W, padx=10, pady=2)
             
             if total_in_warehouse > product.quantity:
                 ttk.Button(details_frame, text="Resolve Excess Quantity", 
-                           command=lambda: self.resolve_excess_quantity(product, total_in_warehouse)).pack(anchor=tk.W, padx=10, pady=5)
+                           command=lambda: self.reconcile_product(product, excess="update")).pack(anchor=tk.W, padx=10, pady=5)
             else:
-                ttk.Button(details_frame, text="Auto Fix", command=lambda: self.auto_fix_mismatch(product)).pack(anchor=tk.W, padx=10, pady=5)
+                ttk.Button(details_frame, text="Auto Fix", command=lambda: self.reconcile_product(product)).pack(anchor=tk.W, padx=10, pady=5)
         
         # Product locations
         locations = self.warehouse.find_product(sku)
@@ -216,108 +406,37 @@ class ProductView:
         ttk.Button(action_frame, text="Back", 
                   command=self.setup_right_panel).pack(side=tk.RIGHT, padx=5)
     
-    def resolve_excess_quantity(self, product, total_in_warehouse):
-        """Handle excess quantity in the warehouse for a product."""
-        excess_quantity = total_in_warehouse - product.quantity
-        
-        def update_product_quantity():
-            """Update the product's total quantity to match the warehouse."""
-            product.update_quantity(excess_quantity)
-            self.warehouse.data_storage.save_products(self.warehouse.products)  # Save updated product data
-            self.show_message(f"Product quantity updated to match the warehouse: {total_in_warehouse}")
-            self.refresh_product_list()
-            self.refresh_warehouse_callback()
-            self.show_product_details_by_sku(product.sku)
-        
-        def remove_excess_from_warehouse():
-            """Remove excess quantity from the warehouse."""
-            remaining_to_remove = excess_quantity
-            for row in self.warehouse.grid:
-                for location in row:
-                    if remaining_to_remove <= 0:
-                        break
-                    if product.sku in location.inventory:
-                        qty_at_location = location.inventory[product.sku]
-                        qty_to_remove = min(remaining_to_remove, qty_at_location)
-                        location.remove_product(product.sku, qty_to_remove)
-                        remaining_to_remove -= qty_to_remove
-            
-            # Rebuild the product locations cache to ensure consistency
-            self.warehouse._rebuild_location_cache()
-            self.warehouse.data_storage.save_locations(self.warehouse.grid)  # Save updated location data
-            
-            self.show_message(f"Excess quantity removed from the warehouse: {excess_quantity}")
-            self.refresh_product_list()
-            self.refresh_warehouse_callback()
-            self.show_product_details_by_sku(product.sku)
-        
-        # Prompt user for action
-        action_window = tk.Toplevel(self.parent)
-        action_window.title("Resolve Excess Quantity")
-        action_window.geometry("400x200")
-        
-        ttk.Label(action_window, text=f"Excess quantity detected for {product.name} (SKU: {product.sku})", 
-                 font=("Arial", 12, "bold")).pack(pady=10)
-        ttk.Label(action_window, text=f"Total in warehouse: {total_in_warehouse}, Reported quantity: {product.quantity}", 
-                 foreground="red").pack(pady=5)
-        
-        ttk.Label(action_window, text="Choose an action:").pack(pady=10)
-        
-        ttk.Button(action_window, text="Update Product Quantity", 
-                   command=lambda: [update_product_quantity(), action_window.destroy()]).pack(pady=5)
-        ttk.Button(action_window, text="Remove Excess from Warehouse", 
-                   command=lambda: [remove_excess_from_warehouse(), action_window.destroy()]).pack(pady=5)
-        ttk.Button(action_window, text="Cancel", command=action_window.destroy).pack(pady=5)
-    
-    def auto_fix_mismatch(self, product):
-        """Automatically fix mismatched quantities for the selected product."""
-        quantity_to_distribute = product.quantity - sum(
-            location.inventory.get(product.sku, 0) for row in self.warehouse.grid for location in row
-        )
+    def reconcile_product(self, product, excess="keep"):
+        """Preview and apply the fix for one product with mismatched quantities."""
+        ReconcileDialog(self.parent, self.warehouse, skus=[product.sku], excess=excess,
+                        on_done=lambda plan: self.show_product_details_by_sku(product.sku))
+    
+    def distribute_stock(self, task, product, quantity_to_distribute):
+        """
+        Store units of a product wherever there is space; runs on a worker thread.
+        
+        Args:
+            task (Task): Receives progress
+            product (Product): The product to store
+            quantity_to_distribute (int): Units to place
+            
+        Returns:
+            list: Fix report lines describing where the units went
+        """
         fix_report = []
-
-        for row in self.warehouse.grid:
-            for location in row:
-                if quantity_to_distribute <= 0:
-                    break
-                available_space = location.get_available_capacity()
-                if available_space > 0:
-                    quantity_to_store = min(quantity_to_distribute, available_space)
-                    location.add_product(product, quantity_to_store)
-                    quantity_to_distribute -= quantity_to_store
-                    fix_report.append(
-                        f"Moved {quantity_to_store} units of {product.name} (SKU: {product.sku}) to Location {location.get_location_code()} "
-                        f"due to available space."
-                    )
+        task.report(0, None, f"Finding space for {quantity_to_distribute} units of {product.name}")
+        for r, c, quantity_to_store in self.warehouse.distribute_initial_quantity(product, quantity_to_distribute):
+            quantity_to_distribute -= quantity_to_store
+            fix_report.append(
+                f"Moved {quantity_to_store} units of {product.name} (SKU: {product.sku}) to Location {self.warehouse.grid[r][c].get_location_code()} "
+                f"due to available space."
+            )
         
         if quantity_to_distribute > 0:
             fix_report.append(
                 f"⚠️ Unable to fully distribute {quantity_to_distribute} units of {product.name} (SKU: {product.sku}) due to insufficient space."
             )
-        
-        # Refresh UI and show fix report
-        self.refresh_product_list()
-        self.refresh_warehouse_callback()
-        self.show_fix_report(fix_report)
-    
-    def show_fix_report(self, report):
-        """Display the fix report in a popup dialog."""
-        report_window = tk.Toplevel(self.parent)
-        report_window.title("Fix Report")
-        report_window.geometry("500x400")
-        
-        ttk.Label(report_window, text="Fix Report", font=("Arial", 14, "bold")).pack(pady=10)
-        
-        # Scrollable text area
-        text_area = tk.Text(report_window, wrap=tk.WORD, height=20)
-        text_area.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        for line in report:
-            text_area.insert(tk.END, line + "\n")
-        
-        text_area.config(state=tk.DISABLED)  # Make the text area read-only
-        
-        ttk.Button(report_window, text="Close", command=report_window.destroy).pack(pady=10)
+        return fix_report
     
     def show_add_product_form(self):
         """Show form to add a new product."""
@@ -440,7 +559,7 @@ class ProductView:
         # Create product and add to warehouse (without auto-distributing)
         product = Product(name, sku, price, quantity)
         
-        print(f"DEBUG: Creating new product {sku} with quantity {quantity}")
+        log.debug("Creating new product %s with quantity %s", sku, quantity)
         if not self.warehouse.add_product(product):
             self.show_message("Failed to add product.", is_error=True)
             return
@@ -448,194 +567,48 @@ class ProductView:
         # Handle location assignment based on user choice
         if self.location_option.get() == "automatic" and quantity > 0:
             # Use warehouse's distribution method
-            print(f"DEBUG: Automatic distribution selected for {sku}")
-            self.warehouse.distribute_initial_quantity(product)
-            self.warehouse.data_storage.save_products(self.warehouse.products)
-            self.warehouse.data_storage.save_locations(self.warehouse.grid)
-            
-            # Force rebuild of location cache to ensure accuracy
-            self.warehouse._rebuild_location_cache()
-            
-            self.warehouse.data_storage.save_log(self.warehouse.user,
-                f"Added product {sku} with automatic location assignment")
-            
-            # Refresh views and show success message
-            self.refresh_product_list()
-            self.refresh_warehouse_callback()
-            self.show_message(f"Product '{name}' added and distributed to warehouse locations.")
+            log.debug("Automatic distribution selected for %s", sku)
             
-            # Show product details instead of going back to main panel
-            self.show_product_details_by_sku(sku)
+            def distributed(fix_report):
+                self.warehouse.data_storage.save_log(self.warehouse.user,
+                    f"Added product {sku} with automatic location assignment")
+                
+                # Show success message (rows and grid update through change notifications)
+                self.show_message(f"Product '{name}' added and distributed to warehouse locations.")
+                
+                # Show product details instead of going back to main panel
+                self.show_product_details_by_sku(sku)
+            
+            # Placing the stock runs in the background, the window stays responsive;
+            # it is one operation, so there is nothing to cancel part way
+            ProgressDialog(self.parent, f"Distributing {name}", self.distribute_stock, product, quantity,
+                           on_done=distributed,
+                           on_error=lambda e: self.show_message(f"Distribution failed: {e}", is_error=True),
+                           cancellable=False)
         elif self.location_option.get() == "manual" and quantity > 0:
             # Show manual assignment form
-            print(f"DEBUG: Manual distribution selected for {sku}")
-            self.warehouse.data_storage.save_products(self.warehouse.products)
+            log.debug("Manual distribution selected for %s", sku)
             self.show_message(f"Product '{name}' added. Please assign locations.")
             self.show_manual_location_assignment(sku)
         else:
             # Zero quantity or unknown option, just log it
-            print(f"DEBUG: No distribution needed for {sku} (quantity {quantity})")
-            self.warehouse.data_storage.save_products(self.warehouse.products)
+            log.debug("No distribution needed for %s (quantity %s)", sku, quantity)
             self.warehouse.data_storage.save_log(self.warehouse.user, f"Added product {sku}")
             self.show_message(f"Product '{name}' added successfully.")
-            self.refresh_product_list()
             self.setup_right_panel()  # Return to main view
     
     def show_manual_location_assignment(self, sku):
-        """Show form for manually assigning product locations."""
-        # Create a new dialog for location assignment
-        assign_window = tk.Toplevel(self.parent)
-        assign_window.title("Assign Product Locations")
-        assign_window.geometry("450x500")
-        assign_window.transient(self.parent)
-        assign_window.grab_set()
-        
-        product = self.warehouse.products[sku]
-        
-        # Dialog header
-        ttk.Label(assign_window, text=f"Assign Locations for {product.name}", 
-                 font=("Arial", 12, "bold")).pack(pady=10)
-        ttk.Label(assign_window, text=f"Total Quantity: {product.quantity}").pack(pady=5)
-        
-        # Create scrollable frame for location assignments
-        main_frame = ttk.Frame(assign_window)
-        main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # Canvas for scrolling
-        canvas = tk.Canvas(main_frame)
-        scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=canvas.yview)
-        scrollable_frame = ttk.Frame(canvas)
-        
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        
-        # Remaining quantity display
-        remaining_var = tk.IntVar(value=product.quantity)
-        
-        def update_remaining(event=None):
-            """Update the remaining quantity based on current assignments."""
-            assigned = sum(int(qty_vars[i].get()) if qty_vars[i].get().isdigit() else 0 
-                           for i in range(len(qty_vars)))
-            remaining = max(0, product.quantity - assigned)
-            remaining_var.set(remaining)
-            remaining_label.config(text=f"Remaining Quantity: {remaining}")
-        
-        # Create location entries
-        location_labels = []
-        qty_vars = []
-        qty_entries = []
-        
-        row = 0
-        for r in range(self.warehouse.rows):
-            for c in range(self.warehouse.cols):
-                location = self.warehouse.grid[r][c]
-                available = location.get_available_capacity()
-                
-                if available > 0:
-                    # Container frame for this location
-                    loc_frame = ttk.Frame(scrollable_frame)
-                    loc_frame.grid(row=row, column=0, sticky="ew", padx=5, pady=2)
-                    
-                    # Location info
-                    loc_label = ttk.Label(loc_frame, text=f"{location.get_location_code()} (Available: {available})")
-                    loc_label.pack(side=tk.LEFT, padx=5)
-                    location_labels.append(loc_label)
-                    
-                    # Quantity entry
-                    qty_var = tk.StringVar(value="0")
-                    qty_vars.append(qty_var)
-                    
-                    qty_entry = ttk.Spinbox(loc_frame, from_=0, to=min(available, product.quantity), 
-                                          textvariable=qty_var, width=10)
-                    qty_entry.pack(side=tk.RIGHT, padx=5)
-                    qty_entries.append(qty_entry)
-                    
-                    # Bind changes to update remaining
-                    qty_var.trace_add("write", update_remaining)
-                    
-                    row += 1
-        
-        # Display remaining quantity
-        remaining_label = ttk.Label(assign_window, text=f"Remaining Quantity: {product.quantity}")
-        remaining_label.pack(pady=5)
-        
-        # Action buttons
-        btn_frame = ttk.Frame(assign_window)
-        btn_frame.pack(fill=tk.X, pady=10, padx=10)
-        
-        def assign_locations():
-            """Handle the assignment action."""
-            assigned = 0
-            print(f"DEBUG: Manually assigning locations for {sku}")
-            
-            # Store product at each selected location
-            for i in range(len(qty_vars)):
-                try:
-                    qty = int(qty_vars[i].get())
-                    if qty > 0:
-                        # Get location coordinates from label text
-                        loc_code = location_labels[i].cget("text").split()[0]
-                        row = ord(loc_code[0]) - 65
-                        col = int(loc_code[1:]) - 1
-                        
-                        # Store at location
-                        print(f"DEBUG: Storing {qty} of {sku} at {loc_code}")
-                        if self.warehouse.store_product(sku, qty, row, col):
-                            assigned += qty
-                            print(f"DEBUG: Successfully stored {qty} units at {loc_code}")
-                        else:
-                            print(f"DEBUG: Failed to store at {loc_code}")
-                except (ValueError, IndexError) as e:
-                    print(f"DEBUG: Error processing location {i}: {e}")
-            
-            # Check if all quantity was assigned
-            product = self.warehouse.products[sku]
-            total_assigned = assigned
-            if assigned < product.quantity:
-                # Update product quantity to match what was assigned
-                delta = assigned - product.quantity
-                print(f"DEBUG: Updating product quantity from {product.quantity} to {assigned} (delta: {delta})")
-                product.update_quantity(delta)
-                messagebox.showinfo("Partial Assignment", 
-                    f"Only {assigned} of {product.quantity} units were assigned to locations. Product quantity has been updated.")
-            
-            # Save changes
-            self.warehouse.data_storage.save_products(self.warehouse.products)
-            self.warehouse.data_storage.save_locations(self.warehouse.grid)
-            
-            # Log the action
-            self.warehouse.data_storage.save_log(self.warehouse.user,
-                f"Manually assigned {total_assigned} units of {sku} to locations")
-            
-            # Close dialog and refresh
-            print(f"DEBUG: Assignment complete, refreshing views")
-            assign_window.destroy()
-            self.refresh_product_list()
-            self.refresh_warehouse_callback()
-            self.show_product_details_by_sku(sku)
-        
-        ttk.Button(btn_frame, text="Assign Locations", command=assign_locations).pack(side=tk.LEFT, padx=5)
-        ttk.Button(btn_frame, text="Cancel", command=assign_window.destroy).pack(side=tk.RIGHT, padx=5)
+        """Show the dialog for manually assigning product locations."""
+        log.debug("Opening manual assignment for %s", sku)
+        ManualAssignmentDialog(self.parent, self.warehouse, sku, on_done=self.show_product_details_by_sku)
     
     def show_product_details_by_sku(self, sku):
         """Show product details by SKU."""
         if sku not in self.warehouse.products:
             return
         
-        # Select the product in the treeview
-        for item in self.product_tree.get_children():
-            if self.product_tree.item(item, "values")[1] == sku:
-                self.product_tree.selection_set(item)
-                self.product_tree.focus(item)
-                break
+        # Select the product in the treeview, scrolling it into view
+        self.product_list.see(sku)
                 
         # Show the details        
         for widget in self.right_panel.winfo_children():
@@ -768,30 +741,23 @@ class ProductView:
             self.show_message("Please enter a valid quantity.", is_error=True)
             return
             
-        # Update product
-        product.name = name
-        product.update_price(price)
-        
-        # Handle quantity change
-        if quantity != product.quantity:
-            delta = quantity - product.quantity
-            product.update_quantity(delta)
+        # Update product through the warehouse so the edit can be undone
+        if not self.warehouse.update_product(sku, name=name, price=price, quantity=quantity):
+            self.show_message("Failed to update product.", is_error=True)
+            return
         
         # log update
         self.warehouse.data_storage.save_log(self.warehouse.user,
             f"Updated product {sku}")
         self.show_message("Product updated successfully.")
-        self.refresh_product_list()
         self.show_product_details_by_sku(sku)
     
     def delete_product_action(self, sku):
         """Handle product deletion with confirmation."""
         if messagebox.askyesno("Confirm Delete", 
-                f"Are you sure you want to delete product {sku}? This cannot be undone."):
+                f"Are you sure you want to delete product {sku}? You can undo this with Ctrl+Z."):
             if self.warehouse.delete_product(sku):
                 self.show_message(f"Product {sku} deleted successfully.")
-                self.refresh_product_list()
-                self.refresh_warehouse_callback()
                 self.setup_right_panel()
             else:
                 messagebox.showerror("Error", "Failed to delete product.")
@@ -13,7 +13,7 @@ class SettingsDialog:
         # Create the dialog window
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("Warehouse Configuration")
-        self.dialog.geometry("400x300")
+        self.dialog.geometry("400x360")
         self.dialog.transient(parent)
         self.dialog.grab_set()
         
@@ -54,9 +54,17 @@ class SettingsDialog:
         self.cols_var = tk.IntVar(value=self.current_settings["warehouse_cols"])
         ttk.Spinbox(frame, from_=1, to=99, textvariable=self.cols_var, width=10).grid(row=1, column=1, pady=5)
         
+        # Durability settings, applied straight away
+        ttk.Label(frame, text="Durability:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.durability_var = tk.StringVar(value=self.current_settings["durability"])
+        ttk.Combobox(frame, textvariable=self.durability_var, values=["fast", "group", "strict"],
+                     state="readonly", width=8).grid(row=2, column=1, pady=5)
+        ttk.Label(frame, text="fast: no disk flushes, group: flushed every few ms,\nstrict: every change flushed before it completes",
+                 foreground="gray").grid(row=3, column=0, columnspan=2, sticky=tk.W)
+        
         # Warning label
-        ttk.Label(frame, text="Warning: Changing these settings will require a restart.",
-                 foreground="red").grid(row=2, column=0, columnspan=2, pady=20)
+        ttk.Label(frame, text="Warning: Changing the dimensions will require a restart.",
+                 foreground="red").grid(row=4, column=0, columnspan=2, pady=20)
         
         # Buttons
         btn_frame = ttk.Frame(self.dialog)
@@ -74,6 +82,13 @@ class SettingsDialog:
             if rows < 1 or rows > 26 or cols < 1 or cols > 99:
                 raise ValueError("Invalid dimensions")
                 
+            # The durability mode needs no restart
+            durability = self.durability_var.get()
+            if durability != self.current_settings["durability"]:
+                self.current_settings["durability"] = durability
+                self.warehouse.data_storage.durability.mode = durability
+                self.warehouse.data_storage.save_settings(self.current_settings)
+            
             # Check if settings were changed
             if rows != self.current_settings["warehouse_rows"] or cols != self.current_settings["warehouse_cols"]:
                 # Update settings
@@ -1,6 +1,21 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from location import Location
+from product import Product
 from data_storage import DataStorage
-from utils.debug_utils import DebugPrint  # Import DebugPrint utility
+from integrity import IntegrityReport
+from reconciliation import ReconciliationPlan, EXCESS_POLICIES
+from events import StockAdjusted, QuantityAdjusted, ProductAdded, ProductRemoved, ProductUpdated
+from undo_history import Operation, UndoHistory
+from inventory_history import InventoryHistory
+from event_bus import EventBus, WarehouseChange
+from product_index import ProductIndex, TrigramIndex
+from warehouse_locks import WarehouseLocks
+from utils.logging_utils import get_logger
+from utils.metrics import timed
+
+log = get_logger(__name__)
 
 class Warehouse:
     """
@@ -11,19 +26,27 @@ class Warehouse:
         cols (int): Number of columns in the warehouse grid
         grid (list): 2D array of Location objects
         products (dict): Dictionary mapping SKUs to Product objects
+        history (UndoHistory): Undo/redo stacks of recorded operations
+        bus (EventBus): Change notifications for views and other observers
+        index (ProductIndex): Sorted secondary indexes over product attributes
+        name_index (TrigramIndex): Trigram index for fuzzy name and SKU search
+        locks (WarehouseLocks): Striped locks that make operations safe for concurrent callers
     """
     
-    def __init__(self, rows, cols):
-        """Initialize a new Warehouse instance."""
+    # Attempts at an operation that conflicts with changes from other processes
+    MERGE_RETRIES = 5
+    
+    def __init__(self, rows, cols, data_dir="data"):
+        """Initialize a new Warehouse instance, stored in data_dir."""
         self.rows = rows
         self.cols = cols
         self.grid = []
         self.products = {}  # Maps SKU to Product object
-        self.data_storage = DataStorage()
+        self.data_storage = DataStorage(data_dir)
         self.changes_since_save = 0  # Track changes to avoid excessive saves
         self.save_threshold = 5  # Save after this many changes
         
-        DebugPrint.info(f"Initializing warehouse with dimensions {rows}x{cols}")  # Debug message
+        log.debug("Initializing warehouse with dimensions %sx%s", rows, cols)  # Debug message
         
         # Initialize the 2D grid with Location objects
         for r in range(rows):
@@ -34,19 +57,71 @@ class Warehouse:
         
         # Location lookup cache for faster product searches
         self.product_locations = {}  # Maps SKU to list of (row, col) tuples
+        
+        # Units of each product stored across all locations, kept up to date by every event
+        self.stored_totals = {}
+        
+        # What recovery and the integrity pass found during the last load
+        self.integrity_report = None
+        
+        # Undo/redo history of operations performed on this warehouse
+        self.history = UndoHistory()
+        
+        # Observers are told which SKUs and cells changed after each operation
+        self.bus = EventBus()
+        
+        # Sorted indexes for range and prefix queries over products
+        self.index = ProductIndex()
+        
+        # Trigram index so misspelled names still find products
+        self.name_index = TrigramIndex()
+        
+        # Per-product and per-location locks so concurrent callers only wait on shared data
+        self.locks = WarehouseLocks(cols)
+        
+        # Per thread: depth of _exclusive sections and the change notifications they hold back
+        self._exclusive_state = threading.local()
+        
+        # CSV files left to write when the outermost batch() ends
+        self._batch_depth = 0
+        self._pending_saves = set()
+    
+    def subscribe(self, topic, callback):
+        """
+        Register a callback for warehouse change notifications.
+        
+        Args:
+            topic (str): Topic name, see EventBus.TOPICS
+            callback (callable): Called with a WarehouseChange after each change
+            
+        Returns:
+            callable: The callback, for use with unsubscribe
+        """
+        return self.bus.subscribe(topic, callback)
+    
+    def unsubscribe(self, topic, callback):
+        """Remove a callback registered with subscribe."""
+        self.bus.unsubscribe(topic, callback)
     
+    @timed("warehouse")
     def add_product(self, product):
         """Register a new product in the warehouse."""
-        DebugPrint.process(f"Adding product {product.sku} with quantity {product.quantity}")  # Debug message
-        if product.sku not in self.products:
-            self.products[product.sku] = product
-            self.product_locations[product.sku] = []
+        log.debug("Adding product %s with quantity %s", product.sku, product.quantity)  # Debug message
+        with self._exclusive():
+            added = product.sku not in self.products and self._commit(
+                f"Add product {product.sku}",
+                [ProductAdded(product.sku, product.name, product.price, product.quantity)])
+            if added:
+                # Keep the caller's Product object as the registered instance
+                self.products[product.sku] = product
+        if added:
             self._increment_changes()
-            DebugPrint.success(f"Product {product.sku} added successfully")  # Debug message
+            log.debug("Product %s added successfully", product.sku)  # Debug message
             return True
-        DebugPrint.warning(f"Product {product.sku} already exists")  # Debug message
+        log.warning("Product %s already exists", product.sku)  # Debug message
         return False
     
+    @timed("warehouse")
     def store_product(self, sku, quantity, row, col):
         """
         Store a product at a specific location.
@@ -60,33 +135,27 @@ class Warehouse:
         Returns:
             bool: True if successful, False otherwise
         """
-        DebugPrint.process(f"Storing {quantity} units of {sku} at ({row},{col})")  # Debug message
-        if sku not in self.products:
+        log.debug("Storing %s units of %s at (%s,%s)", quantity, sku, row, col)  # Debug message
+        if sku not in self.products or quantity <= 0:
             return False
             
         if row < 0 or row >= self.rows or col < 0 or col >= self.cols:
             return False
             
-        product = self.products[sku]
         location = self.grid[row][col]
         
-        if not location.add_product(product, quantity):
+        # Location stock and the product's total quantity both increase
+        events = [StockAdjusted(sku, row, col, quantity), QuantityAdjusted(sku, quantity)]
+        if not self._commit(f"Store {quantity} x {sku} at {location.get_location_code()}", events):
             return False
         
-        # Update product's total quantity
-        product.update_quantity(quantity)
-        
-        # Update location cache
-        if (row, col) not in self.product_locations.get(sku, []):
-            self.product_locations.setdefault(sku, []).append((row, col))
-        
         # Save data immediately
-        self.data_storage.save_products(self.products)
-        self.data_storage.save_locations(self.grid)
+        self._save(products=True, locations=True)
         
-        DebugPrint.success(f"Successfully stored {quantity} units of {sku} at ({row},{col})")  # Debug message
+        log.debug("Successfully stored %s units of %s at (%s,%s)", quantity, sku, row, col)  # Debug message
         return True
     
+    @timed("warehouse")
     def retrieve_product(self, sku, quantity, row, col):
         """
         Retrieve a product from a specific location.
@@ -100,8 +169,8 @@ class Warehouse:
         Returns:
             bool: True if successful, False otherwise
         """
-        DebugPrint.process(f"Retrieving {quantity} units of {sku} from ({row},{col})")  # Debug message
-        if sku not in self.products:
+        log.debug("Retrieving %s units of %s from (%s,%s)", quantity, sku, row, col)  # Debug message
+        if sku not in self.products or quantity <= 0:
             return False
             
         if row < 0 or row >= self.rows or col < 0 or col >= self.cols:
@@ -110,28 +179,103 @@ class Warehouse:
         product = self.products[sku]
         location = self.grid[row][col]
         
-        # Check if the quantity being removed will empty this location for this product
-        will_be_empty = location.inventory.get(sku, 0) <= quantity
+        # The product total is only reduced if it would not go negative
+        events = [StockAdjusted(sku, row, col, -quantity)]
+        if product.quantity >= quantity:
+            events.append(QuantityAdjusted(sku, -quantity))
+        
+        if not self._commit(f"Retrieve {quantity} x {sku} from {location.get_location_code()}", events):
+            return False
+        
+        # Save data immediately
+        self._save(products=True, locations=True)
+        
+        log.debug("Successfully retrieved %s units of %s from (%s,%s)", quantity, sku, row, col)  # Debug message
+        return True
+    
+    @timed("warehouse")
+    def move_product(self, sku, quantity, from_row, from_col, to_row, to_col):
+        """
+        Move a quantity of a product from one location to another.
+        
+        Args:
+            sku (str): The SKU of the product
+            quantity (int): The quantity to move
+            from_row (int): The source row coordinate
+            from_col (int): The source column coordinate
+            to_row (int): The destination row coordinate
+            to_col (int): The destination column coordinate
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        log.debug("Moving %s units of %s from (%s,%s) to (%s,%s)", quantity, sku, from_row, from_col, to_row, to_col)  # Debug message
+        if sku not in self.products or quantity <= 0:
+            return False
+        
+        for r, c in ((from_row, from_col), (to_row, to_col)):
+            if r < 0 or r >= self.rows or c < 0 or c >= self.cols:
+                return False
         
-        if not location.remove_product(sku, quantity):
+        if (from_row, from_col) == (to_row, to_col):
             return False
+        
+        source = self.grid[from_row][from_col].get_location_code()
+        target = self.grid[to_row][to_col].get_location_code()
+        
+        # The product total is unchanged, only its placement moves
+        events = [StockAdjusted(sku, from_row, from_col, -quantity),
+                  StockAdjusted(sku, to_row, to_col, quantity)]
+        if not self._commit(f"Move {quantity} x {sku} from {source} to {target}", events):
+            return False
+        
+        self._save(locations=True)
+        
+        log.debug("Successfully moved %s units of %s to (%s,%s)", quantity, sku, to_row, to_col)  # Debug message
+        return True
+    
+    @timed("warehouse")
+    def update_product(self, sku, name=None, price=None, quantity=None):
+        """
+        Edit the details of an existing product.
+        
+        Args:
+            sku (str): The SKU of the product
+            name (str): New product name, or None to keep the current one
+            price (float): New price, or None to keep the current one
+            quantity (int): New total quantity, or None to keep the current one
             
-        # Update product's total quantity
-        product.update_quantity(-quantity)
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if sku not in self.products:
+            return False
+        if price is not None and price < 0:
+            return False
+        if quantity is not None and quantity < 0:
+            return False
         
-        # Remove location from cache if it becomes empty
-        if will_be_empty:
-            self.product_locations[sku].remove((row, col))
-            if not self.product_locations[sku]:
-                del self.product_locations[sku]
+        product = self.products[sku]
+        requested = {"name": name, "price": price, "quantity": quantity}
         
-        # Save data immediately
-        self.data_storage.save_products(self.products)
-        self.data_storage.save_locations(self.grid)
+        # Only record the fields that actually change
+        old_fields = {}
+        new_fields = {}
+        for field, value in requested.items():
+            if value is not None and getattr(product, field) != value:
+                old_fields[field] = getattr(product, field)
+                new_fields[field] = value
+        
+        if not new_fields:
+            return True
+        
+        if not self._commit(f"Edit product {sku}", [ProductUpdated(sku, old_fields, new_fields)]):
+            return False
         
-        DebugPrint.success(f"Successfully retrieved {quantity} units of {sku} from ({row},{col})")  # Debug message
+        self._save(products=True)
         return True
     
+    @timed("warehouse")
     def find_product(self, sku):
         """
         Find all locations where a product is stored.
@@ -142,20 +286,122 @@ class Warehouse:
         Returns:
             list: List of (row, col) tuples where the product is found
         """
-        # Use the cached location data instead of searching the entire grid
-        if sku in self.product_locations:
-            return self.product_locations[sku].copy()
+        with self.locks.for_product(sku):
+            # Use the cached location data instead of searching the entire grid
+            if sku in self.product_locations:
+                return self.product_locations[sku].copy()
+            
+            # Fall back to grid search if cache is empty (should not normally happen)
+            locations = []
+            for r in range(self.rows):
+                for c in range(self.cols):
+                    if sku in self.grid[r][c].inventory:
+                        locations.append((r, c))
+            
+            # Update cache with found locations
+            self.product_locations[sku] = locations.copy()
+            return locations
+    
+    @timed("warehouse")
+    def query_products(self, prefix=None, min_price=None, max_price=None,
+                       min_quantity=None, max_quantity=None, limit=None):
+        """
+        Find products using the sorted secondary indexes.
         
-        # Fall back to grid search if cache is empty (should not normally happen)
-        locations = []
-        for r in range(self.rows):
-            for c in range(self.cols):
-                if sku in self.grid[r][c].inventory:
-                    locations.append((r, c))
+        Args:
+            prefix (str): Case-insensitive prefix of the product name or SKU
+            min_price (float): Lowest price to include
+            max_price (float): Highest price to include
+            min_quantity (int): Lowest total quantity to include
+            max_quantity (int): Highest total quantity to include
+            limit (int): Maximum number of products to return
+            
+        Returns:
+            list: Matching Product objects, ordered by the index used for the query
+        """
+        with self.locks.index:
+            # Drive the query from one index and check the remaining conditions per candidate
+            if prefix:
+                candidates = self._prefix_matches(prefix)
+            elif min_price is not None or max_price is not None:
+                candidates = self.index.price_range(min_price, max_price)
+            elif min_quantity is not None or max_quantity is not None:
+                candidates = self.index.quantity_range(min_quantity, max_quantity)
+            else:
+                candidates = (sku for _, sku in self.index.by_name)
+            
+            results = []
+            for sku in candidates:
+                product = self.products.get(sku)
+                if product is None:
+                    continue
+                if min_price is not None and product.price < min_price:
+                    continue
+                if max_price is not None and product.price > max_price:
+                    continue
+                if min_quantity is not None and product.quantity < min_quantity:
+                    continue
+                if max_quantity is not None and product.quantity > max_quantity:
+                    continue
+                results.append(product)
+                if limit is not None and len(results) >= limit:
+                    break
+        return results
+    
+    @timed("warehouse")
+    def search_products(self, text, limit=10):
+        """
+        Find products by approximate name or SKU.
+        
+        Exact SKU matches come first, then name and SKU prefix matches, then
+        fuzzy matches ranked by trigram similarity, so typing the start of a
+        name behaves as before while typos still find the product.
+        
+        Args:
+            text (str): What the user typed
+            limit (int): Maximum number of products to return
+            
+        Returns:
+            list: Matching Product objects, best match first
+        """
+        text = text.strip()
+        if not text:
+            return []
+        
+        results = []
+        seen = set()
         
-        # Update cache with found locations
-        self.product_locations[sku] = locations.copy()
-        return locations
+        def take(sku):
+            if sku not in seen and sku in self.products:
+                seen.add(sku)
+                results.append(self.products[sku])
+            return len(results) >= limit
+        
+        with self.locks.index:
+            # An exact SKU always wins
+            if text in self.products and take(text):
+                return results
+            
+            for sku in self._prefix_matches(text):
+                if take(sku):
+                    return results
+            
+            for _, sku in self.name_index.search(text, limit + len(results)):
+                if take(sku):
+                    break
+        
+        log.debug("Fuzzy search for '%s' found %s products", text, len(results))  # Debug message
+        return results
+    
+    def _prefix_matches(self, prefix):
+        """Yield SKUs whose name starts with prefix, then SKUs that themselves start with it."""
+        seen = set()
+        for sku in self.index.name_prefix(prefix):
+            seen.add(sku)
+            yield sku
+        for sku in self.index.sku_prefix(prefix):
+            if sku not in seen:
+                yield sku
     
     def visualize(self):
         """
@@ -185,11 +431,60 @@ class Warehouse:
             
         return result
 
+    @timed("warehouse")
     def reset_warehouse(self):
         """Reset the warehouse to its initial state."""
-        self.__init__(self.rows, self.cols)
+        with self._exclusive():
+            events = []
+            for sku in list(self.products):
+                events.extend(self._delete_events(sku))
+            if events:
+                self._commit("Reset warehouse", events)
         self.save_data(force=True)
     
+    @contextmanager
+    def batch(self):
+        """
+        Group several operations so the CSV files are written once at the end.
+        
+        Operations inside the block are applied, journaled and published as
+        usual; only their CSV saves are deferred until the outermost batch
+        exits. Batches may be nested.
+        
+        Yields:
+            Warehouse: This warehouse
+        """
+        with self.locks.counter:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self.locks.counter:
+                self._batch_depth -= 1
+                pending = set()
+                if self._batch_depth == 0:
+                    pending, self._pending_saves = self._pending_saves, set()
+            if pending:
+                log.debug("Flushing batched saves: %s", ', '.join(sorted(pending)))  # Debug message
+                self._save(products="products" in pending, locations="locations" in pending)
+    
+    def _save(self, products=False, locations=False):
+        """Save the product and/or location CSV files, or defer them while a batch is open."""
+        with self.locks.counter:
+            if self._batch_depth:
+                if products:
+                    self._pending_saves.add("products")
+                if locations:
+                    self._pending_saves.add("locations")
+                return
+        # Stamp the files with the journal position they reflect for other processes
+        version = self.data_storage.journal.applied_seq
+        if products:
+            self.data_storage.save_products(self.products, version)
+        if locations:
+            self.data_storage.save_locations(self.grid, version)
+    
+    @timed("warehouse")
     def save_data(self, force=False):
         """
         Save warehouse data to CSV files.
@@ -197,48 +492,237 @@ class Warehouse:
         Args:
             force (bool): If True, save regardless of number of changes
         """
-        if force or self.changes_since_save >= self.save_threshold:
-            DebugPrint.database("Saving warehouse data to CSV files")  # Debug message
-            self.data_storage.save_products(self.products)
-            self.data_storage.save_locations(self.grid)
-            self.changes_since_save = 0
+        with self.locks.counter:
+            due = force or self.changes_since_save >= self.save_threshold
+            if due:
+                self.changes_since_save = 0
+        if due and not force:
+            # Threshold saves wait for an open batch like every other save
+            self._save(products=True, locations=True)
+        elif due:
+            log.debug("Saving warehouse data to CSV files")  # Debug message
+            version = self.data_storage.journal.applied_seq
+            self.data_storage.save_products(self.products, version)
+            self.data_storage.save_locations(self.grid, version)
+            
+            # Compact the journal so the next startup has fewer events to replay
+            if force and self.data_storage.journal.events_since_checkpoint > 0:
+                self.checkpoint()
+    
+    def state_at(self, timestamp):
+        """
+        Return a read-only view of the inventory as it was at a point in time.
+        
+        Args:
+            timestamp (float): Unix time, e.g. from time.time() or datetime.timestamp()
+            
+        Returns:
+            InventorySnapshot: Products and locations at that time, or None if
+            the recorded history does not go back that far
+        """
+        return InventoryHistory(self.data_storage.journal).state_at(timestamp)
     
-    def load_data(self):
-        """Load warehouse data from CSV files."""
-        DebugPrint.database("Loading warehouse data from CSV files")  # Debug message
-        # Load products
-        self.products = self.data_storage.load_products()
+    def changes_between(self, start, end):
+        """
+        Summarize what changed in the inventory between two points in time.
         
-        # Initialize product locations cache
-        self.product_locations = {sku: [] for sku in self.products}
+        Args:
+            start (float): Unix time the period starts (exclusive)
+            end (float): Unix time the period ends (inclusive)
+            
+        Returns:
+            InventoryDiff: Net stock, quantity and product changes in the period
+        """
+        return InventoryHistory(self.data_storage.journal).changes_between(start, end)
+    
+    @timed("warehouse")
+    def checkpoint(self):
+        """Write a checkpoint of the current state to the event journal."""
+        # Exclusive so the checkpoint is a consistent cut of every product and location
+        with self._exclusive():
+            self._merge_pending()
+            if not self.data_storage.journal.write_checkpoint(self.products, self.grid):
+                log.warning("Skipped checkpoint, other processes are still writing")  # Debug message
+    
+    @timed("warehouse")
+    def load_data(self, executor=None):
+        """
+        Load warehouse data from the newest checkpoint and the events after it.
         
-        # Load locations
-        success = self.data_storage.load_locations(self.grid, self.products)
+        Falls back to the CSV files when no checkpoint exists yet, and then
+        writes one so later startups use the journal.
         
-        # Build location cache
-        if success:
-            self._rebuild_location_cache()
+        Args:
+            executor (Executor): If given, independent files are parsed on it
+                concurrently (checkpoint and journal events, or products and
+                locations)
+            
+        Returns:
+            bool: True if any products were loaded
+        """
+        journal = self.data_storage.journal
+        report = IntegrityReport()
+        # Hold the shared lock so no other process writes between the checkpoint and its events
+        with self._exclusive(), journal.process_lock:
+            # Finish or discard writes a crash interrupted before reading anything
+            self.data_storage.recover(report)
+            journal.reset()
+            checkpoint, events = self._read_journal(executor)
+            
+            if checkpoint is None:
+                log.debug("No checkpoint found, loading warehouse data from CSV files")  # Debug message
+                self._load_csv_data(executor, report)
+                self.checkpoint()
+            else:
+                log.debug("Loading checkpoint at event %s", checkpoint['seq'])  # Debug message
+                self._load_checkpoint(checkpoint, report)
+                
+                # Replay only the events recorded after the checkpoint
+                replayed = skipped = 0
+                for event in events:
+                    if self._apply_event(event):
+                        replayed += 1
+                    else:
+                        skipped += 1
+                log.debug("Replayed %s events", replayed)  # Debug message
+                if skipped:
+                    log.warning("Skipped %s events that no longer apply", skipped)  # Debug message
+            
+            # Stored totals were built while placing stock, so checking them is one pass over the products
+            report.compare_totals(self.products, self.stored_totals)
+            self.integrity_report = report
+            
+            # Loaded state is the new baseline, earlier operations cannot be undone
+            with self.locks.history:
+                self.history.clear()
+        self.bus.publish(WarehouseChange("warehouse_reloaded"))
         
-        DebugPrint.success(f"Successfully loaded {len(self.products)} products")  # Debug message
+        if report.ok:
+            log.info("%s", report)  # Debug message
+        else:
+            log.warning("%s", report)  # Debug message
+        log.info("Successfully loaded %s products", len(self.products))  # Debug message
         return len(self.products) > 0
     
-    def _rebuild_location_cache(self):
-        """Rebuild the product locations cache from current warehouse state."""
-        self.product_locations = {sku: [] for sku in self.products}
+    def load_data_async(self):
+        """
+        Start loading warehouse data on a background thread pool.
         
-        for r in range(self.rows):
-            for c in range(self.cols):
+        Subscribers get the usual warehouse_reloaded notification when the
+        data is in place, so a window can be shown before loading finishes.
+        
+        Returns:
+            Future: Resolves to the result of load_data
+        """
+        executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="warehouse-load")
+        future = executor.submit(self.load_data, executor)
+        future.add_done_callback(lambda done: executor.shutdown(wait=False))
+        return future
+    
+    def _read_journal(self, executor=None):
+        """
+        Read the newest checkpoint and the events journaled after it.
+        
+        Returns:
+            tuple: (checkpoint dict or None, list of events to replay)
+        """
+        journal = self.data_storage.journal
+        checkpoints = journal.list_checkpoints()
+        if not checkpoints:
+            return None, []
+        
+        if executor is None:
+            checkpoint = journal.load_latest_checkpoint()
+            events = None
+        else:
+            # Parse the checkpoint and read the events after it at the same time
+            checkpoint_future = executor.submit(journal.load_latest_checkpoint)
+            events_future = executor.submit(lambda: list(journal.read_events(checkpoints[-1])))
+            checkpoint = checkpoint_future.result()
+            events = events_future.result()
+        
+        if checkpoint is None:
+            return None, []
+        if events is None or checkpoint["seq"] != checkpoints[-1]:
+            # The newest checkpoint was unreadable and an older one was used instead
+            events = list(journal.read_events(checkpoint["seq"]))
+        return checkpoint, events
+    
+    def _load_csv_data(self, executor=None, report=None):
+        """Load products and locations from the CSV files."""
+        if executor is None:
+            products = self.data_storage.load_products(report)
+            location_rows = self.data_storage.read_location_rows(report)
+        else:
+            # Both files parse independently; only placing stock needs the products
+            products_future = executor.submit(self.data_storage.load_products, report)
+            rows_future = executor.submit(self.data_storage.read_location_rows, report)
+            products = products_future.result()
+            location_rows = rows_future.result()
+        self._load_state(products, location_rows or [], report)
+    
+    def _load_checkpoint(self, checkpoint, report=None):
+        """Replace the current state with the contents of a checkpoint."""
+        products = {sku: Product(name, sku, price, quantity)
+                    for sku, name, price, quantity in checkpoint["products"]}
+        self._load_state(products, checkpoint["locations"], report)
+    
+    def _load_state(self, products, location_rows, report=None):
+        """
+        Replace the current state with loaded products and stock.
+        
+        Stock is placed, checked and indexed in a single pass over the rows:
+        rows for unknown products, cells outside the grid or beyond a cell's
+        capacity are counted in the report instead of silently dropped, and
+        the location cache and stored totals are built along the way.
+        
+        Args:
+            products (dict): Dictionary of SKU to Product objects
+            location_rows (list): (row, col, sku, quantity) rows
+            report (IntegrityReport): Counts rows that could not be placed
+        """
+        self.products = products
+        self.product_locations = {sku: [] for sku in products}
+        self.stored_totals = dict.fromkeys(products, 0)
+        for row in self.grid:
+            for location in row:
+                location.inventory = {}
+                location.current_stock = 0
+        with self.locks.index:
+            self.index.rebuild(self.products)
+            self.name_index.rebuild(self.products)
+        
+        dropped = {}
+        for r, c, sku, quantity in location_rows:
+            if r < 0 or r >= self.rows or c < 0 or c >= self.cols:
+                reason = "out_of_range"
+            elif sku not in products:
+                reason = "unknown_sku"
+            else:
                 location = self.grid[r][c]
-                for sku in location.inventory:
-                    if sku in self.product_locations:
+                first_here = sku not in location.inventory
+                if location.add_product(products[sku], quantity):
+                    if first_here:
                         self.product_locations[sku].append((r, c))
+                    self.stored_totals[sku] += quantity
+                    continue
+                reason = "over_capacity"
+            dropped[reason] = dropped.get(reason, 0) + 1
+        
+        for reason, count in dropped.items():
+            log.warning("Skipped %s location rows: %s", count, reason.replace("_", " "))  # Debug message
+            if report is not None:
+                report.drop(reason, count)
     
     def _increment_changes(self):
         """Increment change counter and save if threshold reached."""
-        self.changes_since_save += 1
-        if self.changes_since_save >= self.save_threshold:
+        with self.locks.counter:
+            self.changes_since_save += 1
+            due = self.changes_since_save >= self.save_threshold
+        if due:
             self.save_data()
 
+    @timed("warehouse")
     def validate_quantities(self):
         """
         Validate that the total quantity of each product matches the quantity stored in the warehouse.
@@ -246,56 +730,557 @@ class Warehouse:
         Returns:
             list: List of SKUs with mismatched quantities.
         """
-        mismatched_skus = []
-        for sku, product in self.products.items():
-            total_in_warehouse = sum(
-                location.inventory.get(sku, 0) for row in self.grid for location in row
-            )
-            if total_in_warehouse != product.quantity:
-                mismatched_skus.append(sku)
+        # Stored totals are maintained by every event, so no scan of the grid is needed
+        with self.locks.exclusive():
+            mismatched_skus = [sku for sku, product in self.products.items()
+                               if self.stored_totals.get(sku, 0) != product.quantity]
         return mismatched_skus
 
-    def distribute_initial_quantity(self, product):
+    @timed("warehouse")
+    def distribute_initial_quantity(self, product, quantity=None):
         """
         Distribute the initial quantity of a product across available locations.
         
         Args:
             product (Product): The product to distribute.
+            quantity (int): Units to place, defaults to the product's full quantity.
+            
+        Returns:
+            list: (row, col, quantity) placements that were made
+        """
+        if quantity is None:
+            quantity = product.quantity
+        log.debug("Distributing %s units of %s", quantity, product.sku)  # Debug message
+        placements = self.suggest_allocation(quantity)
+        events = [StockAdjusted(product.sku, r, c, units) for r, c, units in placements]
+        quantity_to_distribute = quantity - sum(units for _, _, units in placements)
+        
+        # The plan is checked again under the location locks; if another caller
+        # filled the space first nothing is placed
+        if events and not self._commit(f"Distribute {product.sku}", events):
+            log.warning("Locations changed while distributing %s", product.sku)  # Debug message
+            return []
+        
+        if quantity_to_distribute <= 0:
+            log.debug("Finished distribution of %s", product.sku)  # Debug message
+        else:
+            log.warning("Not enough space to store the full quantity of %s. Remaining: %s", product.sku, quantity_to_distribute)  # Debug message
+        return [(event.row, event.col, event.delta) for event in events]
+
+    def suggest_allocation(self, quantity):
         """
-        DebugPrint.process(f"Distributing {product.quantity} units of {product.sku}")  # Debug message
-        quantity_to_distribute = product.quantity
-        initial_qty = quantity_to_distribute
+        Plan where units would go, filling locations with free space in grid order.
+        
+        Nothing is changed; the plan can be shown for editing and then
+        passed to assign_stock, or is committed by distribute_initial_quantity.
         
+        Args:
+            quantity (int): Units to place
+            
+        Returns:
+            list: (row, col, quantity) placements; their total is less than
+            quantity if the warehouse does not have enough space
+        """
+        placements = []
+        remaining = quantity
         for row in self.grid:
             for location in row:
-                if quantity_to_distribute <= 0:
-                    DebugPrint.success(f"Finished distribution of {product.sku}")  # Debug message
-                    return
+                if remaining <= 0:
+                    return placements
                 available_space = location.get_available_capacity()
                 if available_space > 0:
-                    quantity_to_store = min(quantity_to_distribute, available_space)
-                    location.add_product(product, quantity_to_store)
-                    quantity_to_distribute -= quantity_to_store
-                    DebugPrint.info(f"Stored {quantity_to_store} units at {location.get_location_code()}, {quantity_to_distribute} left")  # Debug message
+                    units = min(remaining, available_space)
+                    placements.append((location.row, location.col, units))
+                    remaining -= units
+        return placements
+
+    @timed("warehouse")
+    def assign_stock(self, sku, allocation, match_quantity=False):
+        """
+        Place units of a product at several locations as one operation.
+        
+        Unlike store_product, the product's quantity is not raised: the
+        units placed are ones it already counts but that have no location
+        yet, such as a new product's initial stock. The whole allocation is
+        applied, journaled, saved and undone as a single operation.
+        
+        Args:
+            sku (str): The SKU of the product
+            allocation (list): (row, col, quantity) placements
+            match_quantity (bool): Also set the product's quantity to the units
+                stored after the allocation, for units that were given no place
+            
+        Returns:
+            bool: True if every placement was made, False if nothing was changed
+        """
+        placements = [(r, c, units) for r, c, units in allocation if units]
+        if sku not in self.products or any(units < 0 for _, _, units in placements):
+            return False
+        if any(r < 0 or r >= self.rows or c < 0 or c >= self.cols for r, c, _ in placements):
+            return False
+        
+        product = self.products[sku]
+        total = sum(units for _, _, units in placements)
+        stored = self.stored_totals.get(sku, 0)
+        # Only units the product counts but has not stored yet can be placed
+        if stored + total > product.quantity:
+            log.warning("Cannot place %s units of %s, only %s are unplaced", total, sku, product.quantity - stored)  # Debug message
+            return False
+        
+        events = [StockAdjusted(sku, r, c, units) for r, c, units in placements]
+        if match_quantity and stored + total != product.quantity:
+            events.append(QuantityAdjusted(sku, stored + total - product.quantity))
+        if not events:
+            return True
+        if not self._commit(f"Assign {total} x {sku} to {len(placements)} locations", events):
+            return False
+        
+        # Save data immediately, once for the whole allocation
+        self._save(products=True, locations=True)
+        log.debug("Assigned %s units of %s to %s locations", total, sku, len(placements))  # Debug message
+        return True
+
+    @timed("warehouse")
+    def remove_stock(self, sku, quantity):
+        """
+        Remove stock of a product from its locations without changing its total.
+        
+        Used to clear excess stock when the locations hold more than the
+        product's recorded quantity.
+        
+        Args:
+            sku (str): The SKU of the product
+            quantity (int): Units to remove
+            
+        Returns:
+            list: (row, col, quantity) removals that were made
+        """
+        if sku not in self.products:
+            return []
+        remaining_to_remove = quantity
+        events = []
+        for r, c in self.find_product(sku):
+            if remaining_to_remove <= 0:
+                break
+            qty_to_remove = min(remaining_to_remove, self.grid[r][c].inventory.get(sku, 0))
+            if qty_to_remove > 0:
+                events.append(StockAdjusted(sku, r, c, -qty_to_remove))
+                remaining_to_remove -= qty_to_remove
+        
+        if events and self._commit(f"Remove {quantity - remaining_to_remove} excess x {sku}", events):
+            self._save(locations=True)
+            return [(event.row, event.col, -event.delta) for event in events]
+        return []
+
+    def plan_reconciliation(self, skus=None, excess="keep"):
+        """
+        Work out how to make product quantities match the stock held in locations.
         
-        if quantity_to_distribute > 0:
-            DebugPrint.warning(f"Not enough space to store the full quantity of {product.sku}. Remaining: {quantity_to_distribute}")  # Debug message
+        Shortfalls are stored first-fit in grid order, sharing one list of
+        free cells across all products, and excess stock is found through
+        the product's location index, so the whole plan costs one pass over
+        the products rather than a grid scan per product. Nothing is changed.
+        Callers should hold the exclusive lock so the plan stays valid.
+        
+        Args:
+            skus (iterable): Products to reconcile, None for every product
+            excess (str): How to resolve excess stock, one of EXCESS_POLICIES
+            
+        Returns:
+            ReconciliationPlan: The planned changes
+        """
+        if excess not in EXCESS_POLICIES:
+            raise ValueError(f"Unknown excess policy '{excess}'")
+        plan = ReconciliationPlan(excess)
+        free_cells = None  # [row, col, space] of cells with room, built on first shortfall
+        cursor = 0  # Cells before the cursor have been filled by the plan
+        
+        for sku in (self.products if skus is None else skus):
+            product = self.products.get(sku)
+            if product is None:
+                continue
+            stored = self.stored_totals.get(sku, 0)
+            if stored == product.quantity:
+                continue
+            plan.mismatched[sku] = (product.quantity, stored)
+            
+            if stored < product.quantity:
+                if free_cells is None:
+                    free_cells = [[location.row, location.col, location.get_available_capacity()]
+                                  for row in self.grid for location in row
+                                  if location.get_available_capacity() > 0]
+                missing = product.quantity - stored
+                placements = []
+                while missing > 0 and cursor < len(free_cells):
+                    cell = free_cells[cursor]
+                    units = min(missing, cell[2])
+                    placements.append((cell[0], cell[1], units))
+                    cell[2] -= units
+                    missing -= units
+                    if cell[2] == 0:
+                        cursor += 1
+                if placements:
+                    plan.placements[sku] = placements
+                if missing > 0:
+                    plan.unplaced[sku] = missing
+            elif excess == "remove":
+                to_remove = stored - product.quantity
+                removals = []
+                for r, c in self.find_product(sku):
+                    if to_remove <= 0:
+                        break
+                    units = min(to_remove, self.grid[r][c].inventory.get(sku, 0))
+                    if units > 0:
+                        removals.append((r, c, units))
+                        to_remove -= units
+                plan.removals[sku] = removals
+            elif excess == "update":
+                plan.quantity_changes[sku] = (product.quantity, stored)
+            else:
+                plan.excess[sku] = stored - product.quantity
+        return plan
+    
+    @timed("warehouse")
+    def reconcile(self, skus=None, excess="keep", dry_run=False):
+        """
+        Make product quantities match the stock held in locations.
+        
+        The plan is built and committed under the exclusive lock, as one
+        journaled operation that a single undo reverts, and the CSV files are
+        saved once afterwards.
+        
+        Args:
+            skus (iterable): Products to reconcile, None for every product
+            excess (str): How to resolve excess stock, one of EXCESS_POLICIES
+            dry_run (bool): Only plan, change nothing
+            
+        Returns:
+            ReconciliationPlan: The plan; its applied flag tells whether it was committed
+        """
+        with self._exclusive():
+            plan = self.plan_reconciliation(skus, excess)
+            if dry_run or not plan.has_changes:
+                return plan
+            events = plan.events()
+            if not self._commit(f"Reconcile {len(plan.mismatched)} products", events):
+                log.warning("Reconciliation of %s products could not be applied", len(plan.mismatched))  # Debug message
+                return plan
+            plan.applied = True
+        
+        # Save data once for the whole plan
+        self._save(products=bool(plan.quantity_changes), locations=bool(plan.placements or plan.removals))
+        log.debug("%s", plan)  # Debug message
+        return plan
 
+    @timed("warehouse")
     def delete_product(self, sku):
         """Remove a product and all its inventory from the warehouse."""
-        if sku not in self.products:
-            return False
-        # Remove inventory entries
-        for r in range(self.rows):
-            for c in range(self.cols):
-                loc = self.grid[r][c]
-                if sku in loc.inventory:
-                    qty = loc.inventory.pop(sku)
-                    loc.current_stock -= qty
-        # Remove from cache and products
-        self.product_locations.pop(sku, None)
-        del self.products[sku]
+        # Exclusive so no stock can be stored between reading the locations and removing them
+        with self._exclusive():
+            if sku not in self.products:
+                return False
+            if not self._commit(f"Delete product {sku}", self._delete_events(sku)):
+                return False
         # Save updated data
-        self.data_storage.save_products(self.products)
-        self.data_storage.save_locations(self.grid)
+        self._save(products=True, locations=True)
+        return True
+    
+    def _delete_events(self, sku):
+        """Build the events that remove a product, capturing its per-location quantities."""
+        events = []
+        for r, c in self.find_product(sku):
+            qty = self.grid[r][c].inventory.get(sku, 0)
+            if qty > 0:
+                events.append(StockAdjusted(sku, r, c, -qty))
+        product = self.products[sku]
+        events.append(ProductRemoved(sku, product.name, product.price, product.quantity))
+        return events
+
+    @timed("warehouse")
+    def undo(self):
+        """
+        Undo the most recent operation.
+        
+        Returns:
+            str: Description of the undone operation, or None if nothing to undo
+        """
+        with self.locks.history:
+            if not self.history.can_undo():
+                return None
+            operation = self.history.undo_stack.pop()
+        log.debug("Undoing: %s", operation.description)  # Debug message
+        if not self._execute(operation.inverse_events()):
+            # State no longer allows the inverse; keep the operation where it was
+            with self.locks.history:
+                self.history.undo_stack.append(operation)
+            return None
+        with self.locks.history:
+            self.history.redo_stack.append(operation)
+        self._save(products=True, locations=True)
+        return operation.description
+    
+    @timed("warehouse")
+    def redo(self):
+        """
+        Re-apply the most recently undone operation.
+        
+        Returns:
+            str: Description of the redone operation, or None if nothing to redo
+        """
+        with self.locks.history:
+            if not self.history.can_redo():
+                return None
+            operation = self.history.redo_stack.pop()
+        log.debug("Redoing: %s", operation.description)  # Debug message
+        if not self._execute(operation.replay_events()):
+            with self.locks.history:
+                self.history.redo_stack.append(operation)
+            return None
+        with self.locks.history:
+            self.history.undo_stack.append(operation)
+        self._save(products=True, locations=True)
+        return operation.description
+    
+    def _commit(self, description, events):
+        """
+        Apply a list of events as one operation, record it for undo and journal it.
+        
+        Args:
+            description (str): Human readable summary of the operation
+            events (list): InventoryEvent objects to apply in order
+            
+        Returns:
+            bool: True if every event applied, False if nothing was changed
+        """
+        if not self._execute(events):
+            return False
+        with self.locks.history:
+            self.history.record(Operation(description, events))
         return True
+    
+    def _execute(self, events):
+        """
+        Apply and journal events atomically, then notify subscribers.
+        
+        Inside an _exclusive section the notifications wait until the
+        section ends, so subscribers never run under the catalog lock.
+        
+        Only the products and locations the events touch are locked, so
+        operations on unrelated stock run in parallel. Journaling happens
+        under the same locks, which keeps the journal order consistent with
+        the order conflicting operations were applied in.
+        
+        When another process sharing the data directory has changed the same
+        products or locations, the journal refuses the append; the events are
+        reverted, the other process's changes merged, and the operation
+        retried against the fresh state.
+        
+        Returns:
+            bool: True if every event applied, False if nothing was changed
+        """
+        journal = self.data_storage.journal
+        for attempt in range(self.MERGE_RETRIES):
+            with self.locks.for_events(events):
+                if not self._apply_events(events):
+                    return False
+                if journal.append(events):
+                    break
+                self._revert_events(events)
+            log.warning("Another process changed the same stock, merging and retrying")  # Debug message
+            self._merge_pending()
+        else:
+            log.error("Giving up after repeated conflicts with other processes")  # Debug message
+            return False
+        
+        # Subscribers and checkpoints run after this operation's locks are released;
+        # a caller's exclusive section holds the notifications back until it ends
+        self._notify(events)
+        
+        # Bring in unrelated changes other processes made while this one was appending
+        self._merge_pending()
+        self._maybe_checkpoint()
+        return True
+    
+    @timed("warehouse")
+    def sync(self):
+        """
+        Merge changes made by other processes sharing the data directory.
+        
+        Only the journal events written since this process last looked are
+        read and applied, so a stale copy is brought up to date without a
+        full reload. Views are told about the merged changes as usual.
+        
+        Returns:
+            int: Number of events merged
+        """
+        self.data_storage.journal.refresh()
+        return self._merge_pending()
+    
+    def _merge_pending(self):
+        """Apply events other processes journaled that this process has not applied yet."""
+        journal = self.data_storage.journal
+        if not journal.unapplied:
+            return 0
+        with self.locks.exclusive():
+            pending = journal.pending()
+            applied = []
+            for event in pending:
+                if self._apply_event(event):
+                    applied.append(event)
+                else:
+                    log.warning("Could not merge event %s from another process: %r", event.seq, event)  # Debug message
+            journal.mark_applied(len(pending))
+        if applied:
+            log.debug("Merged %s events from other processes", len(applied))  # Debug message
+            self._notify(applied)
+        return len(applied)
+    
+    def _maybe_checkpoint(self):
+        """Write a checkpoint once enough events have been journaled since the last one."""
+        journal = self.data_storage.journal
+        if journal.needs_checkpoint():
+            with self._exclusive():
+                # Another caller may have written it while this one waited
+                if journal.needs_checkpoint():
+                    self.checkpoint()
+    
+    @contextmanager
+    def _exclusive(self):
+        """
+        Hold the catalog exclusively for an operation that commits events.
+        
+        Change notifications raised meanwhile are published once the
+        outermost section has released the lock, so subscribers can take
+        locks of their own and see the operation's finished state.
+        """
+        state = self._exclusive_state
+        depth = getattr(state, "depth", 0)
+        if not depth:
+            state.deferred = []
+        state.depth = depth + 1
+        try:
+            with self.locks.exclusive():
+                yield
+        finally:
+            state.depth = depth
+            if not depth:
+                deferred, state.deferred = state.deferred, []
+                for events in deferred:
+                    self._notify(events)
+    
+    def _notify(self, events):
+        """Publish change notifications summarising a group of applied events."""
+        state = self._exclusive_state
+        if getattr(state, "depth", 0):
+            state.deferred.append(events)
+            return
+        added = []
+        changed = []
+        deleted = []
+        cells = {}  # Maps SKU to the set of (row, col) cells whose stock changed
+        for event in events:
+            if isinstance(event, StockAdjusted):
+                cells.setdefault(event.sku, set()).add((event.row, event.col))
+            elif isinstance(event, ProductAdded):
+                added.append(event.sku)
+            elif isinstance(event, ProductRemoved):
+                deleted.append(event.sku)
+            elif event.sku not in changed:
+                changed.append(event.sku)
+        
+        for sku in added:
+            self.bus.publish(WarehouseChange("product_added", sku))
+        for sku, sku_cells in cells.items():
+            self.bus.publish(WarehouseChange("location_changed", sku, sku_cells))
+        for sku in changed:
+            if sku not in deleted:
+                self.bus.publish(WarehouseChange("product_changed", sku))
+        for sku in deleted:
+            self.bus.publish(WarehouseChange("product_deleted", sku, cells.get(sku, ())))
+    
+    def _apply_events(self, events):
+        """Apply events in order, rolling back the applied ones if any fails."""
+        applied = []
+        for event in events:
+            if not self._apply_event(event):
+                self._revert_events(applied)
+                return False
+            applied.append(event)
+        return True
+    
+    def _revert_events(self, events):
+        """Undo already applied events by applying their inverses in reverse order."""
+        for event in reversed(events):
+            self._apply_event(event.inverse())
+    
+    def _apply_event(self, event):
+        """
+        Apply a single inventory event to the warehouse state.
+        
+        Args:
+            event (InventoryEvent): The event to apply
+            
+        Returns:
+            bool: True if the event was applied, False if it was not valid
+        """
+        sku = event.sku
+        if isinstance(event, StockAdjusted):
+            if sku not in self.products:
+                return False
+            if event.row < 0 or event.row >= self.rows or event.col < 0 or event.col >= self.cols:
+                return False
+            location = self.grid[event.row][event.col]
+            if event.delta >= 0:
+                ok = location.add_product(self.products[sku], event.delta)
+            else:
+                ok = location.remove_product(sku, -event.delta)
+            if ok:
+                self._update_location_cache(sku, event.row, event.col)
+                self.stored_totals[sku] = self.stored_totals.get(sku, 0) + event.delta
+            return ok
+        if isinstance(event, QuantityAdjusted):
+            if sku not in self.products or not self.products[sku].update_quantity(event.delta):
+                return False
+            with self.locks.index:
+                self.index.update(self.products[sku])
+            return True
+        if isinstance(event, ProductAdded):
+            if sku in self.products:
+                return False
+            self.products[sku] = Product(event.name, sku, event.price, event.quantity)
+            self.product_locations[sku] = []
+            self.stored_totals[sku] = 0
+            with self.locks.index:
+                self.index.add(self.products[sku])
+                self.name_index.add(self.products[sku])
+            return True
+        if isinstance(event, ProductRemoved):
+            # Stock must be cleared first (delete events do that), never left orphaned
+            if sku not in self.products or self.product_locations.get(sku):
+                return False
+            self.product_locations.pop(sku, None)
+            self.stored_totals.pop(sku, None)
+            del self.products[sku]
+            with self.locks.index:
+                self.index.remove(sku)
+                self.name_index.remove(sku)
+            return True
+        if isinstance(event, ProductUpdated):
+            if sku not in self.products:
+                return False
+            for field, value in event.new.items():
+                setattr(self.products[sku], field, value)
+            with self.locks.index:
+                self.index.update(self.products[sku])
+                self.name_index.update(self.products[sku])
+            return True
+        return False
+    
+    def _update_location_cache(self, sku, row, col):
+        """Keep product_locations in step with one location's inventory."""
+        cached = self.product_locations.setdefault(sku, [])
+        if sku in self.grid[row][col].inventory:
+            if (row, col) not in cached:
+                cached.append((row, col))
+        elif (row, col) in cached:
+            cached.remove((row, col))
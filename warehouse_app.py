@@ -1,16 +1,27 @@
+import time
 import tkinter as tk
-from tkinter import ttk, simpledialog, messagebox
+from tkinter import ttk, simpledialog, messagebox, filedialog
 from warehouse import Warehouse
 from views.dashboard_view import DashboardView
 from views.product_view import ProductView
 from views.log_view import LogView
 from views.settings_dialog import SettingsDialog  # Add this import statement
+from utils.logging_utils import get_logger
+from utils.metrics import REGISTRY
+
+log = get_logger(__name__)
 
 class WarehouseApp:
     """Main application class for the Warehouse Inventory Management System GUI."""
     
     def __init__(self, root, user):
         """Initialize the application with the root window."""
+        # Startup timing, reported once the window is drawn and once the data is loaded
+        self.start_time = time.perf_counter()
+        self.first_paint_ms = None
+        self.loading = True
+        self.load_failed = False  # Set if loading failed; nothing is saved then
+        
         self.root = root
         self.user = user
         self.root.title("Warehouse Inventory Management System")
@@ -25,12 +36,19 @@ class WarehouseApp:
         # Create main interface
         self.create_widgets()
         
+        # Show the window straight away and load the data in the background
+        self.show_loading()
+        self.root.after_idle(self._on_first_paint)
+        self.load_future = self.warehouse.load_data_async()
+        self.root.after(50, self._check_loading)
+        
+        # Keyboard shortcuts for undo/redo
+        self.root.bind_all("<Control-z>", lambda event: self.undo())
+        self.root.bind_all("<Control-y>", lambda event: self.redo())
+        
         # Set up window close event handler
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
-        # Set up auto-save timer (every 5 minutes)
-        self._setup_auto_save()
-        
         # Center the application window on the screen
         self.center_window()
         
@@ -43,6 +61,85 @@ class WarehouseApp:
         y = (self.root.winfo_screenheight() // 2) - (height // 2)
         self.root.geometry(f'{width}x{height}+{x}+{y}')
         
+    def show_loading(self):
+        """Cover the tabs with a loading indicator and show a status bar."""
+        self.status_var = tk.StringVar(value="Loading warehouse data...")
+        ttk.Label(self.root, textvariable=self.status_var, anchor=tk.W,
+                  relief=tk.SUNKEN).pack(side=tk.BOTTOM, fill=tk.X)
+        
+        # The overlay also keeps clicks away from the views until they have data
+        self.loading_overlay = ttk.Frame(self.root)
+        self.loading_overlay.place(in_=self.notebook, relx=0, rely=0, relwidth=1, relheight=1)
+        ttk.Label(self.loading_overlay, text="Loading warehouse data...",
+                  font=("Arial", 14)).place(relx=0.5, rely=0.45, anchor=tk.CENTER)
+        progress = ttk.Progressbar(self.loading_overlay, mode="indeterminate", length=200)
+        progress.place(relx=0.5, rely=0.55, anchor=tk.CENTER)
+        progress.start(10)
+    
+    def _on_first_paint(self):
+        """Record how long it took for the window to be drawn."""
+        self.first_paint_ms = (time.perf_counter() - self.start_time) * 1000
+        log.info("Time to first paint: %.0f ms", self.first_paint_ms)
+    
+    def _check_loading(self):
+        """Poll the background load and finish startup once it is done."""
+        if not self.load_future.done():
+            self.root.after(50, self._check_loading)
+            return
+        
+        loaded_ms = (time.perf_counter() - self.start_time) * 1000
+        try:
+            self.load_future.result()
+        except Exception as e:
+            # Saving now would overwrite the files with an empty warehouse, so saves
+            # stay blocked and the overlay keeps the views from being edited
+            self.load_failed = True
+            self.loading = False
+            log.error("Error loading warehouse data: %s", e)
+            for widget in self.loading_overlay.winfo_children():
+                widget.destroy()
+            ttk.Label(self.loading_overlay, text="Warehouse data could not be loaded.\nNothing will be saved.",
+                      font=("Arial", 14), justify=tk.CENTER).place(relx=0.5, rely=0.5, anchor=tk.CENTER)
+            messagebox.showerror("Load Error", f"Warehouse data could not be loaded:\n{e}")
+            self.status_var.set("Warehouse data could not be loaded")
+            return
+        self.loading = False
+        self.loading_overlay.destroy()
+        
+        # The views fill themselves in from the warehouse_reloaded notification
+        first_paint = f"{self.first_paint_ms:.0f} ms" if self.first_paint_ms is not None else "n/a"
+        self.status_var.set(f"Loaded {len(self.warehouse.products)} products in {loaded_ms:.0f} ms "
+                            f"(window shown after {first_paint})")
+        log.info("Warehouse data ready after %.0f ms", loaded_ms)
+
+        # Tell the user if recovery or the integrity check had to drop or repair anything
+        report = self.warehouse.integrity_report
+        if report is not None and (report.recovered or report.dropped or "corrupt" in report.snapshots.values()):
+            messagebox.showwarning("Data Recovery", f"{report.summary()}.\n\nSee the log for details.")
+
+        # Background saving and syncing only start once there is data to save
+        self._setup_auto_save()
+        self._setup_shared_sync()
+    
+    def save_data(self):
+        """Save the warehouse, unless it is still loading or failed to load and there is nothing to save."""
+        if self.loading or self.load_failed:
+            return
+        self.warehouse.save_data(force=True)
+    
+    def export_metrics(self):
+        """Write the operation counts, latencies and queue depths to a file."""
+        path = filedialog.asksaveasfilename(
+            parent=self.root, title="Export Metrics", defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("Prometheus text", "*.prom")])
+        if not path:
+            return
+        try:
+            REGISTRY.dump(path)
+            self.log(f"Exported metrics to {path}")
+        except OSError as e:
+            messagebox.showerror("Export Failed", f"Could not write {path}:\n{e}")
+    
     def _setup_auto_save(self):
         """Setup periodic auto-save to prevent data loss without hurting performance."""
         def auto_save():
@@ -53,17 +150,26 @@ class WarehouseApp:
         # Initial scheduling
         self.root.after(300000, auto_save)
         
+    def _setup_shared_sync(self):
+        """Periodically merge changes other processes wrote to the shared data folder."""
+        def sync():
+            merged = self.warehouse.sync()
+            if merged:
+                self.log(f"Merged {merged} changes from another station")
+            # Check again every 2 seconds; views update through the change notifications
+            self.root.after(2000, sync)
+        
+        self.root.after(2000, sync)
+        
     def setup_warehouse(self):
         """Set up the warehouse using saved dimensions or prompt on first run."""
-        # Create a temporary data storage to load settings
+        # Read the settings file only; the warehouse's own storage opens the journal
         from data_storage import DataStorage
-        data_storage = DataStorage()
-        
-        # Load settings
-        settings = data_storage.load_settings()
+        settings = DataStorage.read_settings()
         
         # Check if this is the first run
-        if settings["first_run"]:
+        first_run = settings["first_run"]
+        if first_run:
             # Prompt for warehouse dimensions
             rows = simpledialog.askinteger(
                 "Warehouse Setup", 
@@ -89,21 +195,21 @@ class WarehouseApp:
             settings["warehouse_rows"] = rows
             settings["warehouse_cols"] = cols
             settings["first_run"] = False
-            
-            # Save settings
-            data_storage.save_settings(settings)
         else:
             rows = settings["warehouse_rows"]
             cols = settings["warehouse_cols"]
             
         # Create the warehouse with the dimensions from settings
         self.warehouse = Warehouse(rows, cols)
+        
+        if first_run:
+            # Save settings through the warehouse's storage
+            self.warehouse.data_storage.save_settings(settings)
+            
         # Tag warehouse with current user for view-side logging
         self.warehouse.user = self.user
         
-        # Try to load previously saved data
-        if self.warehouse.load_data():
-            messagebox.showinfo("Data Loaded", "Previous warehouse data has been loaded successfully.")
+        # Saved data is loaded in the background once the window is up, see _check_loading
         
     def create_widgets(self):
         """Create all the widgets for the main interface."""
@@ -123,7 +229,7 @@ class WarehouseApp:
         
         # Setup each tab with its view class
         self.dashboard_view = DashboardView(self.dashboard_frame, self.warehouse)
-        self.product_view = ProductView(self.products_frame, self.warehouse, self.dashboard_view.refresh_warehouse_view)
+        self.product_view = ProductView(self.products_frame, self.warehouse)
         
         # Set up tab change event to avoid unnecessary refreshes
         self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
@@ -137,11 +243,18 @@ class WarehouseApp:
         
         # File menu
         file_menu = tk.Menu(menubar, tearoff=0)
-        file_menu.add_command(label="Save Data", command=lambda: self.warehouse.save_data(force=True))
+        file_menu.add_command(label="Save Data", command=self.save_data)
+        file_menu.add_command(label="Export Metrics...", command=self.export_metrics)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.on_closing)
         menubar.add_cascade(label="File", menu=file_menu)
         
+        # Edit menu
+        edit_menu = tk.Menu(menubar, tearoff=0)
+        edit_menu.add_command(label="Undo", accelerator="Ctrl+Z", command=self.undo)
+        edit_menu.add_command(label="Redo", accelerator="Ctrl+Y", command=self.redo)
+        menubar.add_cascade(label="Edit", menu=edit_menu)
+        
         # Settings menu
         settings_menu = tk.Menu(menubar, tearoff=0)
         settings_menu.add_command(label="Warehouse Configuration", command=self.open_settings)
@@ -159,6 +272,20 @@ class WarehouseApp:
         
         self.root.config(menu=menubar)
     
+    def undo(self):
+        """Undo the last warehouse operation; the views update through change notifications."""
+        description = self.warehouse.undo()
+        if description is None:
+            return
+        self.log(f"Undid: {description}")
+    
+    def redo(self):
+        """Redo the last undone warehouse operation."""
+        description = self.warehouse.redo()
+        if description is None:
+            return
+        self.log(f"Redid: {description}")
+    
     def open_settings(self):
         """Open the settings dialog."""
         dialog = SettingsDialog(self.root, self.warehouse)
@@ -216,18 +343,34 @@ class WarehouseApp:
             if selected_tab == 0 and previous_tab != 0:  # Dashboard tab
                 self.dashboard_view.refresh_warehouse_view()
             elif selected_tab == 1 and previous_tab != 1:  # Products tab
-                self.product_view.refresh_product_list()
+                # Rows are kept in order by change notifications, so only the visible ones are redrawn
+                self.product_view.product_list.render()
         except (tk.TclError, Exception) as e:
-            print(f"DEBUG: Error during tab change: {e}")
+            log.error("Error during tab change: %s", e)
             # Tab change might happen during refresh operations, just ignore errors
             pass
         
     def on_closing(self, restart=False):
         """Handle window closing event - save data before exit."""
         self.log("Exited application")
-        # Save the current warehouse state
-        self.warehouse.save_data(force=True)
-        messagebox.showinfo("Data Saved", "Warehouse data has been saved successfully.")
+        # Stop background tasks at their next check, so nothing changes while saving
+        runner = getattr(self.root, "_task_runner", None)
+        if runner is not None:
+            runner.shutdown(wait=True)
+        # Save the current warehouse state, waiting for a load still in progress so it is not lost
+        if self.loading:
+            try:
+                self.load_future.result()
+            except Exception as e:
+                log.error("Error loading warehouse data: %s", e)
+                self.load_failed = True
+            self.loading = False
+        if self.load_failed:
+            # The files on disk are the only good copy, leave them untouched
+            log.warning("Not saving, the warehouse data was never loaded")
+        else:
+            self.warehouse.save_data(force=True)
+            messagebox.showinfo("Data Saved", "Warehouse data has been saved successfully.")
         
         self.root.destroy()
         
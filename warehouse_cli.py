@@ -0,0 +1,464 @@
+import argparse
+import csv
+import getpass
+import json
+import shlex
+import sys
+from product import Product
+from warehouse import Warehouse
+from reconciliation import EXCESS_POLICIES
+from data_storage import DataStorage
+from utils.logging_utils import configure_logging
+from utils.metrics import REGISTRY
+
+class CommandFailed(Exception):
+    """Raised by a subcommand when the request is invalid or the warehouse rejects it."""
+
+
+class _LineParser(argparse.ArgumentParser):
+    """Argument parser for batch file lines: errors fail the line instead of exiting."""
+
+    def __init__(self, *args, **kwargs):
+        # Subcommand parsers are made with this class too; -h would print usage and exit mid-batch
+        kwargs["add_help"] = False
+        super().__init__(*args, **kwargs)
+
+    def error(self, message):
+        raise CommandFailed(message)
+
+
+def parse_location(text, warehouse):
+    """
+    Parse a location given as a location code ("B3") or as zero-indexed "row,col".
+
+    Args:
+        text (str): The location as typed
+        warehouse (Warehouse): Warehouse whose grid the location must be in
+
+    Returns:
+        tuple: (row, col)
+    """
+    text = text.strip()
+    try:
+        if "," in text:
+            row, col = (int(part) for part in text.split(","))
+        else:
+            row, col = ord(text[0].upper()) - 65, int(text[1:]) - 1
+    except (ValueError, IndexError):
+        raise CommandFailed(f"Invalid location '{text}', use a code like B3 or row,col")
+    if row < 0 or row >= warehouse.rows or col < 0 or col >= warehouse.cols:
+        raise CommandFailed(f"Location '{text}' is outside the {warehouse.rows}x{warehouse.cols} warehouse")
+    return row, col
+
+
+def _add_commands(parser):
+    """Add the subcommands shared by the command line and batch files."""
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    store = commands.add_parser("store", help="Store stock of a product at a location")
+    store.add_argument("sku")
+    store.add_argument("quantity", type=int)
+    store.add_argument("location", help="Location code (B3) or zero-indexed row,col")
+
+    retrieve = commands.add_parser("retrieve", help="Retrieve stock of a product")
+    retrieve.add_argument("sku")
+    retrieve.add_argument("quantity", type=int)
+    retrieve.add_argument("location", nargs="?",
+                          help="Location to take the stock from (default: wherever it is stored)")
+
+    find = commands.add_parser("find", help="Find products by SKU, or by name with fuzzy matching")
+    find.add_argument("query")
+    find.add_argument("--limit", type=int, default=10)
+    find.add_argument("--json", action="store_true", help="Print JSON instead of text")
+
+    import_ = commands.add_parser("import", help="Add or update products from a CSV file")
+    import_.add_argument("file", help="CSV with sku,name,price,quantity columns ('-' for stdin)")
+
+    export = commands.add_parser("export", help="Write products or location stock as CSV")
+    export.add_argument("kind", choices=["products", "locations"])
+    export.add_argument("-o", "--output", default="-", help="File to write (default: stdout)")
+
+    report = commands.add_parser("report", help="Summarize stock, value and capacity")
+    report.add_argument("--low-stock", type=int, metavar="N",
+                        help="Also list products with N or fewer units")
+    report.add_argument("--json", action="store_true", help="Print JSON instead of text")
+
+    check = commands.add_parser("check", help="Show what startup recovery and the integrity check found")
+    check.add_argument("--json", action="store_true", help="Print JSON instead of text")
+
+    reconcile = commands.add_parser("reconcile", help="Make product quantities match the stock held in locations")
+    reconcile.add_argument("skus", nargs="*", metavar="sku", help="Products to reconcile (default: all)")
+    reconcile.add_argument("--excess", choices=EXCESS_POLICIES, default="keep",
+                           help="Leave excess stock for review, remove it, or update the quantity (default: keep)")
+    reconcile.add_argument("--dry-run", action="store_true", help="Only show the plan, change nothing")
+    reconcile.add_argument("--json", action="store_true", help="Print JSON instead of text")
+    return commands
+
+
+def build_parser():
+    """Build the command line parser."""
+    parser = argparse.ArgumentParser(
+        prog="warehouse_cli.py",
+        description="Run warehouse operations without the GUI, e.g. from cron jobs and scripts.")
+    parser.add_argument("--data-dir", default="data", help="Warehouse data directory (default: data)")
+    parser.add_argument("--user", help="User name recorded in the activity log")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Run one command per line from FILE ('-' for stdin) with a single load and save")
+    parser.add_argument("--verbose", action="store_true", help="Show debug messages")
+    parser.add_argument("--durability", choices=["fast", "group", "strict"],
+                        help="How writes are forced to disk (default: the saved setting)")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="Write operation counts and latencies to FILE when done "
+                             "(.prom or .txt for Prometheus text, otherwise JSON)")
+    _add_commands(parser)
+    return parser
+
+
+def build_line_parser():
+    """Build the parser used for each line of a batch file."""
+    parser = _LineParser(prog="batch line")
+    _add_commands(parser)
+    return parser
+
+
+def cmd_store(warehouse, args, out):
+    """Store stock at a location."""
+    row, col = parse_location(args.location, warehouse)
+    if not warehouse.store_product(args.sku, args.quantity, row, col):
+        raise CommandFailed(f"Could not store {args.quantity} x {args.sku} at {args.location}")
+    print(f"Stored {args.quantity} x {args.sku} at {warehouse.grid[row][col].get_location_code()}", file=out)
+
+
+def cmd_retrieve(warehouse, args, out):
+    """Retrieve stock from a location, or from wherever the product is stored."""
+    if args.location is not None:
+        row, col = parse_location(args.location, warehouse)
+        if not warehouse.retrieve_product(args.sku, args.quantity, row, col):
+            raise CommandFailed(f"Could not retrieve {args.quantity} x {args.sku} from {args.location}")
+        print(f"Retrieved {args.quantity} x {args.sku} from {warehouse.grid[row][col].get_location_code()}", file=out)
+        return
+
+    # Take the stock location by location so the product total drops with it
+    stored = sum(warehouse.grid[r][c].inventory.get(args.sku, 0) for r, c in warehouse.find_product(args.sku))
+    if args.sku not in warehouse.products or args.quantity <= 0 or stored < args.quantity:
+        raise CommandFailed(f"Could not retrieve {args.quantity} x {args.sku}, {stored} stored")
+    remaining = args.quantity
+    with warehouse.batch():
+        for r, c in warehouse.find_product(args.sku):
+            take = min(remaining, warehouse.grid[r][c].inventory.get(args.sku, 0))
+            if take > 0 and warehouse.retrieve_product(args.sku, take, r, c):
+                print(f"Retrieved {take} x {args.sku} from {warehouse.grid[r][c].get_location_code()}", file=out)
+                remaining -= take
+            if remaining == 0:
+                break
+    if remaining:
+        raise CommandFailed(f"Only retrieved {args.quantity - remaining} of {args.quantity} x {args.sku}")
+
+
+def cmd_find(warehouse, args, out):
+    """Print matching products with the locations holding them."""
+    if args.query in warehouse.products:
+        products = [warehouse.products[args.query]]
+    else:
+        products = warehouse.search_products(args.query, limit=args.limit)
+    if not products:
+        raise CommandFailed(f"No products match '{args.query}'")
+
+    results = []
+    for product in products:
+        locations = []
+        for r, c in warehouse.find_product(product.sku):
+            location = warehouse.grid[r][c]
+            locations.append({"location": location.get_location_code(), "row": r, "col": c,
+                              "quantity": location.inventory.get(product.sku, 0)})
+        results.append({"sku": product.sku, "name": product.name, "price": product.price,
+                        "quantity": product.quantity, "locations": locations})
+
+    if args.json:
+        print(json.dumps(results, indent=2), file=out)
+        return
+    for result in results:
+        placed = ", ".join(f"{l['location']}:{l['quantity']}" for l in result["locations"]) or "not stored"
+        print(f"{result['sku']}  {result['name']}  ${result['price']:.2f}  qty {result['quantity']}  [{placed}]",
+              file=out)
+
+
+def cmd_import(warehouse, args, out):
+    """Add new products and update existing ones from a CSV file."""
+    source = sys.stdin if args.file == "-" else _open(args.file, "r")
+    added = updated = skipped = 0
+    try:
+        with warehouse.batch():
+            for number, row in enumerate(csv.DictReader(source), start=2):
+                try:
+                    sku = row["sku"].strip()
+                    name = row["name"].strip()
+                    price = float(row["price"])
+                    quantity = int(row.get("quantity") or 0)
+                except (KeyError, AttributeError, TypeError, ValueError):
+                    print(f"{args.file}:{number}: skipped unreadable row", file=sys.stderr)
+                    skipped += 1
+                    continue
+                if not sku or price < 0 or quantity < 0:
+                    print(f"{args.file}:{number}: skipped invalid row", file=sys.stderr)
+                    skipped += 1
+                elif sku in warehouse.products:
+                    if warehouse.update_product(sku, name=name, price=price, quantity=quantity):
+                        updated += 1
+                    else:
+                        skipped += 1
+                elif warehouse.add_product(Product(name, sku, price, quantity)):
+                    added += 1
+                else:
+                    skipped += 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    print(f"Imported {args.file}: {added} added, {updated} updated, {skipped} skipped", file=out)
+
+
+def cmd_export(warehouse, args, out):
+    """Write products or location stock as CSV."""
+    target = out if args.output == "-" else _open(args.output, "w", newline="")
+    try:
+        writer = csv.writer(target)
+        # Exclusive so the export is a consistent cut of the warehouse
+        with warehouse.locks.exclusive():
+            if args.kind == "products":
+                writer.writerow(["sku", "name", "price", "quantity"])
+                for product in warehouse.products.values():
+                    writer.writerow([product.sku, product.name, product.price, product.quantity])
+            else:
+                writer.writerow(["row", "col", "location", "sku", "quantity"])
+                for row in warehouse.grid:
+                    for location in row:
+                        for sku, quantity in location.inventory.items():
+                            writer.writerow([location.row, location.col, location.get_location_code(), sku, quantity])
+    finally:
+        if target is not out:
+            target.close()
+
+
+def cmd_report(warehouse, args, out):
+    """Print stock, value and capacity totals."""
+    with warehouse.locks.exclusive():
+        # Stored units of every product are maintained by the warehouse
+        stored = warehouse.stored_totals
+        used_locations = 0
+        used_capacity = 0
+        total_capacity = 0
+        for row in warehouse.grid:
+            for location in row:
+                total_capacity += location.capacity
+                used_capacity += location.current_stock
+                if location.current_stock:
+                    used_locations += 1
+
+        products = list(warehouse.products.values())
+        report = {
+            "products": len(products),
+            "total_units": sum(product.quantity for product in products),
+            "stored_units": sum(stored.values()),
+            "unplaced_units": sum(max(0, product.quantity - stored.get(product.sku, 0)) for product in products),
+            "mismatched_products": sum(1 for product in products if stored.get(product.sku, 0) != product.quantity),
+            "inventory_value": round(sum(product.price * product.quantity for product in products), 2),
+            "locations_used": used_locations,
+            "locations_total": warehouse.rows * warehouse.cols,
+            "capacity_used_percent": round(100 * used_capacity / total_capacity, 1) if total_capacity else 0.0,
+        }
+        if args.low_stock is not None:
+            report["low_stock"] = [{"sku": product.sku, "name": product.name, "quantity": product.quantity}
+                                   for product in sorted(products, key=lambda p: (p.quantity, p.sku))
+                                   if product.quantity <= args.low_stock]
+
+    if args.json:
+        print(json.dumps(report, indent=2), file=out)
+        return
+    print(f"Products:            {report['products']}", file=out)
+    print(f"Total units:         {report['total_units']}", file=out)
+    print(f"Stored units:        {report['stored_units']}", file=out)
+    print(f"Unplaced units:      {report['unplaced_units']}", file=out)
+    print(f"Mismatched products: {report['mismatched_products']}", file=out)
+    print(f"Inventory value:     ${report['inventory_value']:,.2f}", file=out)
+    print(f"Locations used:      {report['locations_used']}/{report['locations_total']}", file=out)
+    print(f"Capacity used:       {report['capacity_used_percent']}%", file=out)
+    if args.low_stock is not None:
+        print(f"Products with {args.low_stock} or fewer units:", file=out)
+        for product in report["low_stock"]:
+            print(f"  {product['sku']}  {product['name']}  qty {product['quantity']}", file=out)
+
+
+def cmd_check(warehouse, args, out):
+    """Print the integrity report of the last load; fails if it found problems."""
+    report = warehouse.integrity_report
+    if report is None:
+        raise CommandFailed("no data has been loaded")
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2), file=out)
+    else:
+        print(str(report), file=out)
+        for action in report.recovered:
+            print(f"  {action}", file=out)
+        for name, status in sorted(report.snapshots.items()):
+            print(f"  {name}: {status}", file=out)
+        for reason, count in sorted(report.dropped.items()):
+            print(f"  dropped {count} rows: {reason.replace('_', ' ')}", file=out)
+        for sku, (quantity, stored) in sorted(report.mismatched.items()):
+            print(f"  {sku}: quantity {quantity}, stored {stored}", file=out)
+    if not report.ok:
+        raise CommandFailed("integrity problems found")
+
+
+def cmd_reconcile(warehouse, args, out):
+    """Plan and apply the changes that make quantities match stored stock."""
+    unknown = [sku for sku in args.skus if sku not in warehouse.products]
+    if unknown:
+        raise CommandFailed(f"Unknown SKU {', '.join(unknown)}")
+    plan = warehouse.reconcile(args.skus or None, excess=args.excess, dry_run=args.dry_run)
+    if plan.has_changes and not args.dry_run and not plan.applied:
+        raise CommandFailed("the plan could not be applied, nothing was changed")
+    if args.json:
+        print(json.dumps(plan.to_dict(), indent=2), file=out)
+        return
+    print(f"{str(plan)}{' (dry run)' if args.dry_run else ''}", file=out)
+    for line in plan.report_lines(warehouse):
+        print(f"  {line}", file=out)
+
+
+COMMANDS = {
+    "store": cmd_store,
+    "retrieve": cmd_retrieve,
+    "find": cmd_find,
+    "import": cmd_import,
+    "export": cmd_export,
+    "report": cmd_report,
+    "check": cmd_check,
+    "reconcile": cmd_reconcile,
+}
+
+
+def _open(path, mode, newline=None):
+    """Open a file named on the command line, turning errors into CommandFailed."""
+    try:
+        return open(path, mode, newline=newline)
+    except OSError as e:
+        raise CommandFailed(f"Cannot open {path}: {e.strerror}")
+
+
+def run_command(warehouse, args, out=sys.stdout):
+    """
+    Run one parsed subcommand against a loaded warehouse.
+
+    Raises:
+        CommandFailed: If the request is invalid or the warehouse rejects it
+    """
+    COMMANDS[args.command](warehouse, args, out)
+
+
+def run_batch(warehouse, lines, out=sys.stdout, err=sys.stderr):
+    """
+    Run one subcommand per line inside a single warehouse batch.
+
+    Blank lines and lines starting with # are ignored. A failed line is
+    reported with its line number and the rest still run. The CSV files are
+    written once, when the batch ends.
+
+    Args:
+        warehouse (Warehouse): A loaded warehouse
+        lines (iterable): Command lines, e.g. an open file
+
+    Returns:
+        tuple: (commands run, commands failed)
+    """
+    parser = build_line_parser()
+    count = 0
+    failures = 0
+    with warehouse.batch():
+        for number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            count += 1
+            try:
+                args = parser.parse_args(shlex.split(line))
+                if args.command is None:
+                    raise CommandFailed("missing command")
+                run_command(warehouse, args, out)
+            except (CommandFailed, ValueError) as e:
+                failures += 1
+                print(f"line {number}: {e}", file=err)
+    return count, failures
+
+
+def main(argv=None):
+    """
+    Run the command line interface.
+
+    Returns:
+        int: Exit status, 0 on success, 1 if a command failed, 2 on usage errors
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None and args.batch is None:
+        parser.print_usage(sys.stderr)
+        return 2
+    if args.command is not None and args.batch is not None:
+        parser.error("give either a command or --batch, not both")
+
+    # Log output goes to stderr, so stdout stays clean for scripts
+    configure_logging("DEBUG" if args.verbose else None)
+    user = args.user or _default_user()
+
+    # Load once, using the dimensions the GUI was set up with
+    settings = DataStorage.read_settings(args.data_dir)
+    warehouse = Warehouse(settings["warehouse_rows"], settings["warehouse_cols"], args.data_dir)
+    warehouse.user = user
+    if args.durability:
+        warehouse.data_storage.durability.mode = args.durability
+    warehouse.load_data()
+
+    status = _run(args, argv, warehouse, user)
+    if args.metrics:
+        # Include the background CSV and log writes in the figures
+        warehouse.data_storage.wait_for_saves()
+        REGISTRY.dump(args.metrics)
+    return status
+
+
+def _run(args, argv, warehouse, user):
+    """Run the batch file or the single command given on the command line."""
+    storage = warehouse.data_storage
+    if args.batch is not None:
+        try:
+            lines = sys.stdin if args.batch == "-" else _open(args.batch, "r")
+        except CommandFailed as e:
+            print(e, file=sys.stderr)
+            return 1
+        try:
+            count, failures = run_batch(warehouse, lines)
+        finally:
+            if lines is not sys.stdin:
+                lines.close()
+        storage.save_log(user, f"CLI batch {args.batch}: {count} commands, {failures} failed")
+        print(f"Ran {count} commands, {failures} failed", file=sys.stderr)
+        return 1 if failures else 0
+
+    try:
+        with warehouse.batch():
+            run_command(warehouse, args)
+    except CommandFailed as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    storage.save_log(user, f"CLI {' '.join(sys.argv[1:] if argv is None else argv)}")
+    return 0
+
+
+def _default_user():
+    """Return the login name of whoever runs the command."""
+    try:
+        return getpass.getuser()
+    except Exception:
+        return "cli"
+
+if __name__ == "__main__":
+    sys.exit(main())
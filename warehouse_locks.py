@@ -0,0 +1,186 @@
+import threading
+from contextlib import contextmanager
+from events import StockAdjusted, ProductAdded, ProductRemoved
+
+
+class ReadWriteLock:
+    """
+    Lock that allows many readers or a single writer.
+
+    Both sides are reentrant for the thread that holds them, and a thread
+    holding the write lock may also take the read lock. Waiting writers block
+    new readers so a steady stream of operations cannot starve a checkpoint.
+    """
+
+    def __init__(self):
+        """Initialize an unlocked lock."""
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = {}  # Maps thread id to its read depth
+        self._writer = None  # Thread id of the writer
+        self._write_depth = 0
+        self._writers_waiting = 0
+
+    def acquire_read(self):
+        """Take the lock for reading."""
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me or me in self._readers:
+                self._readers[me] = self._readers.get(me, 0) + 1
+                return
+            while self._writer is not None or self._writers_waiting:
+                self._condition.wait()
+            self._readers[me] = 1
+
+    def release_read(self):
+        """Release a read acquired with acquire_read."""
+        me = threading.get_ident()
+        with self._condition:
+            self._readers[me] -= 1
+            if not self._readers[me]:
+                del self._readers[me]
+                self._condition.notify_all()
+
+    def acquire_write(self):
+        """Take the lock exclusively."""
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self):
+        """Release a write acquired with acquire_write."""
+        with self._condition:
+            self._write_depth -= 1
+            if not self._write_depth:
+                self._writer = None
+                self._condition.notify_all()
+
+    @contextmanager
+    def read_locked(self):
+        """Context manager holding the lock for reading."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self):
+        """Context manager holding the lock exclusively."""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class WarehouseLocks:
+    """
+    Lock hierarchy that lets independent warehouse operations run in parallel.
+
+    Locks are always taken in this order, which rules out deadlocks between
+    operations that touch several products or locations (such as moves):
+
+        1. catalog           shared for stock changes, exclusive when products
+                             are added or removed or the whole state is read
+        2. product stripes   in ascending stripe order
+        3. location stripes  in ascending stripe order
+        4. leaf locks        history, index and counter; nothing else is
+                             acquired while one of these is held
+
+    Products and locations are hashed onto a fixed number of striped locks, so
+    two scanners working on different products and shelves rarely wait on each
+    other.
+
+    Attributes:
+        catalog (ReadWriteLock): Guards the set of products and whole-state reads
+        history (Lock): Guards the undo/redo stacks
+        index (Lock): Guards the secondary product indexes
+        counter (Lock): Guards the unsaved change counter
+    """
+
+    def __init__(self, cols, stripes=64):
+        """
+        Initialize the lock set.
+
+        Args:
+            cols (int): Number of grid columns, used to number locations
+            stripes (int): Number of product stripes and of location stripes
+        """
+        self.cols = cols
+        self.stripes = stripes
+        self.catalog = ReadWriteLock()
+        self.product_stripes = [threading.RLock() for _ in range(stripes)]
+        self.location_stripes = [threading.RLock() for _ in range(stripes)]
+        self.history = threading.Lock()
+        self.index = threading.Lock()
+        self.counter = threading.Lock()
+
+    def product_stripe(self, sku):
+        """Return the stripe number guarding a product."""
+        return hash(sku) % self.stripes
+
+    def location_stripe(self, row, col):
+        """Return the stripe number guarding a location."""
+        return (row * self.cols + col) % self.stripes
+
+    @contextmanager
+    def exclusive(self):
+        """Hold the catalog exclusively, which excludes every other operation."""
+        with self.catalog.write_locked():
+            yield
+
+    @contextmanager
+    def for_product(self, sku):
+        """Hold the locks needed to read or update a single product's cached data."""
+        with self.catalog.read_locked():
+            with self._holding([self.product_stripes[self.product_stripe(sku)]]):
+                yield
+
+    @contextmanager
+    def for_events(self, events):
+        """
+        Hold every lock needed to apply a group of events atomically.
+
+        Args:
+            events (list): InventoryEvent objects about to be applied
+        """
+        structural = False
+        products = set()
+        locations = set()
+        for event in events:
+            products.add(self.product_stripe(event.sku))
+            if isinstance(event, StockAdjusted):
+                locations.add(self.location_stripe(event.row, event.col))
+            elif isinstance(event, (ProductAdded, ProductRemoved)):
+                structural = True
+
+        catalog = self.catalog.write_locked() if structural else self.catalog.read_locked()
+        with catalog:
+            stripes = ([self.product_stripes[i] for i in sorted(products)] +
+                       [self.location_stripes[i] for i in sorted(locations)])
+            with self._holding(stripes):
+                yield
+
+    @staticmethod
+    @contextmanager
+    def _holding(locks):
+        """Acquire locks in the given order and release them in reverse."""
+        acquired = []
+        try:
+            for lock in locks:
+                lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()